@@ -197,7 +197,9 @@ diastolic_edges = (
         )
 
 
-readings = (  # a subset of my readings
+if __name__ == '__main__':
+
+    readings = (  # a subset of my readings
         (145, 67),# used for testing
         (123, 64),
         (124, 56),
@@ -2,7 +2,7 @@
 
 # File: aha/bpc.py
 
-"""
+r"""
 Still a work in progress; using classes to separate
 inified classification (one result for each sys/dia reading)
 from classification of systolic and diastolic values separately.
@@ -25,12 +25,9 @@ There are also criteria for evaluating individual systolic or
 diastolic readings.  (See the 'SeparateCategory' class.)
 """
 
-import re
+import os
 import sys
 
-valid_data_re = r"\s?(\d{2,3})\s+(\d{2,3})\s+(\d{2,})\s+(\d+[.]\d+)"
-valid_pattern = re.compile(valid_data_re)
-
 class SingleCategory(object):
     categories = ('NORMAL', 'ELEVATED', 'STAGE 1 HYPERTENSION', 
         'STAGE 2 HYPERTENSION', 'HYPERTENSIVE CRISIS',)
@@ -116,14 +113,18 @@ if __name__ == '__main__':
         if (bp_instance.category(datum[0], datum[1]) !=
                             bp_instance.categories[datum[2]]):
             _ = input('{0:}/{1:} != {2:}'.format(*datum))
-    with open('../bp_numbers.txt', 'r') as stream:
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(here))
+    import lineparser
+    with open(os.path.join(here, '..', 'bp_numbers.txt'), 'r') as stream:
         for line in stream:
             line = line.strip()
-            match = valid_pattern.match(line)
-            if match:
-                print(f"{line:>24} => " +
-                    f"{bp_instance.category(match[1],match[2]):<24}"
-                    + both.get_categories(match[1], match[2]))
-            else:
+            try:
+                (s, d, _, _), _ = lineparser.parse_line(line)
+            except ValueError:
                 print(f'no match for: {line}')
+            else:
+                print(f"{line:>24} => " +
+                    f"{bp_instance.category(s, d):<24}"
+                    + both.get_categories(s, d))
 
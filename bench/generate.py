@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+# File: bench/generate.py
+
+"""
+Writes realistic (but synthetic) data files for benchmarking.
+
+The output is deterministic for a given seed: a few
+readings a day starting at START, each reading drawn around
+typical values, interspersed (at the given ratios) with comment
+lines, blank lines, undated ("0.0") readings and invalid lines
+of the sort found in test/data/bad_data.
+
+usage: generate.py [-h] [--seed SEED] [--invalid-ratio R]
+                   [--comment-ratio R] NUMBER OUTFILE
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import random
+
+START = datetime(2012, 1, 1, 7, 0)
+CHUNK = 10000  # lines written at a time
+
+invalid_lines = (
+    "A Non Valid file of BP recordings",
+    "the quick brown fox",
+    "jumped over the fence",
+    "150 71 71",
+    "134 68 75 yesterday",
+    "extranious 134 65 60 20220630.2300",
+)
+
+
+def readings(n, seed=0, invalid_ratio=0.01, comment_ratio=0.01):
+    """Yields the lines (without line endings) of the file."""
+    rnd = random.Random(seed)
+    stamp = START
+    yield "# Synthetic data: {} readings, seed {}".format(n, seed)
+    for _ in range(n):
+        r = rnd.random()
+        if r < comment_ratio:
+            yield rnd.choice(("# a comment", ""))
+        elif r < comment_ratio + invalid_ratio:
+            yield rnd.choice(invalid_lines)
+        systolic = max(60, min(250, int(rnd.gauss(132, 16))))
+        diastolic = max(35, min(140, int(rnd.gauss(74, 10))))
+        pulse = max(35, min(160, int(rnd.gauss(68, 9))))
+        stamp += timedelta(minutes=rnd.randint(240, 720))
+        if rnd.random() < 0.001:
+            time_stamp = "0.0"
+        else:
+            time_stamp = stamp.strftime("%Y%m%d.%H%M")
+        yield "{} {} {} {}".format(systolic, diastolic, pulse, time_stamp)
+
+
+def generate(path, n, seed=0, invalid_ratio=0.01, comment_ratio=0.01):
+    """Writes <n> readings (plus noise) to <path>."""
+    lines = readings(n, seed, invalid_ratio, comment_ratio)
+    with open(path, "w") as f:
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == CHUNK:
+                f.write("\n".join(chunk) + "\n")
+                chunk = []
+        if chunk:
+            f.write("\n".join(chunk) + "\n")
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("number", type=int, help="number of readings")
+    parser.add_argument("outfile", help="file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--comment-ratio", type=float, default=0.01)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    generate(args.outfile, args.number, args.seed,
+             args.invalid_ratio, args.comment_ratio)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+# File: bench/run.py
+
+"""
+Benchmarks the parsing, filtering, sorting, reporting and
+classification code on generated data files (see generate.py.)
+The startup-* benchmarks time whole runs of bp_tracker.py (the
+best of --repeat), also less that of python -c pass, and record
+the time -X importtime reports spent importing (lazy.py adds the
+modules it loads); --add-budget sets the most a run of --add may
+take over and above starting Python.
+
+Each benchmark runs in a fresh process so that its peak RSS is
+its own.  Its setup (e.g. reading the file into a ReadingStore
+before timing filter_data) is not timed.  Results are reported
+as readings per second and peak RSS; --json saves them and
+--compare checks them against a previous run, exiting with
+status 1 if any benchmark got slower by more than --tolerance.
+
+usage: run.py [-h] [--sizes N [N ...]] [--data-dir DIR]
+              [--only NAME [NAME ...]] [--repeat N]
+              [--json FILE] [--compare FILE] [--tolerance T]
+              [--add-budget SECONDS]
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+sys.path.insert(0, here)
+
+import bp_tracker  # noqa: E402
+import classify  # noqa: E402
+import generate  # noqa: E402
+import lineparser  # noqa: E402
+
+DEFAULT_SIZES = (10000, 100000)
+ADD_BUDGET = 0.01  # seconds more than python -c pass
+SCRIPT = os.path.join(os.path.dirname(here), "bp_tracker.py")
+
+
+def filter_args(**kwargs):
+    args = dict(times=None, range=None, date=None, number=None)
+    args.update(kwargs)
+    return argparse.Namespace(**args)
+
+
+def _lines(path):
+    with open(path) as f:
+        return list(bp_tracker.useful_lines(f))
+
+
+def _scan(path):
+    with open(path, "rb") as f:
+        return sum(1 for _ in lineparser.iter_readings(f, []))
+
+
+def _parallel_setup(path):
+    lineparser.PARALLEL_MIN = 0  # split even the smaller files
+    return path
+
+
+def _parallel(path):
+    return len(lineparser.read_store(path, jobs=os.cpu_count()))
+
+
+def _date_range(store):
+    """A -r RANGE covering the middle tenth of the data."""
+    dates = [stamp // 10000 for stamp in store.stamps if stamp]
+    n = len(dates)
+    return [dates[n * 9 // 20], dates[n * 11 // 20]]
+
+
+# Each benchmark: name => (setup, run).
+# setup(path) returns the state passed to run(state) which
+# returns the number of readings processed.
+
+def _valid_data(lines):
+    return sum(1 for line in lines if bp_tracker.valid_data(line))
+
+
+def _filter_setup(make_args, read=bp_tracker.store_from_file):
+    def setup(path):
+        data = read(path)
+        return data, make_args(data)
+    return setup
+
+
+def _filter(state):
+    data, args = state
+    bp_tracker.filter_data(data, args)
+    return len(data)
+
+
+def _format_report(store):
+    bp_tracker.format_report(store.systolics, store.diastolics)
+    return len(store)
+
+
+def _aha_loop(store):
+    from aha import aha
+
+    for s, d in zip(store.systolics, store.diastolics):
+        aha.get_category(s, "s")
+        aha.get_category(d, "d")
+    return len(store)
+
+
+def _classify_setup(scheme):
+    def setup(path):
+        classify.get(scheme).full_tables()  # not part of the timing
+        return bp_tracker.store_from_file(path)
+    return setup
+
+
+def _classify(store, scheme):
+    return len(classify.classify_many(store, scheme)[0])
+
+
+BENCHMARKS = {
+    "useful_lines": (lambda path: path, lambda path: len(_lines(path))),
+    "valid_data": (_lines, _valid_data),
+    "array_from_file": (lambda path: path,
+                        lambda path: len(bp_tracker.array_from_file(path))),
+    "lineparser.scan": (lambda path: path, _scan),
+    "parse_parallel": (_parallel_setup, _parallel),
+    "store_from_file": (lambda path: path,
+                        lambda path: len(bp_tracker.store_from_file(path))),
+    "filter_data-times": (_filter_setup(
+        lambda store: filter_args(times=[700, 1200])), _filter),
+    "filter_data-range": (_filter_setup(
+        lambda store: filter_args(range=_date_range(store))), _filter),
+    "filter_data-date": (_filter_setup(
+        lambda store: filter_args(date=[_date_range(store)[0]])), _filter),
+    "filter_data-number": (_filter_setup(
+        lambda store: filter_args(number=[1000])), _filter),
+    "filter_data-list": (_filter_setup(
+        lambda data: filter_args(number=[1000]),
+        bp_tracker.array_from_file), _filter),
+    "sort_by_index": (bp_tracker.store_from_file, lambda store: len(
+        bp_tracker.sort_by_index(store, -1))),
+    "format_report": (bp_tracker.store_from_file, _format_report),
+    "aha.get_category": (bp_tracker.store_from_file, _aha_loop),
+}
+for _scheme in sorted(classify.SCHEMES):
+    BENCHMARKS["classify-" + _scheme] = (
+        _classify_setup(_scheme),
+        lambda store, scheme=_scheme: _classify(store, scheme))
+
+
+# Whole runs of bp_tracker.py: name => its arguments (besides -f.)
+STARTUP = {
+    "startup-add": ["-a", "120", "80", "60"],
+    "startup-report": ["-n", "10"],
+}
+
+
+def import_time(stderr):
+    """
+    The microseconds spent importing, from -X importtime output:
+    the sum of each module's own time.
+    """
+    total = 0
+    for line in stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if (line.startswith("import time:") and len(fields) == 3
+                and fields[0].strip().isdigit()):
+            total += int(fields[0])
+    return total
+
+
+def python_startup(repeat):
+    """The seconds python -c pass takes, best of <repeat>."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def run_command(command):
+    """
+    Runs <command>, raising CalledProcessError if it fails.
+    Returns (seconds, its own peak RSS in KiB): os.wait4 gives the
+    usage of that one process, RUSAGE_CHILDREN the largest of any
+    child so far.  (Linux counts the RSS of this process when it
+    forks the child towards the child's peak, so there's a floor.)
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return elapsed, usage.ru_maxrss
+
+
+def run_startup(name, path, repeat):
+    """
+    Runs bp_tracker.py as startup benchmark <name> on a copy of
+    <path>, best of <repeat>, then once more with -X importtime.
+    Returns (seconds, peak RSS in KiB, microseconds importing.)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, os.path.basename(path))
+        shutil.copy(path, copy)
+        command = [SCRIPT, "-f", copy] + STARTUP[name]
+        best = rss = None
+        for _ in range(repeat):
+            elapsed, peak = run_command([sys.executable] + command)
+            if best is None or elapsed < best:
+                best = elapsed
+            rss = max(rss or 0, peak)
+        done = subprocess.run([sys.executable, "-X", "importtime"] + command,
+                              check=True, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, text=True)
+    return best, rss, import_time(done.stderr)
+
+
+def run_one(name, path, repeat):
+    """
+    Runs (in a worker process) benchmark <name> on <path>, best
+    of <repeat>.  Returns (readings, seconds, peak RSS in KiB.)
+    """
+    setup, run = BENCHMARKS[name]
+    state = setup(path)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        n = run(state)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return n, best, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def data_file(directory, size):
+    path = os.path.join(directory, "bp_{}.txt".format(size))
+    if not os.path.exists(path):
+        generate.generate(path, size)
+    return path
+
+
+def run_all(sizes, names, directory, repeat=1):
+    """Returns a list of result dicts, one per (name, size.)"""
+    results = []
+    python = None  # seconds to start python, if needed
+    for size in sizes:
+        path = data_file(directory, size)
+        for name in names:
+            extra = {}
+            if name in STARTUP:
+                seconds, rss, extra["import_us"] = run_startup(
+                    name, path, repeat)
+                if python is None:
+                    python = python_startup(repeat)
+                extra["over_python"] = seconds - python
+                n = 1  # runs
+            else:
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    n, seconds, rss = executor.submit(
+                        run_one, name, path, repeat).result()
+            results.append(dict(name=name, size=size, readings=n,
+                                seconds=seconds,
+                                rate=n / seconds if seconds else 0,
+                                peak_rss_kib=rss, **extra))
+            print("{:<24} {:>9} {:>10.4f}s {:>14,.0f}/s {:>10,} KiB".format(
+                name, size, seconds, results[-1]["rate"], rss)
+                + ("  +{:.4f}s  imports {:,} us".format(
+                    extra["over_python"], extra["import_us"])
+                   if extra else ""))
+    return results
+
+
+def over_budget(results, budget):
+    """
+    Returns a list of messages about --add runs taking more than
+    <budget> seconds longer than python -c pass.
+    """
+    return ["{} ({}): {:.4f}s more".format(r["name"], r["size"],
+                                          r["over_python"])
+            for r in results
+            if r["name"] == "startup-add" and r["over_python"] > budget]
+
+
+def compare(results, previous, tolerance):
+    """
+    Returns a list of messages about benchmarks whose rate
+    dropped by more than <tolerance> (a fraction) since <previous>.
+    """
+    before = {(r["name"], r["size"]): r for r in previous}
+    ret = []
+    for result in results:
+        old = before.get((result["name"], result["size"]))
+        if old and old["rate"] and \
+                result["rate"] < old["rate"] * (1 - tolerance):
+            ret.append("{} ({}): {:,.0f}/s, was {:,.0f}/s".format(
+                result["name"], result["size"], result["rate"], old["rate"]))
+    return ret
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=list(DEFAULT_SIZES),
+                        help="numbers of readings to benchmark with")
+    parser.add_argument("--data-dir",
+                        help="where generated files are kept (and reused)")
+    parser.add_argument("--only", nargs="+",
+                        choices=sorted(BENCHMARKS) + sorted(STARTUP),
+                        metavar="NAME", help="run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="best of REPEAT runs (default 3)")
+    parser.add_argument("--json", help="save the results to FILE")
+    parser.add_argument("--compare", help="compare with saved results")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed slow down (default 0.1 i.e. 10%%)")
+    parser.add_argument("--add-budget", type=float, default=ADD_BUDGET,
+                        metavar="SECONDS",
+                        help="longest a run of bp_tracker.py -a may take "
+                        "over python -c pass (default {})".format(ADD_BUDGET))
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    names = args.only or list(BENCHMARKS) + list(STARTUP)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.data_dir or tmp
+        results = run_all(args.sizes, names, directory, args.repeat)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    slow = over_budget(results, args.add_budget)
+    if slow:
+        print("Over the --add budget of {}s:".format(args.add_budget))
+        for line in slow:
+            print("\t" + line)
+        sys.exit(1)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(results, json.load(f), args.tolerance)
+        if slower:
+            print("Regressions:")
+            for line in slower:
+                print("\t" + line)
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+
+# File: binfile.py
+
+"""
+Provides classes:
+    BinaryReadings, BinaryFileError
+and functions:
+    is_binary, convert, write_store, append, append_many
+
+A packed binary alternative to the text data file.
+The file begins with an 8 byte header (magic, version, record size)
+followed by fixed width little endian records:
+    systolic, diastolic, pulse: uint16
+    time stamp: uint32, minutes since the epoch (NO_TIME if undated)
+Readings dated before the epoch can't be stored.  NO_TIME is out
+of the range of real times (it would be after the year 9999) so
+that every minute from the epoch on is a time stamp.
+The number of records is implied by the size of the file so
+records can be appended without rewriting the header.
+
+BinaryReadings memory maps the file so only the records
+actually asked for are ever decoded.
+"""
+
+import mmap
+import os
+import struct
+
+import writer
+from store import UNDATED, ReadingStore, int2minutes, minutes2int
+
+MAGIC = b"BPT\x00"
+VERSION = 2  # 1 stored undated readings as 0, 1970-01-01 00:00
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<HHHI")
+CHUNK = 4096  # records decoded at a time when iterating
+NO_TIME = 0xFFFFFFFF  # the time stamp of an undated reading
+
+
+class BinaryFileError(ValueError):
+    """Not a binary data file we can read (or append to.)"""
+
+
+def _check_header(header):
+    """Raises BinaryFileError unless <header> is one we can read."""
+    if len(header) < HEADER.size:
+        raise BinaryFileError("not a binary data file")
+    magic, version, size = HEADER.unpack(header)
+    if magic != MAGIC or size != RECORD.size:
+        raise BinaryFileError("not a binary data file")
+    if version != VERSION:
+        raise BinaryFileError("unsupported version {} (convert the text "
+                              "file again)".format(version))
+
+
+def _appendable(fd):
+    """
+    A writer.append check: raises BinaryFileError unless the file
+    is a binary data file of ours ending with a whole record.
+    """
+    _check_header(os.pread(fd, HEADER.size, 0))
+    if (os.fstat(fd).st_size - HEADER.size) % RECORD.size:
+        raise BinaryFileError("ends with a partial record")
+
+
+def is_binary(path):
+    """True if <path> exists and begins with our magic number."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _pack(systolic, diastolic, pulse, stamp):
+    """
+    Packs one reading (stamp being YYYYmmddhhmm, 0 if undated.)
+    Raises ValueError if it can't be stored.
+    """
+    minutes = NO_TIME if stamp == 0 else int2minutes(stamp)
+    if minutes < 0:
+        raise ValueError("{} is before the epoch".format(stamp))
+    try:
+        return RECORD.pack(systolic, diastolic, pulse, minutes)
+    except struct.error as e:
+        raise ValueError(str(e))
+
+
+def _stamp(minutes):
+    """The YYYYmmddhhmm stamp of a record's time."""
+    if minutes == NO_TIME:
+        return 0
+    return minutes2int(minutes)
+
+
+def _write(path, records):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        f.write(b"".join(records))
+
+
+def write_store(store, path):
+    """
+    (Re)writes <path> as a binary file containing <store>.
+    Raises ValueError if any of its readings can't be stored.
+    """
+    _write(path, [_pack(*reading) for reading in zip(*store.columns)])
+
+
+def convert(store, binary_file, invalid_lines=None):
+    """
+    Builds <binary_file> from the readings in <store> (as read
+    from a text data file.)  Readings which can't be stored
+    (impossible dates, dated before the epoch) go to
+    <invalid_lines>.  Returns the number of records written.
+    """
+    records = []
+    for i, reading in enumerate(zip(*store.columns)):
+        try:
+            records.append(_pack(*reading))
+        except ValueError:
+            if invalid_lines is not None:
+                invalid_lines.append("{} {} {} {}".format(*store[i]))
+    _write(binary_file, records)
+    return len(records)
+
+
+def append(path, systolic, diastolic, pulse, stamp):
+    """
+    Appends a single reading to an existing binary file
+    (see writer.append.)  Raises BinaryFileError if <path> isn't
+    one we can append to, ValueError if the reading can't be
+    stored.
+    """
+    writer.append(path, _pack(systolic, diastolic, pulse, stamp),
+                  check=_appendable)
+
+
+def append_many(path, readings, rejected=None):
+    """
+    Appends <readings> ((systolic, diastolic, pulse, YYYYmmddhhmm)
+    tuples) to an existing binary file in one (locked) write,
+    synced to disk.  Readings which can't be packed (e.g. dated before the
+    epoch) are appended to <rejected> if provided.
+    Returns the number of records written; raises BinaryFileError
+    if <path> isn't a binary file we can append to.
+    """
+    records = []
+    for reading in readings:
+        try:
+            records.append(_pack(*reading))
+        except ValueError:
+            if rejected is not None:
+                rejected.append(reading)
+    writer.append(path, b"".join(records), check=_appendable)
+    return len(records)
+
+
+class BinaryReadings(object):
+    """
+    Read only, memory mapped view of a binary data file.
+    Use as a context manager or call 'close' when done.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            _check_header(f.read(HEADER.size))
+            length = f.seek(0, 2)
+            self.n = (length - HEADER.size) // RECORD.size
+            if self.n:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.mm = b""
+
+    def __len__(self):
+        return self.n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+
+    def _offset(self, i):
+        if i < 0:
+            i += self.n
+        return HEADER.size + i * RECORD.size
+
+    def _check(self, i):
+        if not -self.n <= i < self.n:
+            raise IndexError("record index out of range")
+
+    def stamp(self, i):
+        """Returns the YYYYmmddhhmm stamp of record <i>."""
+        self._check(i)
+        minutes = RECORD.unpack_from(self.mm, self._offset(i))[3]
+        return _stamp(minutes)
+
+    def __getitem__(self, i):
+        self._check(i)
+        s, d, p, minutes = RECORD.unpack_from(self.mm, self._offset(i))
+        return [s, d, p, _stamp(minutes)]
+
+    def __iter__(self):
+        """
+        Yields (systolic, diastolic, pulse, YYYYmmddhhmm) tuples,
+        decoding CHUNK records at a time.
+        """
+        for start in range(0, self.n, CHUNK):
+            stop = min(start + CHUNK, self.n)
+            view = memoryview(self.mm)[self._offset(start):self._offset(stop)]
+            try:
+                for s, d, p, minutes in RECORD.iter_unpack(view):
+                    yield s, d, p, _stamp(minutes)
+            finally:
+                view.release()
+
+    def store(self, start=0, stop=None):
+        """Decodes records [start:stop] into a ReadingStore."""
+        start, stop, _ = slice(start, stop).indices(self.n)
+        ret = ReadingStore()
+        if stop <= start:
+            return ret
+        view = memoryview(self.mm)[self._offset(start):self._offset(stop)]
+        systolics, diastolics, pulses, stamps = ret.columns
+        dates, times, epochs = ret.times
+        try:
+            for s, d, p, minutes in RECORD.iter_unpack(view):
+                systolics.append(s)
+                diastolics.append(d)
+                pulses.append(p)
+                if minutes != NO_TIME:
+                    stamp = minutes2int(minutes)
+                    stamps.append(stamp)
+                    dates.append(stamp // 10000)
+                    times.append(minutes % 1440)
+                    epochs.append(minutes)
+                else:
+                    stamps.append(0)
+                    dates.append(UNDATED)
+                    times.append(UNDATED)
+                    epochs.append(UNDATED)
+        finally:
+            view.release()
+        return ret
+
+
+def read_store(path, args=None):
+    """
+    Returns a ReadingStore from the binary file at <path>.
+    If the only filter in <args> is -n, only the last
+    NUMBER records are decoded.
+    """
+    with BinaryReadings(path) as readings:
+        if (args is not None and args.number and args.number[0] > 0
+                and not (args.times or args.range or args.date)):
+            return readings.store(max(len(readings) - args.number[0], 0))
+        return readings.store()
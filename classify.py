@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+# File: classify.py
+
+"""
+Provides class:
+    Classifier
+and functions:
+    labels, thresholds, aha_systolic, aha_diastolic,
+    single_category, unified_status, separate_category, get,
+    classify_many, format_distribution
+
+Compiles each of our classification schemes into a dense lookup
+table indexed by mmHg value(s) so that classifying a reading is
+a table lookup rather than a scan of the scheme's boundaries:
+    labels(bp_tracker.systolic_labels)  } (min, max, label) scales
+    labels(bp_tracker.diastolic_labels) } (see bp_tracker.get_label)
+    aha_systolic(), aha_diastolic()    thresholds of aha.get_category
+    single_category()                  bpc.SingleCategory.category
+    unified_status()                   aha.get_unified_status
+
+Tables are built by evaluating the scheme for every value that
+matters so lookups give the same results as the original code.  Each
+dimension covers -1 through a limit beyond which the result can no
+longer change; values outside are clamped to that range.
+Codes are indices into the Classifier's 'names'; NONE is the code
+of a None result (e.g. a value beyond every range of a scale) or,
+for get_unified_status, of the combinations it can't classify
+(it fails an assertion, e.g. for 180/70.)
+
+Tables are built the first time they are asked for.
+
+classify_many classifies all the readings of a ReadingStore at
+once, without a Python level loop per reading: NumPy fancy
+indexing if available, otherwise tables covering the whole uint16
+range of the store's columns fed to map() over the arrays.
+"""
+
+from array import array
+from collections import Counter
+from functools import lru_cache
+from operator import add
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NONE = 255
+
+
+class Classifier(object):
+    """
+    A compiled scheme: category <names> and a lookup <table>
+    (bytes, row major) with one dimension per value classified
+    (systolic, or systolic and diastolic); <limits> gives the
+    largest value each dimension distinguishes and <columns>
+    which ReadingStore column each dimension is taken from.
+    """
+
+    def __init__(self, names, table, limits, columns=(0, 1)):
+        self.names = tuple(names)
+        self.table = bytes(table)
+        self.limits = tuple(limits)
+        self.columns = tuple(columns[:len(self.limits)])
+        self.width = self.limits[-1] + 2  # -1..limit inclusive
+        self._full = None
+
+    def _index(self, value, limit):
+        return min(max(int(value), -1), limit) + 1
+
+    def code(self, *values):
+        """Returns the code for the given value(s)."""
+        if len(self.limits) == 1:
+            return self.table[self._index(values[0], self.limits[0])]
+        return self.table[self._index(values[0], self.limits[0])
+                          * self.width
+                          + self._index(values[1], self.limits[1])]
+
+    def name(self, code):
+        return None if code == NONE else self.names[code]
+
+    def __call__(self, *values):
+        """Returns the category name (or None) for the value(s)."""
+        return self.name(self.code(*values))
+
+    def full_tables(self):
+        """
+        Returns, for each dimension, a table mapping every uint16
+        value to its offset into 'table' (the clamping done once.)
+        """
+        if self._full is None:
+            strides = (self.width, 1)[-len(self.limits):]
+            full = []
+            for limit, stride in zip(self.limits, strides):
+                table = array("l", [(v + 1) * stride
+                                    for v in range(limit + 1)])
+                table.extend(array("l", [(limit + 1) * stride])
+                             * (0x10000 - limit - 1))
+                full.append(table)
+            self._full = tuple(full)
+        return self._full
+
+    def as_numpy(self):
+        """
+        Returns the table as a NumPy uint8 array (one dimension
+        per value) to be indexed by (clipped value + 1).
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for 'as_numpy'")
+        shape = tuple(limit + 2 for limit in self.limits)
+        table = numpy.frombuffer(self.table, dtype=numpy.uint8)
+        return table.reshape(shape)
+
+
+def _compile(func, names, limits, columns=(0, 1)):
+    names = tuple(names)
+    codes = {name: code for code, name in enumerate(names)}
+    codes[None] = NONE
+    if len(limits) == 1:
+        table = [codes[func(v)] for v in range(-1, limits[0] + 1)]
+    else:
+        table = [codes[func(s, d)]
+                 for s in range(-1, limits[0] + 1)
+                 for d in range(-1, limits[1] + 1)]
+    return Classifier(names, table, limits, columns)
+
+
+@lru_cache(maxsize=None)
+def labels(scale, column=0):
+    """
+    Compiles a tuple of (min, max, label) tuples (as used by
+    bp_tracker.get_label) to be applied to store column <column>.
+    """
+    def get_label(v):
+        for lower, upper, label in scale:
+            if lower <= v <= upper:
+                return label
+
+    names = []
+    for _, _, label in scale:
+        if label not in names:
+            names.append(label)
+    limit = max(upper for _, upper, _ in scale) + 1
+    return _compile(get_label, names, (limit,), (column,))
+
+
+@lru_cache(maxsize=None)
+def thresholds(bounds, categories, column=0):
+    """
+    Compiles a threshold scheme as used by aha.get_category:
+    a value gets the category of the first bound it is below,
+    the last category if none.
+    """
+    def category(v):
+        for n, bound in enumerate(bounds):
+            if v < bound:
+                return categories[n]
+        return categories[-1]
+
+    return _compile(category, categories, (max(bounds),), (column,))
+
+
+def aha_systolic():
+    from aha import aha
+
+    return thresholds(aha.s, aha.categories, 0)
+
+
+def aha_diastolic():
+    from aha import aha
+
+    return thresholds(aha.d, aha.categories, 1)
+
+
+@lru_cache(maxsize=None)
+def separate_category():
+    """
+    bpc.SeparateCategory: the (systolic, diastolic) pair of
+    categories, named as "systolic / diastolic".
+    """
+    from aha import bpc
+
+    scheme = bpc.SeparateCategory()
+    n = len(scheme.categories)
+    names = ["{} / {}".format(s, d) for s in scheme.categories
+             for d in scheme.categories]
+    systolic = thresholds(scheme.s, scheme.categories)
+    diastolic = thresholds(scheme.d, scheme.categories)
+    table = [s * n + d for s in systolic.table for d in diastolic.table]
+    return Classifier(names, table, systolic.limits + diastolic.limits)
+
+
+@lru_cache(maxsize=None)
+def single_category():
+    """bpc.SingleCategory().category(sys, dia) as a table."""
+    from aha import bpc
+
+    scheme = bpc.SingleCategory()
+    return _compile(scheme.category, scheme.categories, (181, 120))
+
+
+UNIFIED = ("Normal BP", "Pre-hypertension", "Stage I hypertension",
+           "Stage II hypertension", "Hypertensive crisis")
+
+
+@lru_cache(maxsize=None)
+def unified_status():
+    """aha.get_unified_status(sp, dp) as a table."""
+    from aha import aha
+
+    def status(sp, dp):
+        try:
+            return aha.get_unified_status(sp, dp)
+        except AssertionError:
+            return None
+
+    return _compile(status, UNIFIED, (181, 111))
+
+
+SCHEMES = {
+    "aha-systolic": aha_systolic,
+    "aha-diastolic": aha_diastolic,
+    "single": single_category,
+    "separate": separate_category,
+    "unified": unified_status,
+}
+
+
+def get(scheme):
+    """Returns the Classifier for a scheme name (see SCHEMES.)"""
+    if scheme not in SCHEMES:
+        raise ValueError("Unknown classification scheme: {}".format(scheme))
+    return SCHEMES[scheme]()
+
+
+def classify_many(store, scheme):
+    """
+    Classifies every reading in <store> according to <scheme>
+    (a Classifier or a name from SCHEMES.)
+    Returns a pair: an array('B') of codes (one per reading) and a
+    histogram: a dict mapping each category name (in code order)
+    to its count, with None counting readings of code NONE.
+    """
+    if not isinstance(scheme, Classifier):
+        scheme = get(scheme)
+    columns = [store.columns[i] for i in scheme.columns]
+    if numpy is not None:
+        table = numpy.frombuffer(scheme.table, dtype=numpy.uint8)
+        index = 0
+        strides = (scheme.width, 1)[-len(scheme.limits):]
+        for column, limit, stride in zip(columns, scheme.limits, strides):
+            values = numpy.frombuffer(column, dtype=column.typecode)
+            values = numpy.minimum(values.astype(numpy.intp), limit) + 1
+            index = index + values * stride
+        found = table[index]
+        codes = array("B", found.tobytes())
+        counts = numpy.bincount(found, minlength=NONE + 1).tolist()
+        counts = dict(enumerate(counts))
+    else:
+        full = scheme.full_tables()
+        offsets = map(full[0].__getitem__, columns[0])
+        if len(columns) == 2:
+            offsets = map(add, offsets, map(full[1].__getitem__, columns[1]))
+        codes = array("B", bytes(map(scheme.table.__getitem__, offsets)))
+        counts = Counter(codes)
+    histogram = {name: counts.get(code, 0)
+                 for code, name in enumerate(scheme.names)}
+    if counts.get(NONE):
+        histogram[None] = counts[NONE]
+    return codes, histogram
+
+
+def format_distribution(histogram, title="Categories"):
+    """
+    Returns (as a string) the percentage of readings in each
+    category of a classify_many histogram; empty categories
+    are left out.
+    """
+    total = sum(histogram.values())
+    lines = ["{} ({} readings)".format(title, total)]
+    for name, count in histogram.items():
+        if count:
+            lines.append("{:>6.1f}%  {}".format(
+                100 * count / total, "unclassified" if name is None
+                else name))
+    return "\n".join(lines) + "\n"
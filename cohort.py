@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# File: cohort.py
+
+"""
+Provides functions:
+    discover, summarize_file, merge, cohort_report, format_cohort
+
+Reports on a whole directory of data files (one per patient)
+at once: each file is summarized in a worker process (see
+concurrent.futures.ProcessPoolExecutor) using the constant memory
+pipeline, and only the small per-file summaries (dicts, see
+stats.RunningStats.to_dict) come back to be merged into the
+cohort aggregates.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import fnmatch
+import os
+
+import pipeline
+import stats
+
+DATA_PATTERNS = ("*.txt", "*.bpt")
+
+
+def discover(directory, patterns=DATA_PATTERNS):
+    """Returns a sorted list of the data files under <directory>."""
+    ret = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                ret.append(os.path.join(root, name))
+    return ret
+
+
+def summarize_file(path, args):
+    """
+    Worker: returns a dict summarizing the readings in <path>
+    which pass the filters in <args> (see bp_tracker.filter_data):
+    a pipeline.Summary as a dict (count, sums, means, minima,
+    maxima etc. and the last reading) and the number of invalid
+    lines; or, if the file couldn't be read, the error.
+    """
+    invalid_lines = []
+    ret = dict(path=path, count=0, invalid=0)
+    try:
+        readings = pipeline.filter_readings(
+            pipeline.iter_readings(path, invalid_lines), args)
+        if args.number and args.number[0] > 0:
+            readings = pipeline.last_readings(readings, args.number[0])
+        ret.update(pipeline.summarize(readings).to_dict())
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        ret["error"] = str(e)
+        return ret
+    ret["invalid"] = len(invalid_lines)
+    return ret
+
+
+def merge(summaries):
+    """
+    Combines per-file summaries (those with readings) into
+    cohort aggregates: a stats.RunningStats as a dict plus the
+    numbers of patients and of invalid lines.
+    """
+    total = stats.RunningStats()
+    patients = invalid = 0
+    for summary in summaries:
+        invalid += summary["invalid"]
+        if not summary["count"]:
+            continue
+        patients += 1
+        total.merge(stats.RunningStats.from_dict(summary))
+    ret = total.to_dict()
+    ret.update(patients=patients, invalid=invalid)
+    return ret
+
+
+def cohort_report(directory, args, workers=None):
+    """
+    Summarizes every data file under <directory> using up to
+    <workers> processes (default: one per CPU.)
+    Returns the list of per-file summaries and their merge.
+    """
+    paths = discover(directory)
+    if not paths:
+        return [], merge([])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        summaries = list(executor.map(summarize_file, paths,
+                                      [args] * len(paths),
+                                      chunksize=max(1, len(paths) // 64)))
+    return summaries, merge(summaries)
+
+
+def format_cohort(directory, summaries, cohort):
+    """Returns the combined report (a string.)"""
+    lines = ["{:<30} {:>7} {:>9} {:>9} {:>7}".format(
+        "patient", "count", "average", "last", "pulse")]
+    for summary in summaries:
+        name = os.path.relpath(summary["path"], directory)
+        if "error" in summary:
+            lines.append("{:<30} error: {}".format(name, summary["error"]))
+        elif not summary["count"]:
+            lines.append("{:<30} {:>7}".format(name, 0))
+        else:
+            n = summary["count"]
+            sums = summary["sums"]
+            last = summary["last"]
+            lines.append("{:<30} {:>7} {:>9} {:>9} {:>7}".format(
+                name, n, "{}/{}".format(sums[0] // n, sums[1] // n),
+                "{}/{}".format(last[0], last[1]), sums[2] // n))
+    lines.append("")
+    n = cohort["count"]
+    lines.append("Cohort: {} patients, {} readings, {} invalid lines".format(
+        cohort["patients"], n, cohort["invalid"]))
+    if n:
+        totals = stats.RunningStats.from_dict(cohort)
+        for i, name in enumerate(("Systolic", "Diastolic", "Pulse")):
+            lines.append("{:<10} average {:>4}  std dev {:>5.1f}  "
+                         "min {:>4}  max {:>4}".format(
+                             name, totals.average(i), totals.std(i),
+                             totals.minima[i], totals.maxima[i]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+# File: daemon.py
+
+"""
+Provides class:
+    QueryDaemon
+and function:
+    main
+
+Keeps the readings of a data file parsed, in memory, between
+reports so that frequent queries (dashboards polling every few
+seconds) don't each pay for starting up and loading the file.
+
+The daemon for FILE listens on the Unix socket FILE.sock
+(see bp_tracker.DAEMON_SUFFIX).  A request is a bp_tracker
+command line (JSON encoded, on one line), answered with the
+report it asks for: {"report": ..., "invalid_lines":
+[[number, line], ...]} or {"error": "missing" | "no data" |
+"usage"}.  bp_tracker --daemon
+sends its command line this way and, when no daemon is running,
+does the work itself (see bp_tracker.ask_daemon).
+
+Before answering, the daemon catches up with whatever has been
+appended to FILE since (text files through a parse cache, see
+parsecache.py, so only the new lines are parsed; binary files
+are read again when they change.)  A last line still being
+written (no newline yet) is left until it is complete.  Replies
+are remembered until the file changes.
+--stream and the rollups are not used: the readings are already
+at hand.
+
+usage: daemon.py [-h] [-f FILE] [--jobs JOBS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+
+import binfile
+import bp_tracker
+import parsecache
+
+MAX_REPLIES = 256
+
+
+class QueryDaemon(object):
+    """
+    Answers report requests on the data file <path>; a text file
+    is parsed by <jobs> processes if given (see parsecache.py.)
+    """
+
+    def __init__(self, path, jobs=None):
+        self.path = path
+        self.jobs = jobs
+        self.socket_path = path + bp_tracker.DAEMON_SUFFIX
+        self.requests = 0
+        self._cache = None
+        self._binary = None  # (identity, store) of a binary file
+        self._server = None
+        self._replies = {}  # to requests since the file last changed
+
+    def readings(self):
+        """
+        Returns (a ReadingStore of the readings in the file,
+        its invalid lines), brought up to date.
+        """
+        if binfile.is_binary(self.path):
+            st = os.stat(self.path)
+            identity = (st.st_ino, st.st_size, st.st_mtime_ns)
+            if self._binary is None or self._binary[0] != identity:
+                self._binary = (identity, binfile.read_store(self.path))
+                self._replies.clear()
+            return self._binary[1], []
+        if self._cache is None:
+            self._cache = parsecache.ParseCache(self.path)
+            self._cache.load()
+            self._cache.update(jobs=self.jobs)
+            self._replies.clear()
+        elif self._cache.update(save=False, jobs=self.jobs):
+            self._replies.clear()
+        return self._cache.store, self._cache.invalid_lines
+
+    def answer(self, argv):
+        """Returns the reply (a dict) to the command line <argv>."""
+        self.requests += 1
+        try:
+            args = bp_tracker.get_args(argv)
+        except SystemExit:
+            return dict(error="usage")
+        args.file = self.path
+        try:
+            store, invalid_lines = self.readings()
+        except FileNotFoundError:
+            self._cache = self._binary = None
+            return dict(error="missing")
+        key = tuple(argv)
+        if key not in self._replies:
+            if len(self._replies) >= MAX_REPLIES:
+                self._replies.clear()
+            numbered = None
+            if args.error:
+                numbered = [[line.number, line] for line in invalid_lines]
+            try:
+                self._replies[key] = dict(
+                    report=bp_tracker.report_from(args, store),
+                    invalid_lines=numbered)
+            except bp_tracker.NoValidData:
+                self._replies[key] = dict(error="no data")
+        return self._replies[key]
+
+    async def _serve(self, reader, writer):
+        try:
+            request = await reader.readline()
+            reply = self.answer(json.loads(request))
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """Loads the readings and starts listening."""
+        self.readings()  # so the first request needn't wait
+        if os.path.exists(self.socket_path):
+            with socket.socket(socket.AF_UNIX) as sock:
+                try:
+                    sock.connect(self.socket_path)
+                except OSError:
+                    os.unlink(self.socket_path)  # left by a previous run
+                else:
+                    raise RuntimeError("a daemon is already serving it")
+        self._server = await asyncio.start_unix_server(self._serve,
+                                                       self.socket_path)
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        os.unlink(self.socket_path)
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", default=bp_tracker.data_file,
+                        help="data FILE to serve (default bp_numbers.txt)")
+    parser.add_argument("--jobs", type=int,
+                        help="parse a large FILE in JOBS processes")
+    return parser.parse_args()
+
+
+async def serve(args):
+    daemon = QueryDaemon(args.file, args.jobs)
+    await daemon.start()
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    print("Serving {} on {}.".format(args.file, daemon.socket_path),
+          flush=True)
+    await stopping.wait()
+    await daemon.stop()
+    print("Answered {} requests.".format(daemon.requests))
+
+
+def main():
+    args = get_args()
+    try:
+        asyncio.run(serve(args))
+    except (OSError, RuntimeError) as e:
+        print("Unable to serve {}: {}, exiting.".format(args.file, e))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
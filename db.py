@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# File: db.py
+
+"""
+Provides functions:
+    connect, insert_many, add, import_file, query
+
+An optional SQLite (stdlib sqlite3) store for the readings,
+used instead of the data file when bp_tracker is given --db.
+Each reading is a row of systolic, diastolic, pulse and stamp
+(YYYYmmddhhmm, 0 if undated) along with the decoded date, minute
+of the day and minutes since the epoch (UNDATED if undated, see
+store.decode_stamp.)  The stamp is indexed.
+
+The database is put in WAL mode so that readers don't block the
+writer; rows are inserted in bulk (executemany) in a single
+transaction.  The -r, -d, -t and -n filters are done by SQLite:
+-n being "ORDER BY stamp DESC LIMIT n", i.e. the most recent
+readings (which for a data file in time order is the same as
+the last ones in the file.)
+"""
+
+from itertools import islice
+import sqlite3
+
+import pipeline
+from store import ReadingStore, decode_stamp, minute_bounds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY,
+    systolic INTEGER NOT NULL,
+    diastolic INTEGER NOT NULL,
+    pulse INTEGER NOT NULL,
+    stamp INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    epoch INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS readings_stamp ON readings (stamp);
+"""
+INSERT = ("INSERT INTO readings "
+          "(systolic, diastolic, pulse, stamp, date, minute, epoch) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+COLUMNS = "systolic, diastolic, pulse, stamp, date, minute, epoch"
+BATCH = 10000
+
+
+def connect(path):
+    """Opens (creating if need be) the database at <path>."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _rows(readings):
+    for reading in readings:
+        yield tuple(reading[:4]) + decode_stamp(reading[3])
+
+
+def insert_many(conn, readings):
+    """
+    Inserts <readings> ((systolic, diastolic, pulse, YYYYmmddhhmm)
+    tuples) in one transaction.  Returns the number inserted.
+    """
+    with conn:
+        cursor = conn.executemany(INSERT, _rows(readings))
+    return cursor.rowcount
+
+
+def add(conn, systolic, diastolic, pulse, stamp):
+    insert_many(conn, [(systolic, diastolic, pulse, stamp)])
+
+
+def import_file(conn, path, invalid_lines=None):
+    """
+    Inserts the readings in the data file <path> (text or binary)
+    BATCH at a time.  Invalid lines are appended to
+    <invalid_lines> if provided.  Returns the number inserted.
+    """
+    rows = _rows(pipeline.iter_readings(path, invalid_lines))
+    ret = 0
+    with conn:
+        while True:
+            batch = list(islice(rows, BATCH))
+            if not batch:
+                return ret
+            ret += conn.executemany(INSERT, batch).rowcount
+
+
+def _where(args):
+    """The WHERE clause (and its parameters) for <args>' filters."""
+    clauses = []
+    params = []
+    if args.times or args.range or args.date:
+        clauses.append("stamp != 0")
+    if args.times:
+        clauses.append("minute BETWEEN ? AND ?")
+        params += minute_bounds(*args.times)
+    if args.range:
+        clauses.append("stamp BETWEEN ? AND ?")
+        params += [args.range[0] * 10000, args.range[1] * 10000 + 9999]
+    if args.date:
+        clauses.append("stamp >= ?")
+        params.append(args.date[0] * 10000)
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def query(conn, args):
+    """
+    Returns a ReadingStore, in time order, of the readings which
+    pass the filters in <args> (see bp_tracker.filter_data.)
+    """
+    where, params = _where(args)
+    if args.number and args.number[0] > 0:
+        sql = ("SELECT {0} FROM (SELECT id, {0} FROM readings{1} "
+               "ORDER BY stamp DESC, id DESC LIMIT ?) "
+               "ORDER BY stamp, id".format(COLUMNS, where))
+        params.append(args.number[0])
+    else:
+        sql = "SELECT {} FROM readings{} ORDER BY stamp, id".format(
+            COLUMNS, where)
+    rows = conn.execute(sql, params).fetchall()
+    ret = ReadingStore()
+    for dest, values in zip(ret._all, zip(*rows)):
+        dest.extend(values)
+    return ret
@@ -6,11 +6,16 @@
 Provides function:
     get_reading
 
-Uses regex to get (systolic, diastolic, pulse & time)
+Uses lineparser to get (systolic, diastolic, pulse & time)
 components from a data file.
 """
 
-import re
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lineparser  # noqa: E402
 
 data = [
 "# bp_numbers.txt",
@@ -30,25 +35,13 @@ data = [
 "150 71 71",
 ]
 
-valid_data_re = r"\s?(\d{2,3})\s+(\d{2,3})\s+(\d{2,})\s+(\d{8}[.]\d{4})"
-valid_data_re = r"""
-(
-(?P<sys>\d{2,3})
-\s+
-(?P<dia>\d{2,3})
-\s+
-(?P<pulse>\d{2,})
-\s+
-(?P<time>(\d{8}[.]\d{4})|(0[.]0))
-)
-"""
-valid_pattern = re.compile(valid_data_re, re.VERBOSE)
-
 def get_reading(line):
-    m = valid_pattern.search(line)
-    if m:
-        return (m.group('sys'), m.group('dia'),
-                m.group('pulse'), m.group('time'))
+    try:
+        return lineparser.parse_line(line)[0]
+    except ValueError:
+        return None
+
+
 for line in data:
     ret = get_reading(line)
     if ret:
@@ -3,11 +3,16 @@
 # File: valid.py
 
 """
-Check data file line validity.
+Check data file line validity (see lineparser.py for the rules.)
 """
 
+import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lineparser  # noqa: E402
+
 DEFAULT_DATA_FILE = "bp_numbers.txt"
 
 
@@ -17,17 +22,12 @@ def valid_line(line, errors=None):
     <errors>, if provided, is expected to be a
     list to which invalid lines are added.
     """
-    parts = line.strip().split()
-    if ( (len(parts) == 4)
-    and  (len(parts[-1].split(".")) == 2)
-    and  (parts[0].isdigit())
-    and  (parts[1].isdigit())
-    and  (parts[2].isdigit())
-    and  (parts[3].isdecimal)
-    ):
+    try:
+        lineparser.parse_line(line)
         return True
-    elif errors != None:
-        errors.append(line)
+    except ValueError:
+        if errors != None:
+            errors.append(line)
 
 
 def main():
@@ -36,18 +36,16 @@ def main():
     else:
         data_file = DEFAULT_DATA_FILE
     errors = []
-    n_valid_lines = 0
     print(f"Sourcing '{data_file}'.")
-    with open(data_file, 'r') as infile:
-        for line in infile:
-            if valid_line(line, errors=errors):
-                n_valid_lines += 1
+    with open(data_file, 'rb') as infile:
+        n_valid_lines = sum(
+            1 for _ in lineparser.iter_readings(infile, errors))
     if errors:
         print(f"Found {n_valid_lines} valid lines.")
         print("The following {} lines are invalid:"
                 .format(len(errors)))
         for line in errors:
-            print('\t' + line, end='')
+            print('\t' + lineparser.numbered(line))
     else:
         print(f"Found {n_valid_lines} all valid")
 
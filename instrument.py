@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# File: instrument.py
+
+"""
+Provides functions:
+    enable, disable, enabled, stage, add_hook, remove_hook,
+    results, format_table, format_json, report
+
+Per stage timing and memory instrumentation.  Code to be measured
+is wrapped in a stage:
+
+    with instrument.stage("parse") as st:
+        data = ...
+        st.count = len(data)  # optional: lines/readings handled
+
+While instrumentation is disabled (the default) 'stage' returns a
+shared do nothing context manager so the cost is one function call.
+Once enabled, each stage records its wall time, its count and (if
+memory tracing was asked for) the peak memory tracemalloc saw
+allocated during the stage, over and above what was allocated
+when it began.  Stages may be nested.
+
+Hooks (add_hook) are called with each record, a dict, as each
+stage ends; 'results' returns all the records so far.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+
+_enabled = False
+_origin = 0.0
+_trace_memory = False
+_records = []
+_hooks = []
+_stack = []
+
+
+class _NullStage(object):
+    count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    def __init__(self, name):
+        self.name = name
+        self.count = None
+        self.peak = 0
+
+    def __enter__(self):
+        self.depth = len(_stack)
+        if _trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            for outer in _stack:
+                outer.peak = max(outer.peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _stack.pop()
+        record = dict(stage=self.name, depth=self.depth,
+                      start=self.start - _origin, seconds=elapsed,
+                      count=self.count)
+        if _trace_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            for outer in _stack:
+                outer.peak = max(outer.peak, self.peak)
+            record["peak_bytes"] = max(self.peak - self.base, 0)
+        _records.append(record)
+        for hook in _hooks:
+            hook(record)
+        return False
+
+
+def enable(trace_memory=True):
+    """Starts recording stages (and tracing memory if asked.)"""
+    global _enabled, _origin, _trace_memory
+    _enabled = True
+    _origin = time.perf_counter()
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """Stops recording; records made so far are discarded."""
+    global _enabled, _trace_memory
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = _trace_memory = False
+    del _records[:]
+
+
+def enabled():
+    return _enabled
+
+
+def stage(name):
+    """Returns a context manager measuring stage <name>."""
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def add_hook(hook):
+    """<hook> will be called with each record as its stage ends."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def results():
+    """Returns a list of the records made, in order of starting."""
+    return sorted(_records, key=lambda record: record["start"])
+
+
+def format_table(records):
+    """Returns a human readable table (a string) of <records>."""
+    lines = ["{:<24} {:>10} {:>12} {:>12}".format(
+        "stage", "seconds", "count", "peak KiB")]
+    for record in records:
+        count = record["count"]
+        peak = record.get("peak_bytes")
+        lines.append("{:<24} {:>10.4f} {:>12} {:>12}".format(
+            "  " * record["depth"] + record["stage"], record["seconds"],
+            "" if count is None else count,
+            "" if peak is None else "{:.1f}".format(peak / 1024)))
+    return "\n".join(lines) + "\n"
+
+
+def format_json(records):
+    return json.dumps(records) + "\n"
+
+
+def report(fmt="table", stream=None):
+    """Writes the records made so far to <stream> (default stderr.)"""
+    if stream is None:
+        stream = sys.stderr
+    formatter = format_json if fmt == "json" else format_table
+    stream.write(formatter(results()))
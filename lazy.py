@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# File: lazy.py
+
+"""
+Provides function:
+    lazy_import
+
+Deferred imports, so that a run of bp_tracker which only adds a
+reading doesn't pay for importing what reporting needs.
+
+    classify = lazy_import("classify")
+
+binds a module object at once but only executes the module when
+one of its attributes is first used.  A module which has already
+been imported is simply returned.
+
+-X importtime doesn't see a module loaded that way (its import
+statement has long returned) so, when it is on, the time taken
+is reported here in the same format: its own time, less that
+of what it imports (which -X importtime reports), then the whole.
+"""
+
+import builtins
+import importlib.util
+import sys
+import time
+
+_frames = []  # [seconds importing, importing?] per module being loaded
+
+
+class _Timed(object):
+    """A loader reporting, like -X importtime, how long <loader> takes."""
+
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        _frames.append([0.0, False])
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            nested = _frames.pop()[0]
+            if _frames and not _frames[-1][1]:
+                _frames[-1][0] += total
+            sys.stderr.write("import time: {:>9} | {:>10} | {}\n".format(
+                int((total - nested) * 1e6), int(total * 1e6),
+                module.__spec__.name))
+            sys.stderr.flush()
+
+
+def _import(*args, **kwargs):
+    """builtins.__import__, timing the imports of modules loaded lazily."""
+    if not _frames or _frames[-1][1]:
+        return _real_import(*args, **kwargs)
+    frame = _frames[-1]
+    frame[1] = True
+    start = time.perf_counter()
+    try:
+        return _real_import(*args, **kwargs)
+    finally:
+        frame[1] = False
+        frame[0] += time.perf_counter() - start
+
+
+_real_import = builtins.__import__
+if sys._xoptions.get("importtime"):
+    builtins.__import__ = _import
+
+
+def lazy_import(name):
+    """Returns module <name>, to be loaded when first used."""
+    try:
+        return sys.modules[name]
+    except KeyError:
+        pass
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError("No module named {!r}".format(name), name=name)
+    loader = spec.loader
+    if sys._xoptions.get("importtime"):
+        loader = _Timed(loader)
+    loader = importlib.util.LazyLoader(loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
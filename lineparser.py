@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+# File: lineparser.py
+
+"""
+Provides class:
+    InvalidLine
+and functions:
+    parse_line, scan, chunks, iter_readings, read_store, numbered,
+    line_end, split, parse_parallel
+
+The one definition of a valid data line, and a bulk parser for it.
+
+A data line holds systolic, diastolic and pulse values (unsigned
+integers up to 65535) and a time stamp (YYYYmmdd.hhmm, a valid
+date and time, or 0.0 if undated) separated by spaces or tabs.
+It may be followed by an annotation ("# after coffee".)  Blank
+lines and lines beginning (after any spaces) with "#" are ignored;
+anything else is an invalid line.
+
+Rather than stripping and splitting one line at a time, 'scan'
+runs a single compiled pattern (READING, which matches every line:
+a reading, a comment or blank line, or else an invalid one) over
+a buffer of many lines with re.finditer; 'chunks' reads a file in
+CHUNK sized buffers of whole lines.  Invalid lines are reported as
+InvalidLine: a str (the stripped line) which knows its line number.
+
+A large file can be parsed by several processes (parse_parallel):
+'split' divides it into byte ranges ending at line ends, each is
+parsed by a worker into a compact ReadingStore and the stores are
+concatenated in order, the line numbers of invalid lines being
+offset by the number of lines in the ranges before theirs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+
+from store import UNDATED, ReadingStore, date2day
+
+CHUNK = 1 << 20  # bytes read at a time
+PARALLEL_MIN = 1 << 23  # bytes worth parsing in more than one process
+
+_PATTERN = r"""
+    ^[ \t]*
+    (?:
+        (\d{1,5}) [ \t]+ (\d{1,5}) [ \t]+ (\d{1,5}) [ \t]+  # sys dia pulse
+        (?: (\d{8}) \. (\d\d)(\d\d) | 0\.0 )                # time stamp
+        (?: [ \t]* \# .* )?                                 # annotation
+      | (\# .*)?                                            # comment, blank
+      | (.*?)                                               # invalid
+    )
+    [ \t\r]*$
+"""
+READING = re.compile(_PATTERN.encode(), re.MULTILINE | re.VERBOSE)
+_LINE = re.compile(_PATTERN, re.VERBOSE | re.ASCII)
+_BYTES_LINE = re.compile(_PATTERN.encode(), re.VERBOSE)  # just the one
+_UNDATED = (UNDATED, UNDATED, UNDATED)
+
+
+class InvalidLine(str):
+    """An invalid line, along with its line <number> (if known.)"""
+
+    def __new__(cls, line, number=None):
+        ret = super().__new__(cls, line)
+        ret.number = number
+        return ret
+
+
+def numbered(line):
+    """<line> (e.g. an InvalidLine) prefixed by its number, if known."""
+    number = getattr(line, "number", None)
+    if number is None:
+        return line
+    return "{}: {}".format(number, line)
+
+
+def _convert(groups):
+    """
+    The (values, decoded stamp) of a matched reading (see
+    store.decode_stamp); raises ValueError if it's out of range.
+    """
+    systolic, diastolic, pulse = int(groups[0]), int(groups[1]), int(groups[2])
+    if systolic > 0xFFFF or diastolic > 0xFFFF or pulse > 0xFFFF:
+        raise ValueError("Value out of range")
+    date = 0 if groups[3] is None else int(groups[3])
+    if date == 0:  # 0.0 (or 00000000.hhmm)
+        return (systolic, diastolic, pulse, 0), _UNDATED
+    hour, minute = int(groups[4]), int(groups[5])
+    if hour > 23 or minute > 59:
+        raise ValueError("Invalid time of day")
+    of_day = hour * 60 + minute
+    return ((systolic, diastolic, pulse, date * 10000 + hour * 100 + minute),
+            (date, of_day, date2day(date) * 1440 + of_day))
+
+
+def parse_line(line):
+    """
+    Returns the (systolic, diastolic, pulse, YYYYmmddhhmm) ints of
+    a reading (<line> being a str or bytes) along with its decoded
+    stamp (see store.decode_stamp.)  Raises ValueError if <line>
+    isn't a valid reading.
+    """
+    match = (_BYTES_LINE if isinstance(line, bytes) else _LINE).match(line)
+    if match is None or match.group(1) is None:  # e.g. several lines
+        raise ValueError("Not a valid reading: {!r}".format(line))
+    return _convert(match.groups())
+
+
+def scan(buffer, invalid_lines=None, first_line=1):
+    """
+    Yields the (values, decoded stamp) of each reading (see
+    parse_line) in <buffer>, bytes holding whole lines, the first
+    of which is line <first_line> of the file.  Invalid lines are
+    appended to <invalid_lines> (as InvalidLine) if provided.
+    """
+    for number, match in enumerate(READING.finditer(buffer), first_line):
+        groups = match.groups()
+        if groups[0] is not None:
+            try:
+                yield _convert(groups)
+                continue
+            except ValueError:
+                pass
+        elif groups[7] is None:
+            continue  # a comment or blank line
+        if invalid_lines is not None:
+            invalid_lines.append(InvalidLine(
+                match.group().strip().decode(errors="replace"), number))
+
+
+def chunks(f, size=CHUNK):
+    """
+    Yields (buffer, number of its first line) for the binary file
+    object <f>, read <size> bytes at a time, each buffer ending at
+    the end of a line (but for any unterminated last line.)
+    """
+    line = 1
+    rest = b""
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            break
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            rest += chunk
+            continue
+        buffer = rest + chunk[:end]
+        yield buffer, line
+        line += buffer.count(b"\n")
+        rest = chunk[end:]
+    if rest:
+        yield rest, line
+
+
+def iter_readings(f, invalid_lines=None, size=CHUNK):
+    """Yields the (values, decoded stamp) of each reading in file <f>."""
+    for buffer, line in chunks(f, size):
+        yield from scan(buffer, invalid_lines, line)
+
+
+def read_store(path, invalid_lines=None, size=CHUNK, jobs=None):
+    """
+    Returns a ReadingStore of the readings in the text file <path>
+    (parsed by <jobs> processes, see parse_parallel, if given.)
+    """
+    if jobs is not None and jobs > 1:
+        return parse_parallel(path, jobs, invalid_lines)[0]
+    with open(path, "rb") as f:
+        return ReadingStore.from_parsed(iter_readings(f, invalid_lines, size))
+
+
+def line_end(f, start, stop):
+    """
+    Returns the offset just past the last newline in bytes <start>
+    to <stop> of the binary file <f> (<start> if there is none.)
+    """
+    pos = stop
+    while pos > start:
+        step = min(CHUNK, pos - start)
+        f.seek(pos - step)
+        end = f.read(step).rfind(b"\n") + 1
+        if end:
+            return pos - step + end
+        pos -= step
+    return start
+
+
+def split(f, start, stop, parts):
+    """
+    Returns the offsets [<start>, ..., <stop>] dividing bytes
+    <start> to <stop> of the binary file <f> into (up to) <parts>
+    ranges of about the same size, each but the last ending at the
+    end of a line.
+    """
+    offsets = [start]
+    for i in range(1, parts):
+        pos = start + (stop - start) * i // parts
+        if pos <= offsets[-1]:
+            continue
+        f.seek(pos - 1)
+        f.readline()  # to the end of the line pos - 1 is in
+        pos = f.tell()
+        if pos >= stop:
+            break
+        offsets.append(pos)
+    offsets.append(stop)
+    return offsets
+
+
+def _parse_range(job):
+    """
+    Worker: returns (a ReadingStore, the invalid lines, the number
+    of lines) for the byte range (path, begin, end), numbering its
+    lines from 1.
+    """
+    path, begin, end = job
+    with open(path, "rb") as f:
+        f.seek(begin)
+        buffer = f.read(end - begin)
+    invalid_lines = []
+    store = ReadingStore.from_parsed(scan(buffer, invalid_lines))
+    return store, invalid_lines, buffer.count(b"\n")
+
+
+def parse_parallel(path, jobs, invalid_lines=None, start=0, stop=None,
+                   first_line=1):
+    """
+    Returns (a ReadingStore, the number of lines) for bytes <start>
+    to <stop> (default: the end) of the text file <path>, the first
+    of which begins line <first_line>, parsed by <jobs> processes.
+    Less than PARALLEL_MIN bytes (or <jobs> under 2) are parsed in
+    this process.  Invalid lines are appended to <invalid_lines> if
+    provided.
+    """
+    with open(path, "rb") as f:
+        if stop is None:
+            stop = f.seek(0, os.SEEK_END)
+        if jobs is None or jobs < 2 or stop - start < PARALLEL_MIN:
+            offsets = [start, stop]
+        else:
+            offsets = split(f, start, stop, jobs)
+    ranges = [(path, begin, end) for begin, end in zip(offsets, offsets[1:])]
+    if len(ranges) == 1:
+        return _join(map(_parse_range, ranges), invalid_lines, first_line)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        return _join(executor.map(_parse_range, ranges), invalid_lines,
+                     first_line)
+
+
+def _join(results, invalid_lines, first_line):
+    """Concatenates the _parse_range <results>, in order."""
+    ret = ReadingStore()
+    line = first_line
+    for store, invalid, lines in results:
+        ret.extend(store)
+        if invalid_lines is not None:
+            invalid_lines.extend(InvalidLine(invalid_line,
+                                             invalid_line.number + line - 1)
+                                 for invalid_line in invalid)
+        line += lines
+    return ret, line - first_line
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+# File: parsecache.py
+
+"""
+Provides functions:
+    load, identity, is_prefix, read_sidecar, write_sidecar,
+    replace_file
+and class:
+    ParseCache
+
+Text data files only ever get appended to (see bp_tracker.add)
+so there is no need to parse them from the beginning every time.
+A ParseCache (saved to <data file>.cache) keeps the readings
+already parsed, the invalid lines found (with their line numbers,
+see lineparser.py) and the byte offset and line reached; only what
+lies beyond that offset gets parsed next time.
+
+The cache is keyed on the identity of the file: inode, size and
+modification time along with a hash of its first (and of the
+last parsed) PREFIX bytes.  Should the file have been replaced,
+truncated or edited (rather than appended to) the cache is
+discarded and the whole file parsed again.  The other sidecars
+(see stampindex.py and rollups.py) are kept the same way, using
+identity and is_prefix.
+
+Sidecars are saved in a plain format (see write_sidecar): a line
+of JSON followed by the bytes of some arrays.  Nothing in them is
+executed when they are read, and one that can't be read (written
+by another version, truncated, or not a sidecar at all) is simply
+rebuilt.  They are written to a temporary file which is then
+renamed over the old one (see replace_file) so that a reader
+never finds one half written.
+"""
+
+from array import array
+import hashlib
+import json
+import os
+import sys
+
+import instrument
+import lineparser
+import writer
+from store import ReadingStore
+
+SUFFIX = ".cache"
+PREFIX = 4096
+VERSION = 4
+
+
+def _digest(f, offset):
+    """Hash of the first PREFIX bytes and the PREFIX bytes before <offset>."""
+    h = hashlib.sha1()
+    f.seek(0)
+    h.update(f.read(min(PREFIX, offset)))
+    start = max(offset - PREFIX, 0)
+    f.seek(start)
+    h.update(f.read(offset - start))
+    return h.hexdigest()
+
+
+def replace_file(path, write):
+    """
+    Replaces <path> with what <write> (a function taking a binary
+    file object) writes, by way of a temporary file in the same
+    directory renamed over it; silently gives up if it can't.
+    """
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def write_sidecar(path, header, arrays):
+    """
+    Writes the dict <header> (JSON) and <arrays> to <path>;
+    silently gives up if it can't.
+    """
+    header = dict(header, byteorder=sys.byteorder, arrays=[
+        [a.typecode, a.itemsize, len(a)] for a in arrays])
+
+    def write(f):
+        f.write(json.dumps(header).encode() + b"\n")
+        for a in arrays:
+            a.tofile(f)
+
+    replace_file(path, write)
+
+
+def read_sidecar(path):
+    """
+    Returns the (header, arrays) written to <path> by write_sidecar.
+    Raises OSError if it can't be read, ValueError if it isn't
+    such a file (or not one written on this platform.)
+    """
+    with open(path, "rb") as f:
+        try:
+            header = json.loads(f.readline())
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError("byte order")
+            arrays = []
+            for typecode, itemsize, n in header["arrays"]:
+                a = array(typecode)
+                if a.itemsize != itemsize:
+                    raise ValueError("item size")
+                a.fromfile(f, n)
+                arrays.append(a)
+        except (EOFError, LookupError, TypeError, ValueError) as e:
+            raise ValueError("Not a sidecar file: {}".format(e))
+    return header, arrays
+
+
+def _parse(chunk, store, invalid_lines, first_line):
+    """Parses <chunk> into <store>; returns the number of lines in it."""
+    with instrument.stage("parse") as st:
+        store.extend(ReadingStore.from_parsed(
+            lineparser.scan(chunk, invalid_lines, first_line)))
+        st.count = chunk.count(b"\n")
+    return st.count
+
+
+def identity(f, offset):
+    """
+    The identity of the open file <f> as parsed up to <offset>:
+    (inode, size, modification time, digest) as saved in a sidecar.
+    """
+    st = os.fstat(f.fileno())
+    return (st.st_ino, st.st_size, st.st_mtime_ns, _digest(f, offset))
+
+
+def is_prefix(saved, f, offset):
+    """
+    Is what was up to <offset> of the file whose identity was
+    <saved> still the beginning of the open file <f>?  (It isn't
+    if the file has been replaced, truncated or edited rather
+    than just appended to.)
+    """
+    if saved is None:
+        return False
+    ino, size, mtime, digest = saved
+    st = os.fstat(f.fileno())
+    if ino != st.st_ino or st.st_size < offset:
+        return False
+    if st.st_size == size and st.st_mtime_ns != mtime:
+        return False  # rewritten in place
+    return _digest(f, offset) == digest
+
+
+class ParseCache(object):
+    def __init__(self, path):
+        self.path = path
+        self.cache_file = path + SUFFIX
+        self.reset()
+
+    def reset(self):
+        self.identity = None
+        self.offset = 0
+        self.lines = 0  # in the file up to offset
+        self.store = ReadingStore()
+        self.invalid_lines = []
+
+    def load(self):
+        """Reads the sidecar file if there is a usable one."""
+        try:
+            saved, arrays = read_sidecar(self.cache_file)
+            if saved.get("version") != VERSION:
+                return
+            identity = tuple(saved["identity"])
+            offset, lines = int(saved["offset"]), int(saved["lines"])
+            store = ReadingStore.from_columns(arrays)
+            invalid_lines = [lineparser.InvalidLine(line, number)
+                             for number, line in saved["invalid_lines"]]
+        except (OSError, LookupError, TypeError, ValueError):
+            return
+        self.identity = identity
+        self.offset = offset
+        self.lines = lines
+        self.store = store
+        self.invalid_lines = invalid_lines
+
+    def save(self):
+        """Writes the sidecar file; silently gives up if we can't."""
+        saved = dict(version=VERSION, identity=self.identity,
+                     offset=self.offset, lines=self.lines,
+                     invalid_lines=[[line.number, line]
+                                    for line in self.invalid_lines])
+        write_sidecar(self.cache_file, saved,
+                      self.store.columns + self.store.times)
+
+    def update(self, save=True, jobs=None):
+        """
+        Brings the cache up to date with the data file, parsing
+        no more than is necessary (in <jobs> processes if there's
+        enough of it, see lineparser.parse_parallel.)  Returns True
+        if anything changed (and, if <save>, the cache was saved
+        again.)
+        """
+        with open(self.path, "rb") as f, writer.locked(f):
+            st = os.fstat(f.fileno())
+            if is_prefix(self.identity, f, self.offset):
+                if (st.st_size, st.st_mtime_ns) == self.identity[1:3]:
+                    return False
+            else:
+                self.reset()
+            if jobs is not None and jobs > 1:
+                # Leave any partial last line.
+                end = lineparser.line_end(f, self.offset, st.st_size)
+                with instrument.stage("parse") as stage:
+                    store, stage.count = lineparser.parse_parallel(
+                        self.path, jobs, self.invalid_lines, self.offset,
+                        end, self.lines + 1)
+                self.store.extend(store)
+                self.lines += stage.count
+                self.offset = end
+            else:
+                f.seek(self.offset)
+                tail = f.read()
+                end = tail.rfind(b"\n") + 1  # leave any partial last line
+                self.lines += _parse(tail[:end], self.store,
+                                     self.invalid_lines, self.lines + 1)
+                self.offset += end
+            self.identity = identity(f, self.offset)
+        if save:
+            self.save()
+        return True
+
+
+def load(path, invalid_lines=None, jobs=None):
+    """
+    Returns a ReadingStore of all the readings in the text
+    file <path>, using (and updating) its parse cache; what
+    needs parsing is parsed in <jobs> processes if given.
+    Invalid lines are appended to <invalid_lines> if provided.
+    A partial last line (no trailing newline yet) is parsed but
+    not cached.
+    """
+    cache = ParseCache(path)
+    with instrument.stage("load cache"):
+        cache.load()
+    with instrument.stage("update cache") as st:
+        cache.update(jobs=jobs)
+        st.count = len(cache.store)
+    store = cache.store
+    if invalid_lines is not None:
+        invalid_lines.extend(cache.invalid_lines)
+    with open(path, "rb") as f, writer.locked(f):
+        f.seek(cache.offset)
+        rest = f.read()
+    if rest:
+        store = ReadingStore()
+        store.extend(cache.store)
+        _parse(rest, store, invalid_lines, cache.lines + 1)
+    return store
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+# File: pipeline.py
+
+"""
+Provides generators:
+    iter_readings, filter_readings
+and functions:
+    last_readings, summarize, stream_report
+and class:
+    Summary
+
+A constant memory alternative to reading everything into a
+ReadingStore: readings flow from the data file through the filters
+into an online Summary, one at a time.  Only -n NUMBER needs any
+memory to speak of: a deque holding the last NUMBER readings.
+
+Readings are (systolic, diastolic, pulse, YYYYmmddhhmm) tuples.
+"""
+
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+
+import binfile
+import lineparser
+import stats
+from store import STAMP
+
+CHUNK = 4096
+
+
+class Summary(stats.RunningStats):
+    """
+    Online aggregate of a stream of readings: the RunningStats
+    of systolic, diastolic and pulse along with the most recent
+    reading (greatest stamp; of those with equal stamps, the one
+    seen last, as a stable sort would have it.)
+    """
+
+    def __init__(self, width=3):
+        super().__init__(width)
+        self.last = None
+
+    def add(self, reading):
+        super().add(reading)
+        if self.last is None or reading[STAMP] >= self.last[STAMP]:
+            self.last = reading
+
+    def merge(self, other):
+        """Adds in <other>, taken to have come after this one."""
+        super().merge(other)
+        last = getattr(other, "last", None)
+        if last is not None and (
+                self.last is None or last[STAMP] >= self.last[STAMP]):
+            self.last = last
+
+    def to_dict(self):
+        ret = super().to_dict()
+        ret["last"] = self.last
+        return ret
+
+    @classmethod
+    def from_dict(cls, saved):
+        ret = super().from_dict(saved)
+        ret.last = saved["last"]
+        return ret
+
+
+def iter_readings(report_file, invalid_lines=None):
+    """
+    Yields the readings in <report_file> (text or binary.)
+    Invalid lines are appended to <invalid_lines> if provided.
+    """
+    if binfile.is_binary(report_file):
+        with binfile.BinaryReadings(report_file) as readings:
+            yield from readings
+        return
+    with open(report_file, "rb") as f:
+        for values, _ in lineparser.iter_readings(f, invalid_lines):
+            yield values
+
+
+def filter_readings(readings, args):
+    """
+    Yields those <readings> which pass the -t, -r and -d filters
+    (see bp_tracker.filter_data.)  Undated readings never do.
+    """
+    if not (args.times or args.range or args.date):
+        yield from readings
+        return
+    t_begin, t_end = args.times or (0, 9999)
+    r_begin, r_end = args.range or (0, 99999999)
+    if args.date:
+        r_begin = max(r_begin, args.date[0])
+    for reading in readings:
+        stamp = reading[STAMP]
+        if not stamp:
+            continue
+        date, time = divmod(stamp, 10000)
+        if r_begin <= date <= r_end and t_begin <= time <= t_end:
+            yield reading
+
+
+def last_readings(readings, n):
+    """Returns (a deque of) the last <n> of <readings>."""
+    return deque(readings, maxlen=n)
+
+
+def summarize(readings):
+    """
+    The Summary of <readings>, taken in CHUNK at a time (see
+    RunningStats.update) rather than one by one.
+    """
+    summary = Summary()
+    readings = iter(readings)
+    while True:
+        chunk = list(islice(readings, CHUNK))
+        if not chunk:
+            return summary
+        summary.update(list(zip(*chunk)))
+        last = max(reversed(chunk), key=itemgetter(STAMP))
+        if summary.last is None or last[STAMP] >= summary.last[STAMP]:
+            summary.last = last
+
+
+def stream_report(args, invalid_lines=None):
+    """
+    Returns the Summary of the readings in args.file which pass
+    the filters specified in <args>; memory use is independent
+    of the size of the file (other than for -n NUMBER.)
+    """
+    readings = filter_readings(iter_readings(args.file, invalid_lines), args)
+    if args.number and args.number[0] > 0:
+        readings = last_readings(readings, args.number[0])
+    return summarize(readings)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# File: quickadd.py
+
+"""
+Provides functions:
+    add, check_file, quick_args, main
+
+The fast path of bp_tracker.py: the commonest command line,
+-a SYSTOLIC DIASTOLIC PULSE (possibly with -f FILE), adding a
+reading to a text data file, run with nothing imported beyond
+os, sys, time, fcntl and writer.py (which imports no more.)
+Anything else, including adding to a binary file or to one with
+rollups to bring up to date, is left to tracker.main.
+"""
+
+import os
+import sys
+import time
+
+import writer
+
+data_file = "bp_numbers.txt"
+
+# Not imported from binfile and rollups, which import a lot more.
+BINARY_MAGIC = b"BPT\x00"  # binfile.MAGIC
+ROLLUP_SUFFIX = ".rollup"  # rollups.SUFFIX
+
+
+class _Args(object):
+    """What quick_args returns (types.SimpleNamespace, sparing an import.)"""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def check_file(file, mode):
+    """
+    Mode (must be 'r' or 'w') specifies if we need to
+    r)ead or w)rite to the file.
+    """
+    if mode == "r" and os.access(file, os.R_OK):
+        return True
+    if mode == "w":
+        if os.access(file, os.W_OK):
+            return True
+        if not os.path.exists(file) and os.access(
+            os.path.dirname(file), os.W_OK
+        ):
+            return True
+    return False
+
+
+def quick_args(argv):
+    """
+    Returns the arguments for the commonest command line,
+    -a SYSTOLIC DIASTOLIC PULSE (possibly with -f FILE), without
+    the expense of get_args: for any other command line, None.
+    """
+    args = _Args(add=None, file=data_file, db=None)
+    rest = list(argv)
+    while rest:
+        option = rest.pop(0)
+        if option in ("-a", "--add") and args.add is None:
+            args.add, rest = rest[:3], rest[3:]
+            if len(args.add) < 3:
+                return None
+        elif option in ("-f", "--file") and rest:
+            args.file = rest.pop(0)
+        else:
+            return None
+    if args.add is None or any(value.startswith("-")
+                               for value in args.add + [args.file]):
+        return None  # leave the odd cases to argparse
+    return args
+
+
+def add(args):
+    """
+    Appends the reading args.add, stamped now, to the text file
+    args.file as tracker.add does, if that's all there is to do.
+    Returns False, having written nothing, if args.file is a binary
+    file, has rollups or can't be written to (tracker.add says so.)
+    """
+    path = args.file
+    if not check_file(path, "w") or os.path.exists(path + ROLLUP_SUFFIX):
+        return False
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+                return False
+    except FileNotFoundError:
+        pass  # appending creates it
+    except OSError:
+        return False
+    writer.append(path, "{} {} {} {}\n".format(
+        *args.add, time.strftime("%Y%m%d.%H%M")))
+    return True
+
+
+def main(argv=None):
+    """
+    Runs the command line <argv> (by default sys.argv[1:]): adds
+    the reading here if it can, else hands over to tracker.main.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    args = quick_args(argv)
+    if args is not None and add(args):
+        sys.exit()
+    import tracker  # only now, as it imports a great deal
+
+    tracker.main(argv)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+# File: rolling.py
+
+"""
+Provides functions:
+    trend, widen, format_trend
+and class:
+    Window
+
+Moving averages of systolic, diastolic and pulse over time based
+windows (e.g. the last 7 and 30 days, however many readings that
+may be) rather than over the last so many readings.
+
+A Window keeps running sums: each reading is added as it enters
+the window and subtracted as it leaves, so moving the window on
+costs O(1) per reading whatever its width and a whole series
+is one pass over the (time ordered) readings.
+
+The series has a point for each day with readings, the window
+ending with (and including) that day.
+"""
+
+from datetime import datetime, timedelta
+
+from store import UNDATED
+
+DEFAULT_WINDOWS = (7, 30)
+DAY = 1440  # minutes
+
+
+class Window(object):
+    """
+    Running count and sums of the readings of the last <days>
+    days, over the parallel <epochs> and <columns> arrays.
+    """
+
+    def __init__(self, days, epochs, columns):
+        self.days = days
+        self.epochs = epochs
+        self.columns = columns
+        self.start = 0  # index of the oldest reading in the window
+        self.end = 0  # one past the newest
+        self.sums = [0] * len(columns)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def advance(self, end):
+        """Takes in the readings up to index <end>."""
+        for i, column in enumerate(self.columns):
+            self.sums[i] += sum(column[self.end:end])
+        self.end = end
+
+    def expire(self, day):
+        """Drops the readings older than <days> days before <day>."""
+        epochs = self.epochs
+        oldest = (day - self.days + 1) * DAY
+        start = self.start
+        while start < self.end and epochs[start] < oldest:
+            start += 1
+        for i, column in enumerate(self.columns):
+            self.sums[i] -= sum(column[self.start:start])
+        self.start = start
+
+    def means(self):
+        n = len(self)
+        return [total / n for total in self.sums]
+
+
+def trend(store, windows=DEFAULT_WINDOWS, begin=None, end=None):
+    """
+    Generates (date, [(count, [systolic, diastolic, pulse means])
+    for each of <windows>]) for each day (YYYYmmdd, from <begin>
+    to <end> inclusive if given) with readings in <store>, which
+    must be in time order.  Undated readings are ignored.
+    """
+    epochs = store.epochs
+    dates = store.dates
+    columns = (store.systolics, store.diastolics, store.pulses)
+    first = 0
+    while first < len(epochs) and epochs[first] == UNDATED:
+        first += 1
+    state = [Window(days, epochs, columns) for days in windows]
+    for w in state:
+        w.start = w.end = first
+    i = first
+    n = len(epochs)
+    while i < n:
+        day = epochs[i] // DAY
+        j = i + 1
+        while j < n and epochs[j] // DAY == day:
+            j += 1
+        for w in state:
+            w.advance(j)
+            w.expire(day)
+        date = dates[i]
+        if (begin is None or date >= begin) and (end is None or date <= end):
+            yield date, [(len(w), w.means()) for w in state]
+        i = j
+
+
+def widen(args, days):
+    """
+    A copy of the filter arguments <args> whose -r/-d begin
+    <days> days earlier (so that the first windows of a trend
+    are full) and with no -n.
+    """
+    def earlier(date):
+        try:
+            when = datetime.strptime(str(date), "%Y%m%d")
+        except ValueError:
+            return date
+        return int((when - timedelta(days=days)).strftime("%Y%m%d"))
+
+    ret = type(args)(**vars(args))
+    ret.number = None
+    if args.range:
+        ret.range = [earlier(args.range[0]), args.range[1]]
+    if args.date:
+        ret.date = [earlier(args.date[0])]
+    return ret
+
+
+def format_trend(points, windows=DEFAULT_WINDOWS):
+    """Returns the series (a string), one line per day."""
+    lines = ["{:<10}".format("date") + "".join(
+        "{:>20}".format("{} day average".format(days)) for days in windows)]
+    for date, values in points:
+        lines.append("{:<10}".format(date) + "".join(
+            "{:>20}".format("{:.0f}/{:.0f} {:.0f} ({})".format(
+                *means, count)) for count, means in values))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+
+# File: rollups.py
+
+"""
+Provides classes:
+    Rollup, Rollups
+and functions:
+    answers, range_summary, update_existing
+
+Materialized per-month aggregates of a data file, kept in a
+sidecar (<data file>.rollup, see parsecache.write_sidecar) so that
+summaries over long date ranges needn't re-read and re-aggregate
+the raw readings.  Each Rollup holds the count, sums, sums of squares,
+minima and maxima of systolic, diastolic and pulse, the counts
+of each (AHA, classify "single" scheme) category and the last
+reading.
+
+Like the stamp index (see stampindex.py) the rollups are brought
+up to date incrementally: only readings appended since they were
+last saved are aggregated (bp_tracker.add does so as it appends,
+if the file has rollups.)  Like the parse cache they are keyed on
+the identity of the data file (see parsecache.identity): should it
+have been replaced, truncated or edited they are built again from
+scratch.
+
+A -r/-d report is then answered from the rollups of the months
+wholly within the range plus the readings of the days at either
+end, which are found through the stamp index (see stampindex.py.)
+Daily rollups would take as much room per day as a month's do,
+far more than the readings of most days.  Undated readings are
+not rolled up.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+import os
+
+import binfile
+import writer
+from lazy import lazy_import
+from store import STAMP
+
+# Not needed just to find there are no rollups (see update_existing.)
+calendar = lazy_import("calendar")
+classify = lazy_import("classify")
+lineparser = lazy_import("lineparser")
+parsecache = lazy_import("parsecache")
+pipeline = lazy_import("pipeline")
+stampindex = lazy_import("stampindex")
+
+SUFFIX = ".rollup"
+VERSION = 5
+SCHEME = "single"
+
+
+class Rollup(object):
+    """The aggregates of a month's (or a range's) readings."""
+
+    def __init__(self, categories):
+        self.count = 0
+        self.sums = [0, 0, 0]
+        self.squares = [0, 0, 0]
+        self.minima = [0xFFFF] * 3
+        self.maxima = [0] * 3
+        self.categories = [0] * (categories + 1)  # NONE last
+        self.last = None
+
+    def add(self, reading, code):
+        self.count += 1
+        for i in range(3):
+            x = reading[i]
+            self.sums[i] += x
+            self.squares[i] += x * x
+            if x < self.minima[i]:
+                self.minima[i] = x
+            if x > self.maxima[i]:
+                self.maxima[i] = x
+        self.categories[-1 if code == classify.NONE else code] += 1
+        if self.last is None or reading[STAMP] >= self.last[STAMP]:
+            self.last = tuple(reading)
+
+    def merge(self, other):
+        """Adds in <other>, taken to be of a later month."""
+        self.count += other.count
+        for i in range(3):
+            self.sums[i] += other.sums[i]
+            self.squares[i] += other.squares[i]
+            self.minima[i] = min(self.minima[i], other.minima[i])
+            self.maxima[i] = max(self.maxima[i], other.maxima[i])
+        for code, n in enumerate(other.categories):
+            self.categories[code] += n
+        if other.last is not None and (
+                self.last is None or other.last[STAMP] >= self.last[STAMP]):
+            self.last = other.last
+
+    def summary(self):
+        """This rollup as a pipeline.Summary (see format_report.)"""
+        ret = pipeline.Summary()
+        n = ret.count = self.count
+        if not n:
+            return ret
+        ret.sums = list(self.sums)
+        ret.means = [total / n for total in self.sums]
+        ret.m2 = [(n * square - total * total) / n
+                  for total, square in zip(self.sums, self.squares)]
+        ret.minima = list(self.minima)
+        ret.maxima = list(self.maxima)
+        ret.last = self.last
+        return ret
+
+    def histogram(self, names):
+        """As classify.classify_many returns it."""
+        ret = dict(zip(names, self.categories))
+        if self.categories[-1]:
+            ret[None] = self.categories[-1]
+        return ret
+
+    def to_ints(self):
+        """Flattened into 1 + 12 + categories + 4 ints."""
+        return ([self.count] + self.sums + self.squares + self.minima
+                + self.maxima + self.categories
+                + list(self.last or (0, 0, 0, 0)))
+
+    @classmethod
+    def from_ints(cls, ints):
+        ret = cls(len(ints) - 18)
+        ret.count = ints[0]
+        ret.sums = list(ints[1:4])
+        ret.squares = list(ints[4:7])
+        ret.minima = list(ints[7:10])
+        ret.maxima = list(ints[10:13])
+        ret.categories = list(ints[13:-4])
+        ret.last = tuple(ints[-4:]) if ret.count else None
+        return ret
+
+
+class _Level(object):
+    """
+    The monthly rollups: as saved, a sorted array of keys and a
+    flat array of so many ints per key (see Rollup.to_ints) which
+    are only decoded as needed; along with the Rollups changed
+    since, until they are packed in.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.keys = array("l")
+        self.values = array("q")
+        self.changed = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key):
+        """The Rollup for <key>, None if there are no readings."""
+        if key in self.changed:
+            return self.changed[key]
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return Rollup.from_ints(self.values[i * self.width:
+                                            (i + 1) * self.width])
+
+    def rollup(self, key):
+        """The Rollup for <key>, to be changed."""
+        rollup = self.get(key)
+        if rollup is None:
+            rollup = Rollup(self.width - 18)
+        self.changed[key] = rollup
+        return rollup
+
+    def pack(self):
+        """Packs the changed Rollups into the arrays."""
+        if not self.changed:
+            return
+        changed = sorted(self.changed)
+        keys, values, width = self.keys, self.values, self.width
+        if keys and changed[0] < keys[-1]:  # not at the end: redo all
+            rollups = {key: values[i * width:(i + 1) * width]
+                       for i, key in enumerate(keys)}
+            keys, values = array("l"), array("q")
+            changed = sorted(set(rollups) | set(changed))
+        else:
+            rollups = {}
+            if keys and changed[0] == keys[-1]:
+                keys.pop()
+                del values[-width:]
+        for key in changed:
+            keys.append(key)
+            if key in self.changed:
+                values.extend(self.changed[key].to_ints())
+            else:
+                values.extend(rollups[key])
+        self.keys, self.values = keys, values
+        self.changed = {}
+
+    def saved(self):
+        """The arrays to save."""
+        self.pack()
+        return [self.keys, self.values]
+
+    def load(self, keys, values):
+        """Takes on the saved arrays; raises ValueError if they don't fit."""
+        if (keys.typecode, values.typecode) != ("l", "q") or (
+                len(values) != len(keys) * self.width):
+            raise ValueError("Not rollups of width {}".format(self.width))
+        self.keys, self.values = keys, values
+        self.changed = {}
+
+
+class Rollups(object):
+    """The monthly rollups of the data file <path>."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rollup_file = path + SUFFIX
+        self.binary = binfile.is_binary(path)
+        self.scheme = classify.get(SCHEME)
+        self.width = len(self.scheme.names) + 18
+        self.reset()
+
+    def reset(self):
+        self.scanned = 0  # bytes (text) or records (binary)
+        self.identity = None  # of the data file, see parsecache.identity
+        self.partial = b""  # an unterminated last line, not rolled up
+        self.months = _Level(self.width)  # by YYYYmm
+
+    def exists(self):
+        return os.path.exists(self.rollup_file)
+
+    def load(self):
+        """Reads the sidecar file if there is a usable one."""
+        try:
+            saved, arrays = parsecache.read_sidecar(self.rollup_file)
+            if (saved.get("version") != VERSION
+                    or saved.get("binary") != self.binary
+                    or saved.get("width") != self.width):
+                return
+            identity = tuple(saved["identity"])
+            scanned = int(saved["scanned"])
+            self.months.load(*arrays)
+        except (OSError, LookupError, TypeError, ValueError):
+            self.reset()
+            return
+        self.identity = identity
+        self.scanned = scanned
+
+    def save(self):
+        """Writes the sidecar file; silently gives up if we can't."""
+        saved = dict(version=VERSION, binary=self.binary,
+                     width=self.width, identity=self.identity,
+                     scanned=self.scanned)
+        parsecache.write_sidecar(self.rollup_file, saved,
+                                 self.months.saved())
+
+    def _add(self, reading):
+        stamp = reading[STAMP]
+        if not stamp:
+            return
+        code = self.scheme.code(reading[0], reading[1])
+        self.months.rollup(stamp // 1000000).add(reading, code)
+
+    def _scan_text(self):
+        with open(self.path, "rb") as f, writer.locked(f):
+            if not parsecache.is_prefix(self.identity, f, self.scanned):
+                self.reset()
+            f.seek(self.scanned)
+            tail = f.read()
+            end = tail.rfind(b"\n") + 1  # wait for the rest of any last line
+            self.identity = parsecache.identity(f, self.scanned + end)
+        for values, _ in lineparser.scan(tail[:end]):
+            self._add(values)
+        self.scanned += end
+        self.partial = tail[end:]
+
+    def _scan_binary(self):
+        def offset(records):
+            return binfile.HEADER.size + records * binfile.RECORD.size
+
+        with open(self.path, "rb") as f:
+            if not parsecache.is_prefix(self.identity, f,
+                                        offset(self.scanned)):
+                self.reset()
+            with binfile.BinaryReadings(self.path) as readings:
+                n = len(readings)
+                for reading in zip(*readings.store(self.scanned).columns):
+                    self._add(reading)
+            self.identity = parsecache.identity(f, offset(n))
+        self.scanned = n
+
+    def update(self):
+        """
+        Loads the saved rollups, aggregates what was appended
+        since and saves them again (if anything was.)  A partial
+        last line (no trailing newline yet) is kept to be counted
+        by total but isn't saved, as parsecache.load does.
+        """
+        self.load()
+        before = (self.scanned, self.identity)
+        if self.binary:
+            self._scan_binary()
+        else:
+            self._scan_text()
+        if (self.scanned, self.identity) != before or not self.exists():
+            self.save()
+
+    def total(self, begin=None, end=None):
+        """
+        Returns the Rollup of the readings dated <begin> through
+        <end> (YYYYmmdd, either may be None): whole months from
+        the monthly rollups, the days at either end from the
+        readings themselves, plus any partial last line (see
+        update.)
+        """
+        self.months.pack()
+        ret = Rollup(len(self.scheme.names))
+        months = self.months.keys
+        low = 0 if begin is None else bisect_left(months, begin // 100)
+        high = (len(months) if end is None
+                else bisect_right(months, end // 100))
+        edges = []  # (first, last) days of the months partly in range
+        for month in months[low:high]:
+            first = month * 100 + 1
+            last = month * 100 + calendar.monthrange(month // 100,
+                                                     month % 100)[1]
+            if ((begin is None or begin <= first)
+                    and (end is None or end >= last)):
+                ret.merge(self.months.get(month))
+            else:
+                edges.append((max(first, begin or first),
+                              min(last, end or last)))
+        readings = [values for values, _ in lineparser.scan(self.partial)]
+        if edges:
+            readings[:0] = self._read_days(edges)
+        for reading in readings:
+            date = reading[STAMP] // 10000
+            if date and ((begin is None or date >= begin)
+                    and (end is None or date <= end)):
+                ret.add(reading, self.scheme.code(reading[0], reading[1]))
+        return ret
+
+    def _read_days(self, edges):
+        """
+        Yields the rolled up readings dated within any of <edges>
+        ((first, last) YYYYmmdd pairs), reading only the parts of
+        the data file the stamp index says are needed.
+        """
+        index = stampindex.StampIndex(self.path)
+        index.update()
+        for first, last in edges:
+            # Only what was rolled up, should the file have grown since.
+            spans = [(start, min(stop, self.scanned))
+                     for start, stop in index.spans(first, last,
+                                                    self.scanned)
+                     if start < self.scanned]
+            for reading in zip(*index.read(spans).columns):
+                if first <= reading[STAMP] // 10000 <= last:
+                    yield reading
+
+
+def answers(args):
+    """
+    Can the report asked for by <args> be made from rollups?
+    Only date restricted (-r, -d) reports of averages and, perhaps,
+    categories according to the "single" scheme can.
+    """
+    return bool((args.range or args.date) and not (
+        args.times or args.number or args.stream or args.stats
+        or args.by_time_of_day or args.trend is not None or args.error
+        or args.categories not in (None, SCHEME)))
+
+
+def update_existing(path):
+    """Brings the rollups of <path>, if it has any, up to date."""
+    if os.path.exists(path + SUFFIX):
+        Rollups(path).update()
+
+
+def range_summary(path, begin=None, end=None):
+    """
+    Brings the rollups of <path> up to date and returns the
+    Rollup of the readings dated <begin> through <end>.
+    """
+    rollups = Rollups(path)
+    rollups.update()
+    return rollups.total(begin, end)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+# File: server.py
+
+"""
+Provides class:
+    IngestServer
+and function:
+    main
+
+A long running asyncio service which devices (or their gateways)
+push readings to, rather than running bp_tracker.py -a for each.
+
+Clients connect to a Unix domain socket (and/or, optionally, a
+localhost TCP port) and send newline delimited readings, each with
+its own time stamp, as accepted by bp_tracker --import (see
+bp_tracker.parse_record.)  Each line is answered "ok" once its
+reading has been queued or "rejected" if it isn't valid.  Note that
+"ok" is an acknowledgement of receipt, not of the reading having
+been written: a batch which then can't be written (the disk is
+full, say) is reported on stderr and counted as failed (see
+IngestServer.failed, also reported when the server stops) but the
+clients which sent it are not told.
+
+Readings queue up (the queue is bounded: when it is full, clients
+are no longer read from until there is room again, so the socket
+buffers fill and they are held back) to be written in batches to
+the data file or database (see bp_tracker.store_readings), one
+write per batch, off the event loop.  Stopping the server (SIGINT
+or SIGTERM when run as a script) stops accepting connections,
+lets those open finish and writes whatever is still queued.
+
+usage: server.py [-h] [-f FILE] [--db DATABASE] [--socket PATH]
+                 [--tcp PORT] [--queue N] [--batch N] [--interval SECONDS]
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+
+import bp_tracker
+import db
+
+DEFAULT_SOCKET = "bp_tracker.sock"
+
+
+class IngestServer(object):
+    """
+    Queues the readings received and writes them to <report_file>
+    (or <database>) up to <batch> at a time, waiting at most
+    <interval> seconds for a batch to fill.
+    """
+
+    def __init__(self, report_file, database=None, queue_size=10000,
+                 batch=1000, interval=0.05):
+        self.report_file = report_file
+        self.database = database
+        self.batch = batch
+        self.interval = interval
+        self.queue_size = queue_size
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed = 0  # readings which could not be written
+        self._servers = []
+        self._clients = set()
+
+    async def start(self, socket_path=None, tcp_port=None,
+                    host="127.0.0.1"):
+        """Starts listening (and the writer task.)"""
+        self._queue = asyncio.Queue(self.queue_size)
+        self._flusher = asyncio.ensure_future(self._flush_forever())
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)  # left by a previous run
+            self._servers.append(await asyncio.start_unix_server(
+                self._serve, socket_path))
+        if tcp_port is not None:
+            self._servers.append(await asyncio.start_server(
+                self._serve, host, tcp_port))
+
+    def ports(self):
+        """The TCP ports listened on (useful when started on port 0.)"""
+        return [sock.getsockname()[1] for server in self._servers
+                for sock in server.sockets if sock.family != socket.AF_UNIX]
+
+    async def _serve(self, reader, writer):
+        self._clients.add(asyncio.current_task())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode(errors="replace").strip()
+                if not line or line.startswith("#"):
+                    continue
+                reading = bp_tracker.parse_record(line)
+                if reading is None:
+                    self.rejected += 1
+                    writer.write(b"rejected\n")
+                else:
+                    await self._queue.put(reading)  # backpressure
+                    self.accepted += 1
+                    writer.write(b"ok\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(asyncio.current_task())
+            writer.close()
+
+    async def _flush_forever(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.batch:
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+
+    async def _write(self, batch):
+        loop = asyncio.get_running_loop()
+        unstored = []  # already answered "ok" but a binary file can't hold
+        try:
+            self.written += await loop.run_in_executor(
+                None, bp_tracker.store_readings, batch, self.report_file,
+                self.database, unstored)
+            self.flushes += 1
+            if unstored:
+                self.failed += len(unstored)
+                print("Failed to write {} readings: {}".format(
+                    len(unstored), ", ".join(unstored)), file=sys.stderr)
+        except (OSError, ValueError, db.sqlite3.Error) as e:
+            self.failed += len(batch)
+            print("Failed to write {} readings: {}".format(len(batch), e),
+                  file=sys.stderr)
+        except Exception as e:
+            # Not expected, but the flusher must carry on (and the
+            # queue be told) or stop() and the clients would hang.
+            self.failed += len(batch)
+            print("Failed to write {} readings: unexpected {}: {}".format(
+                len(batch), type(e).__name__, e), file=sys.stderr)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    async def stop(self, timeout=5):
+        """
+        Stops accepting connections, gives those open <timeout>
+        seconds to finish, then writes whatever is still queued.
+        """
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self._clients:
+            done, pending = await asyncio.wait(self._clients,
+                                               timeout=timeout)
+            for task in pending:
+                task.cancel()
+        await self._queue.join()  # everything queued has been written
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", default=bp_tracker.data_file,
+                        help="data FILE to add to (default bp_numbers.txt)")
+    parser.add_argument("--db", metavar="DATABASE",
+                        help="add to an SQLite DATABASE rather than FILE")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, metavar="PATH",
+                        help="Unix socket to listen on "
+                        "(default {})".format(DEFAULT_SOCKET))
+    parser.add_argument("--tcp", type=int, metavar="PORT",
+                        help="also listen on localhost PORT")
+    parser.add_argument("--queue", type=int, default=10000, metavar="N",
+                        help="hold back clients once N readings are "
+                        "waiting to be written (default 10000)")
+    parser.add_argument("--batch", type=int, default=1000, metavar="N",
+                        help="write up to N readings at a time "
+                        "(default 1000)")
+    parser.add_argument("--interval", type=float, default=0.05,
+                        metavar="SECONDS",
+                        help="longest wait for a batch to fill "
+                        "(default 0.05)")
+    return parser.parse_args()
+
+
+async def serve(args):
+    server = IngestServer(args.file, args.db, args.queue, args.batch,
+                          args.interval)
+    await server.start(args.socket, args.tcp)
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    print("Listening on {}.".format(" and ".join(
+        [args.socket] + ["localhost:{}".format(port)
+                         for port in server.ports()])), flush=True)
+    await stopping.wait()
+    await server.stop()
+    os.unlink(args.socket)
+    print("Wrote {} readings ({} rejected, {} failed) in {} batches.".format(
+        server.written, server.rejected, server.failed, server.flushes))
+
+
+def main():
+    asyncio.run(serve(get_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+# File: stampindex.py
+
+"""
+Provides class:
+    StampIndex
+and function:
+    read_dates
+
+A persistent sidecar index (<data file>.idx, JSON) recording, for
+each date, where its first reading is: a byte offset for a text
+data file, a record number for a binary one (see binfile.py.)
+The index is brought up to date incrementally: only what has been
+appended since it was last saved is scanned.  It is keyed on the
+identity of the data file (see parsecache.identity) and rebuilt if
+the file has been replaced, truncated or edited.
+
+Data files are (mostly) appended to in chronological order.
+The odd reading entered late, i.e. dated before a reading that
+precedes it in the file, is kept in a separate list of
+"stragglers" which is searched linearly.
+Undated ("0.0") readings are ignored; since they may fall within
+the slices read, bp_tracker.filter_data still gets to drop them.
+"""
+
+from bisect import bisect_left, bisect_right
+import json
+
+import binfile
+import lineparser
+import parsecache
+import writer
+from store import STAMP, ReadingStore
+
+SUFFIX = ".idx"
+# read_dates reads at most this share of a text file through the
+# index: parsing much more costs more than loading the whole file
+# from its parse cache (see parsecache.py) and filtering that.
+SMALL = 1 / 16
+
+
+class StampIndex(object):
+    def __init__(self, path):
+        self.path = path
+        self.index_file = path + SUFFIX
+        self.binary = binfile.is_binary(path)
+        self.reset()
+
+    def reset(self):
+        self.scanned = 0  # bytes (text) or records (binary)
+        self.identity = None  # of the data file, see parsecache.identity
+        self.dates = []
+        self.offsets = []
+        self.stragglers = []  # [date, offset, length] triples
+
+    def load(self):
+        """Reads the sidecar file if there is a usable one."""
+        try:
+            with open(self.index_file, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get("binary") != self.binary or not saved.get("identity"):
+            return
+        self.identity = tuple(saved["identity"])
+        self.scanned = saved["scanned"]
+        self.dates = saved["dates"]
+        self.offsets = saved["offsets"]
+        self.stragglers = saved["stragglers"]
+
+    def save(self):
+        """Writes the sidecar file; silently gives up if we can't."""
+        saved = dict(binary=self.binary, identity=self.identity,
+                     scanned=self.scanned,
+                     dates=self.dates, offsets=self.offsets,
+                     stragglers=self.stragglers)
+        parsecache.replace_file(
+            self.index_file, lambda f: f.write(json.dumps(saved).encode()))
+
+    def _note(self, date, offset, length=1):
+        if date == 0:
+            return
+        if not self.dates or date > self.dates[-1]:
+            self.dates.append(date)
+            self.offsets.append(offset)
+        elif date < self.dates[-1]:
+            self.stragglers.append([date, offset, length])
+
+    def _scan_text(self):
+        with open(self.path, "rb") as f, writer.locked(f):
+            if not parsecache.is_prefix(self.identity, f, self.scanned):
+                self.reset()
+            f.seek(self.scanned)
+            offset = self.scanned
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # wait for the rest of the line
+                try:
+                    values, _ = lineparser.parse_line(line)
+                except ValueError:
+                    pass
+                else:
+                    self._note(values[STAMP] // 10000, offset, len(line))
+                offset += len(line)
+            self.scanned = offset
+            self.identity = parsecache.identity(f, offset)
+            return self.identity[1]
+
+    def _scan_binary(self):
+        def offset(records):
+            return binfile.HEADER.size + records * binfile.RECORD.size
+
+        with open(self.path, "rb") as f:
+            if not parsecache.is_prefix(self.identity, f,
+                                        offset(self.scanned)):
+                self.reset()
+            with binfile.BinaryReadings(self.path) as readings:
+                n = len(readings)
+                for i in range(self.scanned, n):
+                    self._note(readings.stamp(i) // 10000, i)
+            self.scanned = n
+            self.identity = parsecache.identity(f, offset(n))
+        return n
+
+    def update(self):
+        """
+        Loads the saved index, scans what was appended since and
+        saves it again.  Returns the current size of the data file
+        (in bytes or records.)
+        """
+        self.load()
+        before = (self.scanned, self.identity)
+        if self.binary:
+            end = self._scan_binary()
+        else:
+            end = self._scan_text()
+        if (self.scanned, self.identity) != before:
+            self.save()
+        return end
+
+    def spans(self, begin=None, end=None, limit=None):
+        """
+        Returns a list, in file order, of the (start, stop) offsets
+        (or record numbers) to be read to get the readings dated
+        <begin> through <end> (both YYYYmmdd, either may be None.)
+        <limit> is where the data file ends.
+        """
+        start = 0
+        if begin is not None:
+            i = bisect_left(self.dates, begin)
+            start = self.offsets[i] if i < len(self.offsets) else limit
+        stop = limit
+        if end is not None:
+            i = bisect_right(self.dates, end)
+            if i < len(self.offsets):
+                stop = self.offsets[i]
+        ret = [(start, max(start, stop))]
+        for date, offset, length in self.stragglers:
+            if ((begin is None or date >= begin)
+                    and (end is None or date <= end)
+                    and not start <= offset < stop):
+                ret.append((offset, offset + length))
+        ret.sort()
+        return ret
+
+    def read(self, spans):
+        """Returns a ReadingStore of the readings within <spans>."""
+        ret = ReadingStore()
+        if not self.binary:
+            with open(self.path, "rb") as f:
+                for start, stop in spans:
+                    f.seek(start)
+                    ret.extend(ReadingStore.from_parsed(
+                        lineparser.scan(f.read(stop - start))))
+            return ret
+        with binfile.BinaryReadings(self.path) as readings:
+            for start, stop in spans:
+                ret.extend(readings.store(start, stop))
+        return ret
+
+
+def read_dates(path, begin=None, end=None, most=None):
+    """
+    Returns a ReadingStore containing (at least) the readings
+    dated <begin> through <end> by reading only those parts of
+    <path> which the index says are needed.  If <path> is a
+    text file and they come to more than <most> (a share) of
+    it, returns None instead.
+    """
+    index = StampIndex(path)
+    limit = index.update()
+    spans = index.spans(begin, end, limit)
+    if not index.binary and most is not None and (
+            sum(stop - start for start, stop in spans) > most * limit):
+        return None
+    return index.read(spans)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+# File: stats.py
+
+"""
+Provides functions:
+    column_stats, describe, format_stats
+and class:
+    RunningStats
+
+Descriptive statistics (mean, standard deviation, median,
+percentiles, min and max) of the systolic, diastolic and pulse
+columns of a ReadingStore, as well as of the pulse pressure
+(systolic - diastolic.)
+
+NumPy, if installed, is used to do all columns in one vectorized
+pass; otherwise pure Python is used.  Both give the same results:
+the standard deviation is that of the population and percentiles
+are linearly interpolated (NumPy's default.)
+
+RunningStats accumulates count, mean, variance, min and max one
+reading at a time (Welford's algorithm) without keeping the
+readings; accumulators of chunks, files or days can be merged
+(Chan et al.'s pairwise update) and saved or sent between
+processes as plain dicts (to_dict, from_dict.)
+"""
+
+import math
+from operator import mul
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PERCENTILES = (25, 75, 90)
+COLUMNS = ("systolic", "diastolic", "pulse", "pulse pressure")
+
+
+def _percentile(ordered, q):
+    """<q>th percentile of the sorted sequence <ordered>."""
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def column_stats(values, percentiles=PERCENTILES):
+    """
+    Pure Python statistics of a (non empty) sequence of numbers.
+    Returns a dict with keys: count, mean, std, median, min, max
+    and one key per percentile ("p25" etc.)
+    """
+    ordered = sorted(values)
+    n = len(ordered)
+    mean = math.fsum(ordered) / n
+    std = math.sqrt(math.fsum((x - mean) ** 2 for x in ordered) / n)
+    ret = dict(count=n, mean=mean, std=std,
+               median=_percentile(ordered, 50),
+               min=ordered[0], max=ordered[-1])
+    for q in percentiles:
+        ret["p{}".format(q)] = _percentile(ordered, q)
+    return ret
+
+
+def _numpy_describe(store, percentiles):
+    systolics, diastolics, pulses = (
+        numpy.frombuffer(column, dtype=column.typecode)
+        for column in store.columns[:3])
+    table = numpy.vstack((systolics, diastolics, pulses,
+                          systolics.astype(numpy.int32) - diastolics))
+    table = table.astype(numpy.float64)
+    qs = (50,) + tuple(percentiles)
+    means = table.mean(axis=1)
+    stds = table.std(axis=1)
+    quantiles = numpy.percentile(table, qs, axis=1)
+    minima = table.min(axis=1)
+    maxima = table.max(axis=1)
+    ret = {}
+    for row, name in enumerate(COLUMNS):
+        d = dict(count=table.shape[1], mean=float(means[row]),
+                 std=float(stds[row]), median=float(quantiles[0][row]),
+                 min=int(minima[row]), max=int(maxima[row]))
+        for i, q in enumerate(percentiles, 1):
+            d["p{}".format(q)] = float(quantiles[i][row])
+        ret[name] = d
+    return ret
+
+
+def describe(store, percentiles=PERCENTILES):
+    """
+    Returns a dict keyed by the names in COLUMNS of the
+    column_stats of each.  <store> must not be empty.
+    """
+    if numpy is not None:
+        return _numpy_describe(store, percentiles)
+    systolics, diastolics, pulses = store.columns[:3]
+    pressures = [s - d for s, d in zip(systolics, diastolics)]
+    return {name: column_stats(values, percentiles)
+            for name, values in zip(COLUMNS, (systolics, diastolics,
+                                              pulses, pressures))}
+
+
+def format_stats(stats):
+    """Returns a table (a string) of what 'describe' returned."""
+    keys = [key for key in stats[COLUMNS[0]] if key != "count"]
+    lines = ["Statistics ({} readings)".format(stats[COLUMNS[0]]["count"]),
+             "{:<15}".format("") + "".join("{:>8}".format(key)
+                                           for key in keys)]
+    for name in COLUMNS:
+        lines.append("{:<15}".format(name) + "".join(
+            "{:>8.1f}".format(stats[name][key]) for key in keys))
+    return "\n".join(lines) + "\n"
+
+
+class RunningStats(object):
+    """
+    Online count and, for each of <width> columns, sum, mean,
+    M2 (sum of squared deviations from the mean), min and max.
+    Sums are kept (exactly) for integer averages as given by
+    bp_tracker.average.
+    """
+
+    KEYS = ("count", "sums", "means", "m2", "minima", "maxima")
+
+    def __init__(self, width=3):
+        self.width = width
+        self.count = 0
+        self.sums = [0] * width
+        self.means = [0.0] * width
+        self.m2 = [0.0] * width
+        self.minima = [None] * width
+        self.maxima = [None] * width
+
+    def add(self, values):
+        """Takes in one reading: <width> (or more) numbers."""
+        self.count += 1
+        n = self.count
+        sums, means, m2 = self.sums, self.means, self.m2
+        minima, maxima = self.minima, self.maxima
+        for i in range(self.width):
+            x = values[i]
+            sums[i] += x
+            delta = x - means[i]
+            means[i] += delta / n
+            m2[i] += delta * (x - means[i])
+            if n == 1:
+                minima[i] = maxima[i] = x
+            elif x < minima[i]:
+                minima[i] = x
+            elif x > maxima[i]:
+                maxima[i] = x
+
+    def update(self, columns):
+        """
+        Takes in all the readings of <columns> (equal length
+        sequences of ints, e.g. ReadingStore columns) at once.
+        M2 is worked out exactly, in integers, from the sums of
+        the values and of their squares.
+        """
+        n = len(columns[0]) if columns else 0
+        if not n:
+            return
+        chunk = RunningStats(self.width)
+        chunk.count = n
+        for i, column in enumerate(columns[:self.width]):
+            total = sum(column)
+            chunk.sums[i] = total
+            chunk.means[i] = total / n
+            chunk.m2[i] = (n * sum(map(mul, column, column))
+                           - total * total) / n
+            chunk.minima[i] = min(column)
+            chunk.maxima[i] = max(column)
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Adds in the readings <other> has seen."""
+        if not other.count:
+            return
+        if not self.count:
+            for key in self.KEYS:
+                value = getattr(other, key)
+                setattr(self, key, list(value)
+                        if isinstance(value, list) else value)
+            return
+        na, nb = self.count, other.count
+        n = na + nb
+        for i in range(self.width):
+            delta = other.means[i] - self.means[i]
+            self.sums[i] += other.sums[i]
+            self.means[i] += delta * nb / n
+            self.m2[i] += other.m2[i] + delta * delta * na * nb / n
+            self.minima[i] = min(self.minima[i], other.minima[i])
+            self.maxima[i] = max(self.maxima[i], other.maxima[i])
+        self.count = n
+
+    def average(self, index):
+        """Integer average (as does bp_tracker.average.)"""
+        return self.sums[index] // self.count
+
+    def variance(self, index):
+        """Population variance of column <index>."""
+        return self.m2[index] / self.count
+
+    def std(self, index):
+        return math.sqrt(self.variance(index))
+
+    def to_dict(self):
+        ret = {key: getattr(self, key) for key in self.KEYS}
+        ret["width"] = self.width
+        return ret
+
+    @classmethod
+    def from_dict(cls, saved):
+        ret = cls(saved["width"])
+        for key in cls.KEYS:
+            value = saved[key]
+            setattr(ret, key, list(value)
+                    if isinstance(value, list) else value)
+        return ret
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+# File: store.py
+
+"""
+Provides class:
+    ReadingStore
+and functions:
+    parse_line, decode_stamp, date2day, hhmm2minute, minute_bounds,
+    stamp2int, int2stamp, int2minutes, minutes2int
+
+A ReadingStore keeps blood pressure readings column-wise in typed
+arrays (array.array) rather than as a list of 4-element lists.
+Systolic, diastolic and pulse values are unsigned 16 bit integers;
+the YYYYmmdd.hhmm time stamp is kept as the integer YYYYmmddhhmm
+(the "0.0" stamp of an undated reading becomes 0.)
+The time stamp is also decoded, once, as it is stored into three
+more columns: the date (YYYYmmdd), the minute of the day and minutes
+since the epoch; for undated readings each of these is UNDATED.
+So the filters are simple integer comparisons.
+That comes to 36 bytes per reading.
+
+If NumPy is installed, 'as_numpy' provides (zero copy) views
+of the columns.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from lazy import lazy_import
+
+try:
+    numpy = lazy_import("numpy")  # only loaded by as_numpy
+except ImportError:
+    numpy = None
+lineparser = lazy_import("lineparser")  # which imports this module
+
+# Indices shared with the list of lists representation.
+SYSTOLIC, DIASTOLIC, PULSE, STAMP = range(4)
+# Indices into ReadingStore.times
+DATE, MINUTE_OF_DAY, EPOCH_MINUTES = range(3)
+
+UNDATED = -1
+
+
+def stamp2int(stamp):
+    """
+    "YYYYmmdd.hhmm" => YYYYmmddhhmm (an int); "0.0" => 0.
+    Raises ValueError if <stamp> isn't of that form.
+    """
+    date, _, time = stamp.partition(".")
+    if not (date.isdigit() and time.isdigit()):
+        raise ValueError("Invalid time stamp: {}".format(stamp))
+    if int(date) == 0:
+        return 0
+    return int(date) * 10000 + int(time)
+
+
+def int2stamp(n):
+    """The inverse of stamp2int."""
+    if n == 0:
+        return "0.0"
+    return "{:08d}.{:04d}".format(n // 10000, n % 10000)
+
+
+def parse_line(line):
+    """
+    Returns the (systolic, diastolic, pulse, YYYYmmddhhmm) ints
+    of a (stripped, non comment) data line.
+    Raises ValueError if the line isn't a valid reading
+    (see lineparser.py.)
+    """
+    return lineparser.parse_line(line)[0]
+
+
+EPOCH = datetime(1970, 1, 1)
+MINUTE = timedelta(minutes=1)
+
+
+@lru_cache(maxsize=4096)
+def date2day(date):
+    """YYYYmmdd => days since the epoch; ValueError if no such date."""
+    d = datetime(date // 10000, date // 100 % 100, date % 100)
+    return (d - EPOCH).days
+
+
+def hhmm2minute(hhmm):
+    """hhmm (e.g. 1430) => minute of the day (e.g. 870.)"""
+    hours, minutes = divmod(hhmm, 100)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError("Invalid time of day: {}".format(hhmm))
+    return hours * 60 + minutes
+
+
+def minute_bounds(begin, end):
+    """
+    Converts a -t (hhmm, hhmm) range into minutes of the day,
+    such that begin <= hhmm <= end exactly when the minute of
+    the day falls within them (even for begin/end like 1299.)
+    """
+    return (begin // 100 * 60 + min(begin % 100, 60),
+            end // 100 * 60 + min(end % 100, 59))
+
+
+def decode_stamp(stamp):
+    """
+    Decodes a time stamp (YYYYmmddhhmm, or the "YYYYmmdd.hhmm"
+    string) into (date, minute of day, minutes since the epoch.)
+    Undated stamps (0 or "0.0") give (UNDATED, UNDATED, UNDATED.)
+    Raises ValueError if <stamp> isn't a valid date and time.
+    """
+    if isinstance(stamp, str):
+        stamp = stamp2int(stamp)
+    if stamp == 0:
+        return UNDATED, UNDATED, UNDATED
+    date, hhmm = divmod(stamp, 10000)
+    minute = hhmm2minute(hhmm)
+    return date, minute, date2day(date) * 1440 + minute
+
+
+def int2minutes(n):
+    """
+    YYYYmmddhhmm => minutes since the epoch (negative before it.)
+    Raises ValueError if <n> isn't a valid date and time (0, the
+    stamp of an undated reading, included.)
+    """
+    if n == 0:
+        raise ValueError("An undated reading has no time")
+    return decode_stamp(n)[EPOCH_MINUTES]
+
+
+@lru_cache(maxsize=4096)
+def _day2date(day):
+    """Days since the epoch => YYYYmmdd."""
+    d = EPOCH + timedelta(days=day)
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def minutes2int(minutes):
+    """The inverse of int2minutes."""
+    day, minute = divmod(minutes, 1440)
+    return _day2date(day) * 10000 + minute // 60 * 100 + minute % 60
+
+
+class ReadingStore(object):
+    """
+    Column oriented collection of readings.
+    Indexing (store[i]) returns a reading in the same
+    [int, int, int, str] form as bp_tracker.valid_data.
+    """
+
+    typecodes = ("H", "H", "H", "q")
+    time_typecodes = ("l", "h", "q")
+
+    def __init__(self):
+        self.columns = tuple(array(code) for code in self.typecodes)
+        self.times = tuple(array(code) for code in self.time_typecodes)
+        self._all = self.columns + self.times
+
+    @property
+    def systolics(self):
+        return self.columns[SYSTOLIC]
+
+    @property
+    def diastolics(self):
+        return self.columns[DIASTOLIC]
+
+    @property
+    def pulses(self):
+        return self.columns[PULSE]
+
+    @property
+    def stamps(self):
+        return self.columns[STAMP]
+
+    @property
+    def dates(self):
+        return self.times[DATE]
+
+    @property
+    def minutes(self):
+        return self.times[MINUTE_OF_DAY]
+
+    @property
+    def epochs(self):
+        return self.times[EPOCH_MINUTES]
+
+    def __len__(self):
+        return len(self.columns[STAMP])
+
+    def __getitem__(self, i):
+        s, d, p, t = (column[i] for column in self.columns)
+        return [s, d, p, int2stamp(t)]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, systolic, diastolic, pulse, stamp):
+        """
+        <stamp> may be either the integer or the string form.
+        Raises ValueError (OverflowError is a subclass) if any
+        value can't be represented; the store is left unchanged.
+        """
+        if isinstance(stamp, str):
+            stamp = stamp2int(stamp)
+        values = (systolic, diastolic, pulse, stamp) + decode_stamp(stamp)
+        for n, (column, value) in enumerate(zip(self._all, values)):
+            try:
+                column.append(value)
+            except (OverflowError, TypeError):
+                for done in self._all[:n]:
+                    done.pop()
+                raise ValueError("Can't store {}".format(values[:4]))
+
+    def extend(self, other):
+        """Appends the readings of another store."""
+        for src, dest in zip(other._all, self._all):
+            dest.extend(src)
+
+    def column(self, index):
+        """Returns the column (an array) for <index> (0..3 or -1)."""
+        return self.columns[index]
+
+    def take(self, indices):
+        """
+        Returns a new store containing the readings at <indices>
+        (any iterable of ints) in the order given.
+        """
+        indices = list(indices)
+        ret = ReadingStore()
+        for src, dest in zip(self._all, ret._all):
+            dest.extend(map(src.__getitem__, indices))
+        return ret
+
+    def tail(self, n):
+        """Returns a new store containing the last <n> readings."""
+        ret = ReadingStore()
+        start = max(len(self) - n, 0)
+        for src, dest in zip(self._all, ret._all):
+            dest.extend(src[start:])
+        return ret
+
+    def as_numpy(self):
+        """
+        Returns a tuple of NumPy arrays sharing memory with the
+        columns followed by the time columns.
+        Raises ImportError if NumPy isn't available.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for 'as_numpy'")
+        return tuple(numpy.frombuffer(column, dtype=column.typecode)
+                     for column in self._all)
+
+    @classmethod
+    def from_lines(cls, lines, invalid_lines=None):
+        """
+        Builds a store from an iterable of (stripped, non comment)
+        lines.  Lines that can't be stored are appended to
+        <invalid_lines> if it is not None.
+        """
+        def parsed():
+            for line in lines:
+                try:
+                    yield lineparser.parse_line(line)
+                except ValueError:
+                    if invalid_lines is not None:
+                        invalid_lines.append(line)
+
+        return cls.from_parsed(parsed())
+
+    @classmethod
+    def from_columns(cls, arrays):
+        """
+        Builds a store from its columns and times (arrays, as in
+        store.columns + store.times); raises ValueError if they
+        aren't those of a store.
+        """
+        ret = cls()
+        if ([column.typecode for column in arrays]
+                != [column.typecode for column in ret._all]
+                or len(set(map(len, arrays))) > 1):
+            raise ValueError("Not the columns of a ReadingStore")
+        for src, dest in zip(arrays, ret._all):
+            dest.extend(src)
+        return ret
+
+    @classmethod
+    def from_parsed(cls, parsed):
+        """
+        Builds a store from an iterable of (values, decoded stamp)
+        pairs as lineparser.parse_line returns them.
+        """
+        ret = cls()
+        appends = [column.append for column in ret._all]
+        for values, decoded in parsed:
+            # Already validated: these can't fail.
+            for append, value in zip(appends, values + decoded):
+                append(value)
+        return ret
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# File: tail.py
+
+"""
+Provides functions:
+    blocks, read_last
+
+Reads a text data file backwards from its end so that -n NUMBER
+(the last NUMBER readings) touches only the end of the file, no
+matter how many years of readings precede them.
+
+'blocks' seeks back from the end BLOCK bytes at a time and yields
+buffers of whole lines, newest first; 'read_last' parses them (see
+lineparser.py) until enough readings have passed the filters.
+"""
+
+import os
+
+import lineparser
+from store import ReadingStore
+
+BLOCK = 1 << 13  # bytes read at a time
+
+
+def blocks(f, size=BLOCK):
+    """
+    Yields buffers of whole lines of the binary file object <f>,
+    working back from its end <size> bytes at a time: the last
+    lines first, each buffer holding the lines just before those
+    of the previous one.
+    """
+    pos = f.seek(0, os.SEEK_END)
+    rest = b""  # the (end of the) line the last block began in
+    while pos > 0:
+        step = min(size, pos)
+        pos -= step
+        f.seek(pos)
+        buffer = f.read(step) + rest
+        start = 0
+        if pos > 0:
+            start = buffer.find(b"\n") + 1
+            if start == 0:  # no line begins in this block
+                rest = buffer
+                continue
+        rest = buffer[:start]
+        if start < len(buffer):
+            yield buffer[start:]
+
+
+def read_last(path, n, keep=None, size=BLOCK):
+    """
+    Returns a ReadingStore of the last <n> readings (in file order)
+    in the text file <path> which pass <keep>, a function returning
+    the indices of the readings in a ReadingStore which pass the
+    filters (all readings pass if it's None.)  Reading stops as
+    soon as <n> have been found.
+    """
+    found = []  # stores of readings which passed, newest first
+    count = 0
+    with open(path, "rb") as f:
+        for buffer in blocks(f, size):
+            store = ReadingStore.from_parsed(lineparser.scan(buffer))
+            if keep is not None:
+                store = store.take(keep(store))
+            found.append(store)
+            count += len(store)
+            if count >= n:
+                break
+    ret = ReadingStore()
+    for store in reversed(found):
+        ret.extend(store)
+    return ret.tail(n)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# File test/test_binfile.py
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import store
+
+
+class TestBinFile(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.text_file = os.path.join(self.test_dir.name, "data.txt")
+        self.binary_file = os.path.join(self.test_dir.name, "data.bpt")
+        with open(self.text_file, "w") as f:
+            f.write("# A comment\n")
+            f.write("110 59 68 20220809.1640\n")
+            f.write("124 62 62 20220810.0840\n")
+            f.write("176 92 76 0.0\n")
+            f.write("134 63 57 20220230.0758\n")  # no such date
+            f.write("100 59 62 20220812.1323\n")
+        self.text_invalid = []
+        self.text_store = bp_tracker.store_from_file(self.text_file,
+                                                     self.text_invalid)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_minutes(self):
+        for stamp in (202208091640, 197001010000, 197001010001,
+                      202412312359, 196912312359):
+            self.assertEqual(
+                store.minutes2int(store.int2minutes(stamp)), stamp)
+        self.assertEqual(store.int2minutes(197001020000), 1440)
+        self.assertRaises(ValueError, store.int2minutes, 202202300758)
+        self.assertRaises(ValueError, store.int2minutes, 0)
+
+    def test_epoch_and_before(self):
+        # The first minute of the epoch is a time, not "undated";
+        # readings before it can't be stored and are rejected.
+        with open(self.text_file, "a") as f:
+            f.write("120 80 60 19700101.0000\n")
+            f.write("121 81 61 19691231.2359\n")
+        data = bp_tracker.store_from_file(self.text_file)
+        invalid_lines = []
+        self.assertEqual(binfile.convert(data, self.binary_file,
+                                         invalid_lines), 5)
+        self.assertEqual(invalid_lines, ["121 81 61 19691231.2359"])
+        with binfile.BinaryReadings(self.binary_file) as readings:
+            self.assertEqual(readings[-1], [120, 80, 60, 197001010000])
+            self.assertEqual(readings.stamp(2), 0)
+            self.assertEqual(list(readings.store(4).dates), [19700101])
+        self.assertRaises(ValueError, binfile.write_store, data,
+                          self.binary_file)
+        self.assertRaises(ValueError, binfile.append, self.binary_file,
+                          120, 80, 60, 196912312359)
+
+    def test_convert(self):
+        invalid_lines = []
+        n = binfile.convert(self.text_store, self.binary_file, invalid_lines)
+        self.assertEqual(n, 4)
+        self.assertEqual(invalid_lines, [])
+        self.assertEqual(self.text_invalid, ["134 63 57 20220230.0758"])
+        self.assertTrue(binfile.is_binary(self.binary_file))
+        self.assertFalse(binfile.is_binary(self.text_file))
+        with binfile.BinaryReadings(self.binary_file) as readings:
+            self.assertEqual(len(readings), 4)
+            self.assertEqual(readings[1], [124, 62, 62, 202208100840])
+            self.assertEqual(readings.stamp(2), 0)
+            expected = self.text_store
+            self.assertEqual(list(readings.store()), list(expected))
+            self.assertEqual(list(readings.store(2)), list(expected)[2:])
+
+    def test_append(self):
+        binfile.convert(self.text_store, self.binary_file)
+        binfile.append(self.binary_file, 120, 70, 60, 202301010800)
+        with binfile.BinaryReadings(self.binary_file) as readings:
+            self.assertEqual(len(readings), 5)
+            self.assertEqual(readings[-1], [120, 70, 60, 202301010800])
+
+    def test_add(self):
+        binfile.convert(self.text_store, self.binary_file)
+        size = os.path.getsize(self.binary_file)
+        for values in (["1x0", "80", "60"], ["120", "80", "70000"]):
+            args = argparse.Namespace(add=values, file=self.binary_file,
+                                      db=None)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertRaises(SystemExit, bp_tracker.add, args)
+            self.assertIn("Unable to add", out.getvalue())
+        self.assertEqual(os.path.getsize(self.binary_file), size)
+        bp_tracker.add(argparse.Namespace(add=["120", "80", "60"],
+                                          file=self.binary_file, db=None))
+        with binfile.BinaryReadings(self.binary_file) as readings:
+            self.assertEqual(readings[-1][:3], [120, 80, 60])
+
+    def test_read_store(self):
+        binfile.convert(self.text_store, self.binary_file)
+        args = argparse.Namespace(times=None, range=None,
+                                  date=None, number=[2])
+        data = binfile.read_store(self.binary_file, args)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[-1], [100, 59, 62, "20220812.1323"])
+
+    def test_empty_and_bad_files(self):
+        binfile.write_store(store.ReadingStore(), self.binary_file)
+        with binfile.BinaryReadings(self.binary_file) as readings:
+            self.assertEqual(len(readings.store()), 0)
+        self.assertRaises(ValueError, binfile.BinaryReadings, self.text_file)
+
+    def test_unreadable_files(self):
+        old = binfile.HEADER.pack(binfile.MAGIC, 1, binfile.RECORD.size)
+        partial = binfile.HEADER.pack(binfile.MAGIC, binfile.VERSION,
+                                      binfile.RECORD.size) + b"\x01"
+        for header in (old, binfile.MAGIC, partial):
+            with open(self.binary_file, "wb") as f:
+                f.write(header)
+            if header is not partial:
+                self.assertRaises(binfile.BinaryFileError,
+                                  binfile.BinaryReadings, self.binary_file)
+                with contextlib.redirect_stdout(io.StringIO()) as out:
+                    self.assertRaises(SystemExit, bp_tracker.main,
+                                      ["-f", self.binary_file])
+                self.assertIn("Unable to read", out.getvalue())
+            self.assertRaises(binfile.BinaryFileError, binfile.append,
+                              self.binary_file, 120, 70, 60, 202301010800)
+            self.assertRaises(binfile.BinaryFileError, binfile.append_many,
+                              self.binary_file, [[120, 70, 60, 202301010800]])
+            self.assertEqual(os.path.getsize(self.binary_file), len(header))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@
 
 import os
 import os.path
+import subprocess
+import sys
 import tempfile
 import unittest
 
@@ -107,30 +109,38 @@ class TestBpTracker(unittest.TestCase):
             self.assertTrue(bp_tracker.list_from_index(data, e) == expected[e])
 
     def test_no_date_stamp(self):
-        self.assertEqual(bp_tracker.no_date_stamp((115, 67, 66, "0.0")), None)
+        self.assertTrue(bp_tracker.no_date_stamp((115, 67, 66, "0.0")))
+        self.assertFalse(
+            bp_tracker.no_date_stamp((115, 67, 66, "20220914.0800")))
 
     def test_time_of_day_filter(self):
         self.assertEqual(
             bp_tracker.time_of_day_filter(
-                (115, 67, 66, "20220914.0800"), "0800", "0900"
+                (115, 67, 66, "20220914.0800"), 800, 900
             ),
             True,
         )
         self.assertEqual(
             bp_tracker.time_of_day_filter(
-                (115, 67, 66, "20220914.0839"), "0800", "0900"
+                (115, 67, 66, "20220914.0839"), 800, 900
             ),
             True,
         )
         self.assertEqual(
             bp_tracker.time_of_day_filter(
-                (115, 67, 66, "20220914.0839"), "0900", "1000"
+                (115, 67, 66, "20220914.0839"), 900, 1000
             ),
             None,
         )
         self.assertEqual(
             bp_tracker.time_of_day_filter(
-                (115, 67, 66, "0.0"), "0800", "0900"
+                (115, 67, 66, "20220914.1259"), 1200, 1299
+            ),
+            True,
+        )
+        self.assertEqual(
+            bp_tracker.time_of_day_filter(
+                (115, 67, 66, "0.0"), 800, 900
             ),
             None,
         )
@@ -138,23 +148,19 @@ class TestBpTracker(unittest.TestCase):
     def test_date_range_filter(self):
         self.assertEqual(
             bp_tracker.date_range_filter(
-                (115, 67, 66, "20220914.0839"),
-                "20220913.0800",
-                "20220916.0900",
+                (115, 67, 66, "20220914.0839"), 20220913, 20220916
             ),
             True,
         )
         self.assertEqual(
-            bp_tracker.time_of_day_filter(
-                (115, 67, 66, "20220914.0839"),
-                "20220910.0800",
-                "20220913.0900",
+            bp_tracker.date_range_filter(
+                (115, 67, 66, "20220914.0839"), 20220910, 20220913
             ),
             None,
         )
         self.assertEqual(
-            bp_tracker.time_of_day_filter(
-                (115, 67, 66, "0.0"), "20220910.0800", "20220913.0900"
+            bp_tracker.date_range_filter(
+                (115, 67, 66, "0.0"), 20220910, 20220913
             ),
             None,
         )
@@ -162,19 +168,19 @@ class TestBpTracker(unittest.TestCase):
     def test_not_before_filter(self):
         self.assertEqual(
             bp_tracker.not_before_filter(
-                (115, 67, 66, "20220914.0839"), "20220913.0800"
+                (115, 67, 66, "20220914.0839"), 20220913
             ),
             True,
         )
         self.assertEqual(
             bp_tracker.not_before_filter(
-                (115, 67, 66, "20220914.0839"), "20220915.0800"
+                (115, 67, 66, "20220914.0839"), 20220915
             ),
             None,
         )
         self.assertEqual(
             bp_tracker.not_before_filter(
-                (115, 67, 66, "0.0"), "20220915.0800"
+                (115, 67, 66, "0.0"), 20220915
             ),
             None,
         )
@@ -231,6 +237,39 @@ class TestBpTracker(unittest.TestCase):
     def test_add(self):
         pass
 
+    def test_quick_args(self):
+        args = bp_tracker.quick_args(["-f", "x.txt", "-a", "120", "80", "60"])
+        self.assertEqual((args.add, args.file, args.db),
+                         (["120", "80", "60"], "x.txt", None))
+        self.assertEqual(bp_tracker.quick_args(["--add", "1", "2", "3"]).file,
+                         bp_tracker.data_file)
+        for argv in ([], ["-n", "3"], ["-a", "120", "80"],
+                     ["-a", "120", "80", "60", "--db", "bp.sqlite"],
+                     ["-a", "120", "80", "60", "-f"], ["-a", "-1", "2", "3"],
+                     ["--file=x.txt", "-a", "120", "80", "60"]):
+            self.assertIsNone(bp_tracker.quick_args(argv))
+
+    def test_add_imports(self):
+        # Adding a reading mustn't load what only reporting needs.
+        code = ("import sys, types, bp_tracker\n"
+                "try:\n"
+                "    bp_tracker.main(sys.argv[1:])\n"
+                "except SystemExit:\n"
+                "    pass\n"
+                "print(*(name for name, module in sys.modules.items()\n"
+                "        if type(module) is types.ModuleType))\n")
+        loaded = subprocess.run(
+            [sys.executable, "-c", code, "-f", self.good_file,
+             "-a", "130", "70", "60"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE, text=True, check=True).stdout.split()
+        self.assertIn("writer", loaded)
+        for name in ("argparse", "classify", "cohort", "db", "numpy",
+                     "parsecache", "pickle", "pipeline", "sqlite3", "stats"):
+            self.assertNotIn(name, loaded)
+        store = bp_tracker.store_from_file(self.good_file)
+        self.assertEqual(store[-1][:3], [130, 70, 60])
+
     def test_format_data(self):
         pass
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+# File test/test_classify.py
+
+import os
+import unittest
+
+from aha import aha, bpc
+import bp_tracker
+import classify
+from store import ReadingStore
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+
+class TestClassify(unittest.TestCase):
+    def test_labels(self):
+        for scale in (bp_tracker.systolic_labels,
+                      bp_tracker.diastolic_labels):
+            classifier = classify.labels(scale)
+            for value in range(-5, 400):
+                self.assertEqual(classifier(value),
+                                 bp_tracker.get_label(value, scale))
+
+    def test_aha_categories(self):
+        for classifier, sord in ((classify.aha_systolic(), "s"),
+                                 (classify.aha_diastolic(), "d")):
+            for value in range(-5, 400):
+                self.assertEqual(classifier(value),
+                                 aha.get_category(value, sord))
+
+    def test_separate_category(self):
+        separate = bpc.SeparateCategory()
+        for value in range(0, 300):
+            self.assertEqual(classify.get("aha-systolic")(value),
+                             separate.get_category(value, "s"))
+
+    def test_separate_pairs(self):
+        classifier = classify.separate_category()
+        separate = bpc.SeparateCategory()
+        for s in range(-1, 230, 7):
+            for d in range(-1, 140):
+                self.assertEqual(classifier(s, d), "{} / {}".format(
+                    separate.get_category(s, "s"),
+                    separate.get_category(d, "d")))
+
+    def test_single_category(self):
+        classifier = classify.single_category()
+        single = bpc.SingleCategory()
+        for s in range(-1, 260, 3):
+            for d in range(-1, 160):
+                self.assertEqual(classifier(s, d), single.category(s, d))
+
+    def test_unified_status(self):
+        classifier = classify.unified_status()
+        for sp in range(-1, 260):
+            for dp in range(-1, 160, 3):
+                try:
+                    expected = aha.get_unified_status(sp, dp)
+                except AssertionError:
+                    expected = None
+                self.assertEqual(classifier(sp, dp), expected)
+        self.assertEqual(classifier.code(180, 70), classify.NONE)
+
+    def test_codes(self):
+        classifier = classify.single_category()
+        self.assertEqual(classifier.code(125, 70), 1)
+        self.assertEqual(classifier.name(1), "ELEVATED")
+
+    def test_unknown_scheme(self):
+        self.assertRaises(ValueError, classify.get, "no such scheme")
+
+    @unittest.skipIf(classify.numpy is None, "NumPy not installed")
+    def test_as_numpy(self):
+        table = classify.single_category().as_numpy()
+        self.assertEqual(table.shape, (183, 122))
+        self.assertEqual(table[125 + 1, 70 + 1], 1)
+
+
+class TestClassifyMany(unittest.TestCase):
+    def setUp(self):
+        self.store = bp_tracker.store_from_file(data_file)
+        self.store.append(250, 130, 60, 0)
+        self.store.append(180, 70, 60, 0)  # unified can't classify
+        self.store.append(0, 0, 0, 0)
+
+    def test_each_scheme(self):
+        for name in classify.SCHEMES:
+            scheme = classify.get(name)
+            codes, histogram = classify.classify_many(self.store, name)
+            self.assertEqual(len(codes), len(self.store))
+            self.assertEqual(sum(histogram.values()), len(self.store))
+            for code, reading in zip(codes, self.store):
+                values = [reading[i] for i in scheme.columns]
+                self.assertEqual(code, scheme.code(*values))
+
+    def test_histogram(self):
+        codes, histogram = classify.classify_many(self.store, "unified")
+        self.assertEqual(histogram[None], 1)
+        self.assertEqual(histogram["Hypertensive crisis"], 1)
+        self.assertEqual(list(histogram)[:5], list(classify.UNIFIED))
+
+    def test_labels(self):
+        scheme = classify.labels(bp_tracker.diastolic_labels, 1)
+        codes, histogram = classify.classify_many(self.store, scheme)
+        self.assertEqual(histogram["dead"], 1)
+        expected = [bp_tracker.get_label(d, bp_tracker.diastolic_labels)
+                    for d in self.store.diastolics]
+        self.assertEqual([scheme.name(code) for code in codes], expected)
+
+    def test_empty_store(self):
+        codes, histogram = classify.classify_many(ReadingStore(), "single")
+        self.assertEqual(len(codes), 0)
+        self.assertEqual(sum(histogram.values()), 0)
+
+    def test_format_distribution(self):
+        result = classify.format_distribution(
+            {"NORMAL": 1, "ELEVATED": 0, "STAGE 1 HYPERTENSION": 3}, "AHA")
+        self.assertEqual(result, "AHA (4 readings)\n"
+                                 "  25.0%  NORMAL\n"
+                                 "  75.0%  STAGE 1 HYPERTENSION\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
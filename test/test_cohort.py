@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# File test/test_cohort.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import bp_tracker
+import cohort
+import pipeline
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+
+
+class TestCohort(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        root = self.test_dir.name
+        os.mkdir(os.path.join(root, "sub"))
+        shutil.copy(os.path.join(data_dir, "bp_numbers.txt"),
+                    os.path.join(root, "alice.txt"))
+        shutil.copy(os.path.join(data_dir, "bad_data"),
+                    os.path.join(root, "sub", "bob.txt"))
+        with open(os.path.join(root, "notes.md"), "w") as f:
+            f.write("not a data file\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_discover(self):
+        found = cohort.discover(self.test_dir.name)
+        self.assertEqual([os.path.relpath(path, self.test_dir.name)
+                          for path in found],
+                         ["alice.txt", os.path.join("sub", "bob.txt")])
+
+    def test_summarize_file(self):
+        path = os.path.join(self.test_dir.name, "alice.txt")
+        args = bp_tracker.get_args(["-f", path, "-n", "5"])
+        summary = cohort.summarize_file(path, args)
+        expected = pipeline.stream_report(args)
+        self.assertEqual(summary["count"], 5)
+        self.assertEqual(summary["sums"], expected.sums)
+        self.assertEqual(summary["last"], expected.last)
+
+    def test_missing_file(self):
+        summary = cohort.summarize_file(
+            os.path.join(self.test_dir.name, "missing.txt"),
+            bp_tracker.get_args([]))
+        self.assertIn("error", summary)
+
+    def test_cohort_report(self):
+        summaries, totals = cohort.cohort_report(
+            self.test_dir.name, bp_tracker.get_args([]), workers=2)
+        self.assertEqual(len(summaries), 2)
+        self.assertEqual(totals["patients"], 2)
+        self.assertEqual(totals["count"], 27)
+        self.assertEqual(totals["invalid"], 6)
+        self.assertEqual(totals["maxima"][0],
+                         max(s["maxima"][0] for s in summaries))
+        report = cohort.format_cohort(self.test_dir.name, summaries, totals)
+        self.assertIn("Cohort: 2 patients, 27 readings", report)
+
+    def test_empty_directory(self):
+        with tempfile.TemporaryDirectory() as empty:
+            summaries, totals = cohort.cohort_report(
+                empty, bp_tracker.get_args([]))
+        self.assertEqual(summaries, [])
+        self.assertEqual(totals["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
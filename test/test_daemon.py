@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# File test/test_daemon.py
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+import bp_tracker
+import daemon
+import writer
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+QUERIES = (
+    [],
+    ["-t", "800", "1200"],
+    ["-r", "20220701", "20220705", "--stats"],
+    ["-d", "20220705", "-n", "3", "--categories"],
+    ["--by-time-of-day", "--trend", "7"],
+    ["-e"],
+)
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "bp.txt")
+        shutil.copy(data_file, self.data_file)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def in_process(self, argv):
+        args = bp_tracker.get_args(argv + ["-f", self.data_file])
+        invalid_lines = [] if args.error else None
+        report = bp_tracker.make_report(args, invalid_lines)
+        if invalid_lines is not None:
+            invalid_lines = [[line.number, line] for line in invalid_lines]
+        return dict(report=report, invalid_lines=invalid_lines)
+
+    def with_daemon(self, test):
+        async def run():
+            query_daemon = daemon.QueryDaemon(self.data_file)
+            await query_daemon.start()
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, test)
+            finally:
+                await query_daemon.stop()
+            return query_daemon
+
+        return asyncio.run(run())
+
+    def ask(self, argv):
+        return bp_tracker.ask_daemon(self.data_file,
+                                     argv + ["-f", self.data_file])
+
+    def test_no_daemon(self):
+        self.assertIsNone(self.ask([]))
+
+    def test_queries(self):
+        def test():
+            for argv in QUERIES:
+                self.assertEqual(self.ask(argv), self.in_process(argv))
+            self.assertEqual(self.ask(["-d", "20990101"]),
+                             dict(error="no data"))
+
+        query_daemon = self.with_daemon(test)
+        self.assertEqual(query_daemon.requests, len(QUERIES) + 1)
+        self.assertFalse(os.path.exists(query_daemon.socket_path))
+
+    def test_appends(self):
+        def test():
+            before = self.ask(["-n", "1"])
+            writer.append(self.data_file, "199 99 70 20990101.0700\n")
+            after = self.ask(["-n", "1"])
+            self.assertNotEqual(before, after)
+            self.assertIn("199", after["report"])
+            self.assertEqual(after, self.in_process(["-n", "1"]))
+
+        self.with_daemon(test)
+
+
+if __name__ == "__main__":
+    unittest.main()
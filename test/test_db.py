@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# File test/test_db.py
+
+import os
+import tempfile
+import unittest
+
+import bp_tracker
+import db
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+bad_file = os.path.join(os.path.dirname(__file__), "data", "bad_data")
+
+
+class TestDb(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.conn = db.connect(os.path.join(self.test_dir.name, "bp.sqlite"))
+        self.count = db.import_file(self.conn, data_file)
+
+    def tearDown(self):
+        self.conn.close()
+        self.test_dir.cleanup()
+
+    def test_schema(self):
+        mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        plan = " ".join(str(row) for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM readings "
+            "WHERE stamp BETWEEN 1 AND 2"))
+        self.assertIn("readings_stamp", plan)
+
+    def test_import(self):
+        store = bp_tracker.store_from_file(data_file)
+        self.assertEqual(self.count, len(store))
+        invalid_lines = []
+        db.import_file(self.conn, bad_file, invalid_lines)
+        expected = []
+        bp_tracker.store_from_file(bad_file, expected)
+        self.assertEqual(invalid_lines, expected)
+
+    def test_query(self):
+        store = bp_tracker.store_from_file(data_file)
+        for argv in ([], ["-t", "800", "1200"],
+                     ["-r", "20220701", "20220705"],
+                     ["-d", "20220705", "-n", "3"]):
+            args = bp_tracker.get_args(argv)
+            expected = bp_tracker.sort_by_index(
+                bp_tracker.filter_data(store, args), -1)
+            result = db.query(self.conn, args)
+            self.assertEqual(list(result), list(expected))
+            self.assertEqual(list(result.epochs), list(expected.epochs))
+        self.assertEqual(len(db.query(
+            self.conn, bp_tracker.get_args(["-d", "20990101"]))), 0)
+
+    def test_add(self):
+        db.add(self.conn, 120, 80, 60, 209901010700)
+        db.add(self.conn, 125, 85, 65, 0)
+        result = db.query(self.conn, bp_tracker.get_args(["-n", "1"]))
+        self.assertEqual(result[0], [120, 80, 60, "20990101.0700"])
+        self.assertEqual(len(db.query(self.conn, bp_tracker.get_args([]))),
+                         self.count + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+# File test/test_import.py
+
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import db
+import rollups
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+CSV = """systolic,diastolic,pulse,stamp
+120,80,60,20250101.0700
+121, 81, 61, 20250101.0800
+bad,1,2,3
+70000,1,1,0.0
+"""
+TEXT = """# from the gateway
+122 82 62 20250102.0700
+123 83 63 20250230.0700
+124 84 64 0.0
+"""
+
+
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "bp.txt")
+        shutil.copy(data_file, self.data_file)
+        self.source = os.path.join(self.test_dir.name, "upload.csv")
+        with open(self.source, "w") as f:
+            f.write(CSV)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def make_args(self, **kwargs):
+        args = dict(file=self.data_file, import_from=self.source, db=None)
+        args.update(kwargs)
+        return argparse.Namespace(**args)
+
+    def test_import_records(self):
+        rejected = []
+        readings = bp_tracker.import_records(io.StringIO(CSV + TEXT),
+                                             rejected)
+        self.assertEqual(readings, [(120, 80, 60, 202501010700),
+                                    (121, 81, 61, 202501010800),
+                                    (122, 82, 62, 202501020700),
+                                    (124, 84, 64, 0)])
+        self.assertEqual(rejected, ["bad,1,2,3", "70000,1,1,0.0",
+                                    "123 83 63 20250230.0700"])
+
+    def test_text_file(self):
+        before = len(bp_tracker.store_from_file(self.data_file))
+        rollups.Rollups(self.data_file).update()
+        rejected = []
+        self.assertEqual(bp_tracker.import_readings(self.make_args(),
+                                                    rejected), 2)
+        self.assertEqual(len(rejected), 2)
+        store = bp_tracker.store_from_file(self.data_file)
+        self.assertEqual(len(store), before + 2)
+        self.assertEqual(store[-1], [121, 81, 61, "20250101.0800"])
+        self.assertEqual(rollups.range_summary(
+            self.data_file, 20250101, 20250101).count, 2)
+
+    def test_binary_file(self):
+        binary_file = os.path.join(self.test_dir.name, "bp.bpt")
+        binfile.convert(bp_tracker.store_from_file(self.data_file),
+                        binary_file)
+        with open(self.source, "w") as f:
+            f.write(TEXT + "125 85 65 19600101.0700\n")
+        rejected = []
+        n = bp_tracker.import_readings(self.make_args(file=binary_file),
+                                       rejected)
+        self.assertEqual(n, 2)
+        self.assertEqual(rejected, ["123 83 63 20250230.0700",
+                                    "125 85 65 19600101.0700"])
+        with binfile.BinaryReadings(binary_file) as readings:
+            self.assertEqual(readings[-1], [124, 84, 64, 0])
+
+    def test_db(self):
+        path = os.path.join(self.test_dir.name, "bp.sqlite")
+        self.assertEqual(bp_tracker.import_readings(self.make_args(db=path)),
+                         2)
+        conn = db.connect(path)
+        result = db.query(conn, argparse.Namespace(
+            times=None, range=None, date=None, number=None))
+        conn.close()
+        self.assertEqual(list(result.systolics), [120, 121])
+
+
+if __name__ == "__main__":
+    unittest.main()
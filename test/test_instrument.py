@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# File test/test_instrument.py
+
+import io
+import json
+import unittest
+
+import instrument
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_disabled(self):
+        self.assertFalse(instrument.enabled())
+        with instrument.stage("nothing") as st:
+            st.count = 3
+        self.assertIs(instrument.stage("a"), instrument.stage("b"))
+        self.assertEqual(instrument.results(), [])
+
+    def test_stages(self):
+        instrument.enable()
+        with instrument.stage("outer") as outer:
+            with instrument.stage("inner") as inner:
+                data = [0] * 100000
+                inner.count = len(data)
+            del data
+            outer.count = 1
+        records = instrument.results()
+        self.assertEqual([r["stage"] for r in records], ["outer", "inner"])
+        self.assertEqual([r["depth"] for r in records], [0, 1])
+        self.assertEqual(records[1]["count"], 100000)
+        self.assertGreater(records[1]["peak_bytes"], 100000 * 8)
+        self.assertGreaterEqual(records[0]["peak_bytes"],
+                                records[1]["peak_bytes"])
+        self.assertGreaterEqual(records[0]["seconds"],
+                                records[1]["seconds"])
+
+    def test_without_memory(self):
+        instrument.enable(trace_memory=False)
+        with instrument.stage("timed"):
+            pass
+        self.assertNotIn("peak_bytes", instrument.results()[0])
+
+    def test_hooks(self):
+        seen = []
+        instrument.add_hook(seen.append)
+        try:
+            instrument.enable()
+            with instrument.stage("hooked"):
+                pass
+        finally:
+            instrument.remove_hook(seen.append)
+        self.assertEqual(seen[0]["stage"], "hooked")
+
+    def test_report(self):
+        instrument.enable()
+        with instrument.stage("reported") as st:
+            st.count = 7
+        stream = io.StringIO()
+        instrument.report("json", stream)
+        self.assertEqual(json.loads(stream.getvalue())[0]["count"], 7)
+        stream = io.StringIO()
+        instrument.report("table", stream)
+        self.assertIn("reported", stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# File test/test_lineparser.py
+
+import io
+import os
+import pickle
+import tempfile
+import unittest
+
+import bp_tracker
+import lineparser
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+
+TEXT = b"""# readings
+120 80 60 20220101.0700
+  121\t81 61 20220101.0800   \r
+122 82 62 0.0 # undated, after coffee
+123 83 63 20220101.0900#no space
+
+extranious 134 65 60 20220630.2300
+134 68 75 20220630.09
+70000 1 1 0.0
+-1 80 60 20220101.0700
+125 85 65 20220230.0700
+150 71 71
+"""
+
+
+class TestLineParser(unittest.TestCase):
+    def test_parse_line(self):
+        self.assertEqual(lineparser.parse_line("120 80 60 20220101.0700"),
+                         ((120, 80, 60, 202201010700),
+                          (20220101, 420, 27350340)))
+        self.assertEqual(lineparser.parse_line(b"1 2 3 0.0 # x\n")[0],
+                         (1, 2, 3, 0))
+        for line in ("", "# 120 80 60 0.0", "120 80 60", "120 80 60 0.1",
+                     "120 80 60 20220101.2400", "120 80 60 20220101.0700 x",
+                     "١٢٠ 80 60 0.0", "120 80 70 20220101.0800\nxx",
+                     b"120 80 70 20220101.0800\nxx"):
+            self.assertRaises(ValueError, lineparser.parse_line, line)
+
+    def test_valid_data(self):
+        invalid_lines = []
+        self.assertIsNone(bp_tracker.valid_data(
+            "120 80 70 20220101.0800\nxx", invalid_lines))
+        self.assertEqual(len(invalid_lines), 1)
+
+    def test_scan(self):
+        invalid_lines = []
+        readings = [values for values, _ in
+                    lineparser.scan(TEXT, invalid_lines, 11)]
+        self.assertEqual(readings, [(120, 80, 60, 202201010700),
+                                    (121, 81, 61, 202201010800),
+                                    (122, 82, 62, 0),
+                                    (123, 83, 63, 202201010900)])
+        self.assertEqual(invalid_lines, [
+            "extranious 134 65 60 20220630.2300", "134 68 75 20220630.09",
+            "70000 1 1 0.0", "-1 80 60 20220101.0700",
+            "125 85 65 20220230.0700", "150 71 71"])
+        self.assertEqual([line.number for line in invalid_lines],
+                         list(range(17, 23)))
+        self.assertEqual(lineparser.numbered(invalid_lines[-1]),
+                         "22: 150 71 71")
+        self.assertEqual(lineparser.numbered("150 71 71"), "150 71 71")
+        line = pickle.loads(pickle.dumps(invalid_lines[0]))
+        self.assertEqual((line, line.number), (invalid_lines[0], 17))
+
+    def test_chunks(self):
+        # Lines split across reads still come out whole and numbered.
+        for size in (1, 7, 64, lineparser.CHUNK):
+            invalid_lines = []
+            readings = list(lineparser.iter_readings(
+                io.BytesIO(TEXT + b"126 86 66 0.0"), invalid_lines, size))
+            self.assertEqual(len(readings), 5)
+            self.assertEqual([line.number for line in invalid_lines],
+                             list(range(7, 13)))
+
+    def test_split(self):
+        f = io.BytesIO(TEXT)
+        for parts in (1, 2, 3, 5, 100):
+            offsets = lineparser.split(f, 0, len(TEXT), parts)
+            self.assertEqual((offsets[0], offsets[-1]), (0, len(TEXT)))
+            self.assertEqual(offsets, sorted(set(offsets)))
+            self.assertLessEqual(len(offsets), parts + 1)
+            for offset in offsets[1:-1]:
+                self.assertEqual(TEXT[offset - 1:offset], b"\n")
+        self.assertEqual(lineparser.line_end(f, 0, len(TEXT) - 3),
+                         TEXT.rfind(b"\n", 0, len(TEXT) - 3) + 1)
+        self.assertEqual(lineparser.line_end(f, 0, 5), 0)
+
+    def test_parse_parallel(self):
+        # In order, and numbered as if parsed in one piece.
+        path = os.path.join(data_dir, "bp_numbers.txt")
+        with open(path, "rb") as f:
+            text = f.read()
+        with tempfile.TemporaryDirectory() as test_dir:
+            path = os.path.join(test_dir, "data.txt")
+            with open(path, "wb") as f:
+                f.write(text + TEXT + text + b"126 86 66 0.0")
+            expected_invalid = []
+            expected = lineparser.read_store(path, expected_invalid)
+            saved = lineparser.PARALLEL_MIN
+            lineparser.PARALLEL_MIN = 0
+            try:
+                for jobs in (1, 2, 3, 8):
+                    invalid_lines = []
+                    store = lineparser.read_store(path, invalid_lines,
+                                                  jobs=jobs)
+                    self.assertEqual(list(store), list(expected))
+                    self.assertEqual(invalid_lines, expected_invalid)
+                    self.assertEqual([line.number for line in invalid_lines],
+                                     [line.number
+                                      for line in expected_invalid])
+            finally:
+                lineparser.PARALLEL_MIN = saved
+
+    def test_data_files(self):
+        # The same readings and invalid lines as line by line parsing.
+        for name in ("bp_numbers.txt", "bad_data"):
+            path = os.path.join(data_dir, name)
+            expected_invalid, invalid_lines = [], []
+            expected = bp_tracker.array_from_file(path, expected_invalid)
+            store = lineparser.read_store(path, invalid_lines)
+            self.assertEqual(list(store), expected)
+            self.assertEqual(invalid_lines, expected_invalid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+# File test/test_parsecache.py
+
+import os
+import pickle
+import tempfile
+import unittest
+
+import bp_tracker
+import lineparser
+import parsecache
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "data.txt")
+        with open(self.data_file, "w") as f:
+            f.write("# A comment\n")
+            f.write("110 59 68 20220809.1640\n")
+            f.write("not a reading\n")
+            f.write("124 62 62 20220810.0840\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def append(self, text):
+        with open(self.data_file, "a") as f:
+            f.write(text)
+
+    def check(self):
+        invalid_lines, expected_invalid = [], []
+        found = parsecache.load(self.data_file, invalid_lines)
+        expected = bp_tracker.store_from_file(self.data_file,
+                                              expected_invalid)
+        self.assertEqual(list(found), list(expected))
+        self.assertEqual(invalid_lines, expected_invalid)
+        return found
+
+    def cached(self):
+        cache = parsecache.ParseCache(self.data_file)
+        cache.load()
+        return cache
+
+    def test_first_load(self):
+        self.assertEqual(len(self.check()), 2)
+        cache = self.cached()
+        self.assertEqual(cache.offset, os.path.getsize(self.data_file))
+        self.assertEqual(len(cache.store), 2)
+        self.assertFalse(cache.update())
+
+    def test_append(self):
+        self.check()
+        offset = self.cached().offset
+        self.append("134 63 57 20220812.0758\n")
+        self.assertEqual(len(self.check()), 3)
+        cache = self.cached()
+        self.assertGreater(cache.offset, offset)
+        self.assertEqual(len(cache.store), 3)
+
+    def test_partial_last_line(self):
+        self.check()
+        self.append("134 63 57 20220812.0758")
+        self.assertEqual(len(self.check()), 3)
+        self.assertEqual(len(self.cached().store), 2)
+        self.append("\n100 59 62 20220812.1323\n")
+        self.assertEqual(len(self.check()), 4)
+
+    def test_truncation(self):
+        self.check()
+        with open(self.data_file, "w") as f:
+            f.write("100 59 62 20220812.1323\n")
+        self.assertEqual(len(self.check()), 1)
+
+    def test_edit(self):
+        self.check()
+        with open(self.data_file, "r+") as f:
+            f.seek(len("# A comment\n"))
+            f.write("210")  # same size, different content
+        found = self.check()
+        self.assertEqual(found[0][0], 210)
+
+    def test_replaced(self):
+        self.check()
+        os.remove(self.data_file)
+        with open(self.data_file, "w") as f:
+            f.write("100 59 62 20220812.1323\n" * 5)
+        self.assertEqual(len(self.check()), 5)
+
+    def test_corrupt_cache(self):
+        # Whatever is in the sidecar, it's rebuilt rather than trusted.
+        self.check()
+        cache_file = self.data_file + parsecache.SUFFIX
+        with open(cache_file, "rb") as f:
+            saved = f.read()
+        self.assertTrue(saved.startswith(b"{"))
+        for text in (b"", b"garbage", saved[:len(saved) // 2],
+                     saved[:saved.index(b"\n")] + b"\n",
+                     b"[1, 2]\n", b'{"arrays": [["x", 1, 1]]}\n',
+                     pickle.dumps(dict(version=parsecache.VERSION))):
+            with open(cache_file, "wb") as f:
+                f.write(text)
+            self.assertEqual(len(self.check()), 2)
+            self.assertEqual(len(self.cached().store), 2)
+
+    def test_replace_file(self):
+        # Replaced by renaming: an open reader keeps the old file and
+        # a failed write leaves it as it was.
+        self.check()
+        cache_file = self.data_file + parsecache.SUFFIX
+        with open(cache_file, "rb") as reader:
+            saved = reader.read()
+
+            def fail(f):
+                f.write(b"half")
+                raise OSError("disk full")
+
+            parsecache.replace_file(cache_file, fail)
+            with open(cache_file, "rb") as f:
+                self.assertEqual(f.read(), saved)
+            parsecache.replace_file(cache_file, lambda f: f.write(b"new"))
+            reader.seek(0)
+            self.assertEqual(reader.read(), saved)
+        with open(cache_file, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+        self.assertEqual(sorted(os.listdir(self.test_dir.name)),
+                         ["data.txt", "data.txt" + parsecache.SUFFIX])
+
+    def test_jobs(self):
+        saved = lineparser.PARALLEL_MIN
+        lineparser.PARALLEL_MIN = 0
+        try:
+            cache = self.cached()
+            self.assertTrue(cache.update(jobs=2))
+            self.append("not a reading either\n134 63 57 20220812.0758\n"
+                        "100 59 62 20220812.1323")
+            self.assertTrue(cache.update(jobs=3))
+        finally:
+            lineparser.PARALLEL_MIN = saved
+        self.assertEqual(len(cache.store), 3)
+        self.assertEqual([line.number for line in cache.invalid_lines],
+                         [3, 5])
+        self.assertEqual(cache.lines, 6)
+        self.assertEqual(len(self.check()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# File test/test_pipeline.py
+
+import os
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import pipeline
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+
+def in_memory_report(args):
+    data = bp_tracker.filter_data(bp_tracker.store_from_file(args.file), args)
+    data = bp_tracker.sort_by_index(data, -1)
+    return bp_tracker.format_report(data.systolics, data.diastolics)
+
+
+class TestPipeline(unittest.TestCase):
+    def test_iter_readings(self):
+        invalid_lines = []
+        readings = list(pipeline.iter_readings(data_file, invalid_lines))
+        expected = bp_tracker.store_from_file(data_file)
+        self.assertEqual(readings, list(zip(*expected.columns)))
+
+    def test_iter_binary_readings(self):
+        with tempfile.TemporaryDirectory() as test_dir:
+            binary_file = os.path.join(test_dir, "data.bpt")
+            expected = bp_tracker.store_from_file(data_file)
+            binfile.convert(expected, binary_file)
+            self.assertEqual(list(pipeline.iter_readings(binary_file)),
+                             list(zip(*expected.columns)))
+
+    def test_summary(self):
+        summary = pipeline.summarize([
+            (120, 80, 60, 202209141407),
+            (130, 70, 70, 202209151407),
+            (140, 60, 80, 202209141408),
+            (150, 90, 60, 202209151407),
+        ])
+        self.assertEqual(summary.count, 4)
+        self.assertEqual(summary.average(0), 135)
+        self.assertEqual(summary.last, (150, 90, 60, 202209151407))
+
+    def test_last_readings(self):
+        self.assertEqual(list(pipeline.last_readings(range(10), 3)),
+                         [7, 8, 9])
+
+    def test_same_as_in_memory(self):
+        for argv in (
+            [],
+            ["-n", "5"],
+            ["-n", "0"],
+            ["-t", "800", "1200"],
+            ["-r", "20220701", "20220705", "-n", "2"],
+            ["-d", "20220705"],
+        ):
+            args = bp_tracker.get_args(["-f", data_file] + argv)
+            summary = pipeline.stream_report(args)
+            self.assertEqual(bp_tracker.format_report(summary),
+                             in_memory_report(args))
+
+    def test_nothing_to_report(self):
+        summary = pipeline.stream_report(
+            bp_tracker.get_args(["-f", data_file, "-d", "20990101"]))
+        self.assertEqual(summary.count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
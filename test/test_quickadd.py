@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# File test/test_quickadd.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import quickadd
+import rollups
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestQuickAdd(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "data.txt")
+        with open(self.data_file, "w") as f:
+            f.write("120 65 55 20220914.1407\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_constants(self):
+        self.assertEqual(quickadd.BINARY_MAGIC, binfile.MAGIC)
+        self.assertEqual(quickadd.ROLLUP_SUFFIX, rollups.SUFFIX)
+
+    def test_add(self):
+        args = quickadd.quick_args(["-f", self.data_file,
+                                    "-a", "130", "70", "60"])
+        self.assertTrue(quickadd.add(args))
+        store = bp_tracker.store_from_file(self.data_file)
+        self.assertEqual(store[-1][:3], [130, 70, 60])
+
+    def test_left_to_tracker(self):
+        binary_file = os.path.join(self.test_dir.name, "data.bpt")
+        binfile.convert(bp_tracker.store_from_file(self.data_file),
+                        binary_file)
+        with_rollups = os.path.join(self.test_dir.name, "rolled.txt")
+        with open(with_rollups, "w") as f:
+            f.write("120 65 55 20220914.1407\n")
+        rollups.Rollups(with_rollups).update()
+        missing_dir = os.path.join(self.test_dir.name, "no", "data.txt")
+        for path in (binary_file, with_rollups, missing_dir):
+            size = os.path.getsize(path) if os.path.exists(path) else None
+            args = quickadd.quick_args(["-f", path, "-a", "130", "70", "60"])
+            self.assertFalse(quickadd.add(args))
+            self.assertEqual(
+                os.path.getsize(path) if os.path.exists(path) else None,
+                size)
+
+    def test_imports(self):
+        # Adding a reading imports next to nothing beyond what
+        # starting Python does.
+        code = ("import sys\n"
+                "if sys.argv[1:]:\n"
+                "    import quickadd\n"
+                "    try:\n"
+                "        quickadd.main(sys.argv[1:])\n"
+                "    except SystemExit:\n"
+                "        pass\n"
+                "print(*sys.modules)\n")
+        loaded = []
+        for argv in ([], ["-f", self.data_file, "-a", "130", "70", "60"]):
+            loaded.append(set(subprocess.run(
+                [sys.executable, "-c", code] + argv, cwd=root,
+                stdout=subprocess.PIPE, text=True,
+                check=True).stdout.split()))
+        self.assertLessEqual(loaded[1] - loaded[0],
+                             {"quickadd", "writer", "fcntl", "time"})
+
+    def test_script(self):
+        binary_file = os.path.join(self.test_dir.name, "data.bpt")
+        binfile.convert(bp_tracker.store_from_file(self.data_file),
+                        binary_file)
+        for path in (self.data_file, binary_file):
+            subprocess.run([sys.executable,
+                            os.path.join(root, "bp_tracker.py"),
+                            "-f", path, "-a", "130", "70", "60"],
+                           check=True)
+            if binfile.is_binary(path):
+                store = binfile.read_store(path)
+            else:
+                store = bp_tracker.store_from_file(path)
+            self.assertEqual(store[-1][:3], [130, 70, 60])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# File test/test_rolling.py
+
+import argparse
+import os
+import unittest
+
+import bp_tracker
+import rolling
+from store import ReadingStore, UNDATED
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+
+class TestRolling(unittest.TestCase):
+    def setUp(self):
+        self.store = bp_tracker.sort_by_index(
+            bp_tracker.store_from_file(data_file), -1)
+
+    def brute_force(self, date, days):
+        """Means of the readings in the <days> days up to <date>."""
+        i = list(self.store.dates).index(date)
+        day = self.store.epochs[i] // rolling.DAY
+        window = [r for r, epoch in zip(self.store, self.store.epochs)
+                  if epoch != UNDATED
+                  and day - days < epoch // rolling.DAY <= day]
+        return len(window), [sum(r[i] for r in window) / len(window)
+                             for i in range(3)]
+
+    def test_trend(self):
+        points = list(rolling.trend(self.store, (1, 7, 30)))
+        dates = [date for date in self.store.dates if date != UNDATED]
+        self.assertEqual([date for date, _ in points], sorted(set(dates)))
+        for date, values in points:
+            for days, (count, means) in zip((1, 7, 30), values):
+                expected_count, expected = self.brute_force(date, days)
+                self.assertEqual(count, expected_count)
+                for mean, value in zip(means, expected):
+                    self.assertAlmostEqual(mean, value)
+
+    def test_range(self):
+        dates = sorted(set(self.store.dates) - {UNDATED})
+        begin, end = dates[3], dates[6]
+        points = list(rolling.trend(self.store, (7,), begin, end))
+        self.assertEqual([date for date, _ in points], dates[3:7])
+        self.assertEqual(list(rolling.trend(ReadingStore())), [])
+
+    def test_widen(self):
+        args = argparse.Namespace(times=None, range=[20220301, 20220310],
+                                  date=[20230101], number=[5])
+        widened = rolling.widen(args, 30)
+        self.assertEqual(widened.range, [20220130, 20220310])
+        self.assertEqual(widened.date, [20221202])
+        self.assertIsNone(widened.number)
+        self.assertEqual(args.number, [5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+# File test/test_rollups.py
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import classify
+import rollups
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+
+
+class TestRollups(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "bp.txt")
+        shutil.copy(os.path.join(data_dir, "bp_numbers.txt"),
+                    self.data_file)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def expected(self, args, path=None):
+        path = path or self.data_file
+        if binfile.is_binary(path):
+            data = binfile.read_store(path)
+        else:
+            data = bp_tracker.store_from_file(path)
+        data = bp_tracker.filter_data(data, args)
+        data = bp_tracker.sort_by_index(data, -1)
+        report = bp_tracker.format_report(data.systolics, data.diastolics)
+        return report, classify.classify_many(data, rollups.SCHEME)[1]
+
+    def check(self, begin, end, path=None):
+        total = rollups.range_summary(path or self.data_file, begin, end)
+        report, histogram = self.expected(
+            bp_tracker.get_args(["-r", str(begin), str(end)]), path)
+        self.assertEqual(bp_tracker.format_report(total.summary()), report)
+        names = classify.get(rollups.SCHEME).names
+        self.assertEqual(total.histogram(names), histogram)
+
+    def test_ranges(self):
+        for begin, end in ((20220701, 20220731), (20220601, 20220710),
+                           (20220703, 20220705), (0, 99999999)):
+            self.check(begin, end)
+
+    def test_months(self):
+        totals = rollups.Rollups(self.data_file)
+        totals.update()
+        self.assertTrue(totals.exists())
+        store = bp_tracker.store_from_file(self.data_file)
+        for month in totals.months.keys:
+            self.assertEqual(totals.months.get(month).count,
+                             sum(1 for date in store.dates
+                                 if date // 100 == month))
+        self.assertIsNone(totals.months.get(199912))
+
+    def test_whole_months(self):
+        # June has 30 days: -r 20220601 20220630 covers all of it.
+        totals = rollups.Rollups(self.data_file)
+        totals.update()
+        edges = []
+        read_days = totals._read_days
+        totals._read_days = lambda e: edges.append(e) or read_days(e)
+        self.assertEqual(totals.total(20220601, 20220630).count, 7)
+        self.assertEqual(edges, [])
+        self.assertEqual(totals.total(20220602, 20220630).count, 7)
+        self.assertEqual(edges, [[(20220602, 20220630)]])
+
+    def test_incremental(self):
+        totals = rollups.Rollups(self.data_file)
+        totals.update()
+        scanned = totals.scanned
+        with open(self.data_file, "a") as f:
+            f.write("150 95 70 20220801.0700\n150 95 70 2022")
+        totals = rollups.Rollups(self.data_file)
+        totals.update()
+        self.assertEqual(totals.scanned, scanned + 24)
+        self.assertEqual(totals.months.get(202208).last,
+                         (150, 95, 70, 202208010700))
+        self.check(20220701, 20220831)
+
+    def test_partial_last_line(self):
+        with open(self.data_file, "a") as f:
+            f.write("120 80 70 20220801.0900\n180 100 70 20220802.0900")
+        self.check(20220801, 20220831)
+        self.check(20220701, 20220802)
+        totals = rollups.Rollups(self.data_file)
+        totals.load()
+        self.assertEqual(totals.months.get(202208).count, 1)  # not saved
+        with open(self.data_file, "a") as f:
+            f.write("\n")
+        self.check(20220801, 20220831)
+
+    def test_grown_since_update(self):
+        # The days at either end are read from the file: only as far
+        # as was rolled up, like the whole months.
+        totals = rollups.Rollups(self.data_file)
+        totals.update()
+        count = totals.total(20220702, 20220705).count
+        with open(self.data_file, "a") as f:
+            f.write("150 95 70 20220703.0700\n")
+        self.assertEqual(totals.total(20220702, 20220705).count, count)
+        self.assertEqual(rollups.range_summary(
+            self.data_file, 20220702, 20220705).count, count + 1)
+
+    def test_late_reading(self):
+        rollups.Rollups(self.data_file).update()
+        with open(self.data_file, "a") as f:
+            f.write("150 95 70 20220702.0700\n")  # entered late
+        self.check(20220701, 20220705)
+        self.check(20220601, 20220731)
+
+    def test_rebuilt_when_shrunk(self):
+        rollups.Rollups(self.data_file).update()
+        with open(self.data_file, "w") as f:
+            f.write("120 80 60 20220801.0700\n")
+        total = rollups.range_summary(self.data_file, 20220101, 20221231)
+        self.assertEqual(total.count, 1)
+
+    def test_rebuilt_when_edited(self):
+        # Edited in place (the same size, or a line deleted) and then
+        # appended to: what was rolled up no longer matches the file.
+        edits = ((b"134 68 75 20220630.0929", b"199 99 75 20220801.0929"),
+                 (b"150 71 71 20220707.1143\n", b""))
+        for old, new in edits:
+            self.check(20220601, 20220831)
+            with open(self.data_file, "rb") as f:
+                text = f.read()
+            with open(self.data_file, "wb") as f:
+                f.write(text.replace(old, new))
+            with open(self.data_file, "a") as f:
+                f.write("130 80 60 20220802.0700\n")
+            self.check(20220601, 20220831)
+            self.check(20220801, 20220831)
+
+    def test_corrupt_sidecar(self):
+        rollups.Rollups(self.data_file).update()
+        rollup_file = self.data_file + rollups.SUFFIX
+        with open(rollup_file, "rb") as f:
+            saved = f.read()
+        for text in (b"garbage", saved[:len(saved) // 2],
+                     pickle.dumps(dict(version=rollups.VERSION))):
+            with open(rollup_file, "wb") as f:
+                f.write(text)
+            self.check(20220601, 20220831)
+
+    def test_binary(self):
+        binary_file = os.path.join(self.test_dir.name, "bp.bpt")
+        binfile.convert(bp_tracker.store_from_file(self.data_file),
+                        binary_file)
+        self.check(20220601, 20220710, binary_file)
+        binfile.append(binary_file, 150, 95, 70, 202208010700)
+        self.check(20220701, 20220831, binary_file)
+
+    def test_answers(self):
+        args = bp_tracker.get_args(["-r", "20220101", "20221231"])
+        self.assertTrue(rollups.answers(args))
+        args.categories = "unified"
+        self.assertFalse(rollups.answers(args))
+        args.categories, args.number = "single", [5]
+        self.assertFalse(rollups.answers(args))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# File test/test_server.py
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import server
+import store
+
+
+async def send(lines, path=None, port=None):
+    """Sends <lines> as a client would, returning the replies."""
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("".join(line + "\n" for line in lines).encode())
+    await writer.drain()
+    writer.write_eof()
+    replies = (await reader.read()).decode().split()
+    writer.close()
+    return replies
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "bp.txt")
+        self.socket = os.path.join(self.test_dir.name, "bp.sock")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_server(self, clients, **kwargs):
+        async def run():
+            ingest = server.IngestServer(self.data_file, **kwargs)
+            await ingest.start(self.socket, 0)
+            port = ingest.ports()[0]
+            replies = await asyncio.gather(*(client(self.socket, port)
+                                             for client in clients))
+            await ingest.stop()
+            return ingest, replies
+
+        return asyncio.run(run())
+
+    def test_ingest(self):
+        lines = ["120 80 60 20250101.0700", "bad", "121,81,61,20250101.0800",
+                 "122 82 62 20250230.0700"]
+        ingest, replies = self.run_server([
+            lambda path, port: send(lines, path=path),
+            lambda path, port: send(["123 83 63 0.0"], port=port)])
+        self.assertEqual(replies, [["ok", "rejected", "ok", "rejected"],
+                                   ["ok"]])
+        self.assertEqual((ingest.accepted, ingest.rejected, ingest.written),
+                         (3, 2, 3))
+        store = bp_tracker.store_from_file(self.data_file)
+        self.assertEqual(sorted(store.systolics), [120, 121, 123])
+
+    def test_backpressure(self):
+        # A queue of 2 and batches of 1: clients wait for the writer,
+        # and nothing queued is lost when the server stops.
+        lines = ["{} 80 60 20250101.{:04d}".format(100 + i, i)
+                 for i in range(50)]
+        ingest, replies = self.run_server(
+            [lambda path, port: send(lines, path=path)] * 4,
+            queue_size=2, batch=1, interval=0)
+        self.assertEqual(replies, [["ok"] * 50] * 4)
+        self.assertEqual(ingest.written, 200)
+        self.assertEqual(ingest.flushes, 200)
+        store = bp_tracker.store_from_file(self.data_file)
+        self.assertEqual(len(store), 200)
+
+    def test_write_failure(self):
+        self.data_file = os.path.join(self.test_dir.name, "missing", "bp.txt")
+        ingest, replies = self.run_server(
+            [lambda path, port: send(["120 80 60 0.0"], path=path)])
+        self.assertEqual(replies, [["ok"]])
+        self.assertEqual((ingest.written, ingest.failed), (0, 1))
+
+    def test_unstorable(self):
+        # Valid readings which a binary file can't hold (dated before
+        # the epoch) count as failed.
+        binfile.write_store(store.ReadingStore(), self.data_file)
+        ingest, replies = self.run_server(
+            [lambda path, port: send(["120 80 60 19691231.2359",
+                                      "121 81 61 20250101.0700"], path=path)])
+        self.assertEqual(replies, [["ok", "ok"]])
+        self.assertEqual((ingest.written, ingest.failed), (1, 1))
+
+    def test_unexpected_failure(self):
+        # The writer carries on and stop() doesn't wait forever.
+        def store_readings(*args):
+            raise RuntimeError("unexpected")
+
+        async def run():
+            ingest = server.IngestServer(self.data_file, batch=1,
+                                         interval=0)
+            await ingest.start(self.socket)
+            replies = await send(["120 80 60 0.0", "121 81 61 0.0"],
+                                 path=self.socket)
+            await asyncio.wait_for(ingest.stop(), 5)
+            return ingest, replies
+
+        saved = bp_tracker.store_readings
+        bp_tracker.store_readings = store_readings
+        try:
+            ingest, replies = asyncio.run(run())
+        finally:
+            bp_tracker.store_readings = saved
+        self.assertEqual(replies, ["ok", "ok"])
+        self.assertEqual((ingest.written, ingest.failed), (0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# File test/test_stampindex.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import binfile
+import bp_tracker
+import stampindex
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+
+
+class TestStampIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.text_file = os.path.join(self.test_dir.name, "data.txt")
+        shutil.copy(os.path.join(data_dir, "bp_numbers.txt"), self.text_file)
+        with open(self.text_file, "a") as f:
+            f.write("117 64 64 20220701.1802\n")  # entered late
+            f.write("120 70 70 0.0\n")
+            f.write("121 71 71 20220801.0900\n")
+        self.binary_file = os.path.join(self.test_dir.name, "data.bpt")
+        binfile.convert(bp_tracker.store_from_file(self.text_file),
+                        self.binary_file)
+        self.addCleanup(setattr, stampindex, "SMALL", stampindex.SMALL)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def check(self, path, args):
+        everything = bp_tracker.store_from_file(self.text_file)
+        expected = list(bp_tracker.filter_data(everything, args))
+        for share in (0, 1):  # through the parse cache, the index
+            stampindex.SMALL = share
+            found = bp_tracker.filter_data(bp_tracker.load_data(args), args)
+            self.assertEqual(list(found), expected)
+
+    def test_ranges(self):
+        for path in (self.text_file, self.binary_file):
+            for argv in (
+                ["-r", "20220630", "20220630"],
+                ["-r", "20220701", "20220704"],
+                ["-r", "20220705", "20220731"],
+                ["-r", "20220101", "20221231"],
+                ["-d", "20220701"],
+                ["-d", "20220801"],
+                ["-r", "20220601", "20220715", "-d", "20220703"],
+            ):
+                self.check(path, bp_tracker.get_args(["-f", path] + argv))
+
+    def test_empty_range(self):
+        args = bp_tracker.get_args(["-f", self.text_file,
+                                    "-r", "20230101", "20230131"])
+        self.assertRaises(bp_tracker.NoValidData, bp_tracker.filter_data,
+                          bp_tracker.load_data(args), args)
+
+    def test_small_share(self):
+        self.assertIsNotNone(stampindex.read_dates(
+            self.text_file, 20220630, 20220630, most=0.5))
+        self.assertIsNone(stampindex.read_dates(
+            self.text_file, 20220101, 20221231, most=0.5))
+        self.assertIsNotNone(stampindex.read_dates(
+            self.binary_file, 20220101, 20221231, most=0))
+        stampindex.SMALL = 0.5
+        args = bp_tracker.get_args(["-f", self.text_file,
+                                    "-r", "20220101", "20221231"])
+        self.assertFalse(os.path.exists(self.text_file + ".cache"))
+        bp_tracker.load_data(args)
+        self.assertTrue(os.path.exists(self.text_file + ".cache"))
+
+    def test_incremental_update(self):
+        index = stampindex.StampIndex(self.text_file)
+        index.update()
+        self.assertTrue(os.path.exists(self.text_file + stampindex.SUFFIX))
+        self.assertEqual(len(index.stragglers), 1)
+        scanned = index.scanned
+        with open(self.text_file, "a") as f:
+            f.write("130 80 60 20220802.0700\n")
+        index = stampindex.StampIndex(self.text_file)
+        index.load()
+        self.assertEqual(index.scanned, scanned)
+        index.update()
+        self.assertEqual(index.dates[-1], 20220802)
+        self.assertEqual(index.offsets[-1], scanned)
+
+    def test_truncated_file(self):
+        stampindex.StampIndex(self.text_file).update()
+        with open(self.text_file, "w") as f:
+            f.write("130 80 60 20220802.0700\n")
+        data = stampindex.read_dates(self.text_file, 20220801, 20220831)
+        self.assertEqual(len(data), 1)
+
+    def test_edited_file(self):
+        # Edited in place (the same size, or a line deleted) and then
+        # appended to: the saved offsets no longer apply.
+        args = bp_tracker.get_args(["-f", self.text_file,
+                                    "-r", "20220801", "20220831"])
+        for edit in (lambda text: text.replace(b"134 68 75 20220630.0929",
+                                               b"199 99 75 20220801.0929"),
+                     lambda text: text.replace(b"120 70 70 0.0\n", b"")):
+            self.check(self.text_file, args)
+            with open(self.text_file, "rb") as f:
+                text = f.read()
+            with open(self.text_file, "wb") as f:
+                f.write(edit(text))
+            with open(self.text_file, "a") as f:
+                f.write("130 80 60 20220802.0700\n")
+            self.check(self.text_file, args)
+
+
+if __name__ == "__main__":
+    unittest.main()
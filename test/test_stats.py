@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+# File test/test_stats.py
+
+import json
+import os
+import statistics
+import unittest
+
+import bp_tracker
+import pipeline
+import stats
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.store = bp_tracker.store_from_file(data_file)
+
+    def test_column_stats(self):
+        values = [155, 165, 120, 130, 140]
+        result = stats.column_stats(values, percentiles=(25, 90))
+        self.assertEqual(result["count"], 5)
+        self.assertAlmostEqual(result["mean"], statistics.mean(values))
+        self.assertAlmostEqual(result["std"], statistics.pstdev(values))
+        self.assertEqual(result["median"], 140)
+        self.assertEqual(result["min"], 120)
+        self.assertEqual(result["max"], 165)
+        self.assertEqual(result["p25"], 130)
+        self.assertAlmostEqual(result["p90"], 161)
+
+    def test_single_value(self):
+        result = stats.column_stats([120])
+        self.assertEqual(result["std"], 0)
+        self.assertEqual(result["p90"], 120)
+
+    def test_describe(self):
+        result = stats.describe(self.store)
+        self.assertEqual(set(result), set(stats.COLUMNS))
+        systolics = list(self.store.systolics)
+        self.assertAlmostEqual(result["systolic"]["mean"],
+                               statistics.mean(systolics))
+        self.assertAlmostEqual(result["systolic"]["median"],
+                               statistics.median(systolics))
+        pressures = [s - d for s, d in zip(self.store.systolics,
+                                           self.store.diastolics)]
+        self.assertAlmostEqual(result["pulse pressure"]["std"],
+                               statistics.pstdev(pressures))
+        self.assertEqual(result["pulse"]["max"], max(self.store.pulses))
+
+    def test_format_report(self):
+        result = bp_tracker.format_report(
+            self.store.systolics, self.store.diastolics,
+            stats.describe(self.store))
+        lines = result.split("\n")
+        self.assertTrue(lines[4].startswith("Statistics (26 readings)"))
+        self.assertTrue(lines[6].startswith("systolic"))
+
+
+class TestRunningStats(unittest.TestCase):
+    def setUp(self):
+        self.store = bp_tracker.store_from_file(data_file)
+        self.readings = list(zip(*self.store.columns[:3]))
+
+    def check(self, running, readings):
+        self.assertEqual(running.count, len(readings))
+        for i in range(3):
+            values = [r[i] for r in readings]
+            self.assertEqual(running.sums[i], sum(values))
+            self.assertEqual(running.average(i), bp_tracker.average(values))
+            self.assertAlmostEqual(running.means[i], statistics.mean(values))
+            self.assertAlmostEqual(running.std(i), statistics.pstdev(values))
+            self.assertEqual(running.minima[i], min(values))
+            self.assertEqual(running.maxima[i], max(values))
+
+    def test_add(self):
+        running = stats.RunningStats()
+        for reading in self.readings:
+            running.add(reading)
+        self.check(running, self.readings)
+
+    def test_update(self):
+        running = stats.RunningStats()
+        running.update(self.store.columns[:3])
+        self.check(running, self.readings)
+
+    def test_merge(self):
+        for split in (0, 1, 10, len(self.readings)):
+            first, second = stats.RunningStats(), stats.RunningStats()
+            for reading in self.readings[:split]:
+                first.add(reading)
+            second.update([column[split:]
+                           for column in self.store.columns[:3]])
+            first.merge(second)
+            self.check(first, self.readings)
+
+    def test_dict(self):
+        running = stats.RunningStats()
+        running.update(self.store.columns[:3])
+        saved = json.loads(json.dumps(running.to_dict()))
+        copy = stats.RunningStats.from_dict(saved)
+        self.check(copy, self.readings)
+        copy.add((120, 80, 60))
+        self.assertEqual(running.count, len(self.readings))
+
+    def test_format_report(self):
+        ordered = bp_tracker.sort_by_index(self.store, -1)
+        running = pipeline.summarize(zip(*self.store.columns))
+        self.assertEqual(
+            bp_tracker.format_report(running),
+            bp_tracker.format_report(ordered.systolics, ordered.diastolics))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# File test/test_store.py
+
+import os
+import tempfile
+import unittest
+
+import bp_tracker
+import store
+
+
+class TestReadingStore(unittest.TestCase):
+    def setUp(self):
+        self.lines = [
+            "110 59 68 20220809.1640",
+            "124 62 62 20220810.0840",
+            "176 92 76 0.0",
+            "134 63 57 20220812.0758",
+            "134 62 57 20220812.1128",
+            "100 59 62 20220812.1323",
+        ]
+        self.store = store.ReadingStore.from_lines(self.lines)
+
+    def test_stamp2int(self):
+        self.assertEqual(store.stamp2int("20220809.1640"), 202208091640)
+        self.assertEqual(store.stamp2int("0.0"), 0)
+        self.assertRaises(ValueError, store.stamp2int, "yesterday")
+
+    def test_int2stamp(self):
+        for stamp in ("20220809.1640", "20220810.0840", "0.0"):
+            self.assertEqual(store.int2stamp(store.stamp2int(stamp)),
+                             stamp)
+
+    def test_from_lines(self):
+        self.assertEqual(len(self.store), 6)
+        self.assertEqual(self.store[0], [110, 59, 68, "20220809.1640"])
+        self.assertEqual(list(self.store.systolics),
+                         [110, 124, 176, 134, 134, 100])
+
+    def test_from_lines_invalid(self):
+        invalid_lines = []
+        lines = ["120 65 55 20220914.1407", "120 65 55",
+                 "-1 65 55 20220914.1407", "120 65 55 now",
+                 "120 65 55 20220230.1407", "120 65 55 20220914.1460"]
+        result = store.ReadingStore.from_lines(lines, invalid_lines)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(invalid_lines, lines[1:])
+        for column in result.columns + result.times:
+            self.assertEqual(len(column), 1)
+
+    def test_decoded_times(self):
+        self.assertEqual(store.decode_stamp("0.0"), (store.UNDATED,) * 3)
+        self.assertEqual(store.decode_stamp(197001020001),
+                         (19700102, 1, 1441))
+        self.assertEqual(list(self.store.dates),
+                         [20220809, 20220810, store.UNDATED,
+                          20220812, 20220812, 20220812])
+        self.assertEqual(list(self.store.minutes),
+                         [1000, 520, store.UNDATED, 478, 688, 803])
+        self.assertEqual(self.store.epochs[0],
+                         store.int2minutes(self.store.stamps[0]))
+        tail = self.store.tail(4).take([1, 0])
+        self.assertEqual(list(tail.dates), [20220812, store.UNDATED])
+
+    def test_matches_array_from_file(self):
+        with tempfile.TemporaryDirectory() as test_dir:
+            report_file = os.path.join(test_dir, "data.txt")
+            with open(report_file, "w") as f:
+                f.write("# comment\n" + "\n".join(self.lines) + "\n")
+            self.assertEqual(
+                list(bp_tracker.store_from_file(report_file)),
+                bp_tracker.array_from_file(report_file))
+
+    def test_take_and_tail(self):
+        self.assertEqual(list(self.store.take([5, 0])),
+                         [self.store[5], self.store[0]])
+        self.assertEqual(list(self.store.tail(2)), list(self.store)[-2:])
+        self.assertEqual(len(self.store.tail(100)), 6)
+
+    def test_sort_by_index(self):
+        result = bp_tracker.sort_by_index(self.store, -1)
+        self.assertEqual(list(result),
+                         bp_tracker.sort_by_index(list(self.store), -1))
+
+    def test_list_from_index(self):
+        self.assertIs(bp_tracker.list_from_index(self.store, 1),
+                      self.store.diastolics)
+
+    def test_filter_store(self):
+        data = self.store
+        get_args = bp_tracker.get_args
+        result = bp_tracker.filter_data(data, get_args(["-n", "2"]))
+        self.assertEqual(list(result), list(data)[-2:])
+        result = bp_tracker.filter_data(
+            data, get_args(["-r", "20220810", "20220811"]))
+        self.assertEqual(list(result), [data[1]])
+        result = bp_tracker.filter_data(data, get_args(["-t", "800", "1200"]))
+        self.assertEqual(list(result), [data[1], data[4]])
+        result = bp_tracker.filter_data(
+            data, get_args(["-d", "20220812", "-n", "1"]))
+        self.assertEqual(list(result), [data[5]])
+        self.assertRaises(bp_tracker.NoValidData, bp_tracker.filter_data,
+                          data, get_args(["-d", "20230101"]))
+
+    def test_filter_store_matches_list(self):
+        for argv in (["-t", "800", "1200"], ["-t", "758", "1199"],
+                     ["-r", "20220810", "20220812"],
+                     ["-d", "20220810", "-n", "2"]):
+            args = bp_tracker.get_args(argv)
+            self.assertEqual(
+                list(bp_tracker.filter_data(self.store, args)),
+                bp_tracker.filter_data(list(self.store), args))
+
+    def test_format_report(self):
+        self.assertEqual(
+            bp_tracker.format_report(self.store.systolics,
+                                     self.store.diastolics),
+            bp_tracker.format_report(list(self.store.systolics),
+                                     list(self.store.diastolics)))
+
+    @unittest.skipIf(store.numpy is None, "NumPy not installed")
+    def test_as_numpy(self):
+        systolics = self.store.as_numpy()[store.SYSTOLIC]
+        self.assertEqual(systolics.tolist(), list(self.store.systolics))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+# File test/test_tail.py
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import bp_tracker
+import tail
+
+data_dir = os.path.join(os.path.dirname(__file__), "data")
+
+
+class CountingReader(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class TestTail(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.test_dir.name, "data.txt")
+        shutil.copy(os.path.join(data_dir, "bp_numbers.txt"), self.data_file)
+        with open(self.data_file, "a") as f:
+            f.write("# comment\n120 70 70 0.0\nnot a reading\n")
+            f.write("121 71 71 20220801.0900")  # no newline
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_blocks(self):
+        with open(self.data_file, "rb") as f:
+            text = f.read()
+        for size in (1, 5, 64, tail.BLOCK):
+            buffers = list(tail.blocks(io.BytesIO(text), size))
+            self.assertEqual(b"".join(reversed(buffers)), text)
+            for buffer in buffers[1:]:
+                self.assertTrue(buffer.endswith(b"\n"))
+        self.assertEqual(list(tail.blocks(io.BytesIO(b""))), [])
+
+    def test_reads_only_the_end(self):
+        line = b"120 80 60 20220101.0700\n"
+        f = CountingReader(line * 100000)
+        buffers = tail.blocks(f)
+        next(buffers)
+        self.assertLessEqual(f.bytes_read, tail.BLOCK)
+        buffers.close()
+
+    def test_read_last(self):
+        everything = bp_tracker.store_from_file(self.data_file)
+        for number in (1, 3, 20, 1000):
+            for times in ([], ["-t", "800", "1200"]):
+                for size in (7, tail.BLOCK):
+                    args = bp_tracker.get_args(
+                        ["-f", self.data_file, "-n", str(number)] + times)
+                    expected = bp_tracker.filter_data(everything, args)
+                    found = tail.read_last(
+                        self.data_file, number,
+                        lambda store: bp_tracker.passing(store, args), size)
+                    self.assertEqual(list(found), list(expected))
+
+    def test_load_data(self):
+        args = bp_tracker.get_args(["-f", self.data_file, "-n", "2"])
+        self.assertEqual(list(bp_tracker.load_data(args)),
+                         [[120, 70, 70, "0.0"],
+                          [121, 71, 71, "20220801.0900"]])
+        self.assertFalse(os.path.exists(self.data_file + ".cache"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# File test/test_timeofday.py
+
+import os
+import statistics
+import unittest
+
+import bp_tracker
+import classify
+import timeofday
+from store import ReadingStore
+
+data_file = os.path.join(os.path.dirname(__file__), "data", "bp_numbers.txt")
+
+
+class TestTimeOfDay(unittest.TestCase):
+    def setUp(self):
+        self.store = bp_tracker.store_from_file(data_file)
+        self.buckets = timeofday.parse_buckets(timeofday.DEFAULT_BUCKETS)
+
+    def test_parse_buckets(self):
+        self.assertEqual(timeofday.parse_buckets("pm=1800, am=0600"),
+                         [("am", 360), ("pm", 1080)])
+        for text in ("am", "am=6am", "am=2400", "am=0660",
+                     "am=0600,pm=0600"):
+            self.assertRaises(ValueError, timeofday.parse_buckets, text)
+
+    def test_lookup(self):
+        table = timeofday._lookup(self.buckets)
+        self.assertEqual(len(table), 1440)
+        self.assertEqual(table[0], 3)  # evening wraps past midnight
+        self.assertEqual(table[239], 3)
+        self.assertEqual(table[240], 0)
+        self.assertEqual(table[719], 1)
+        self.assertEqual(table[1439], 3)
+
+    def test_group(self):
+        groups = timeofday.group(self.store, self.buckets)
+        self.assertEqual([g.name for g in groups],
+                         ["early", "midmorning", "afternoon", "evening"])
+        single = classify.get("single")
+        by_bucket = {}
+        for r in bp_tracker.array_from_file(data_file):
+            if bp_tracker.no_date_stamp(r):
+                continue
+            hours, minutes = divmod(int(r[3].split(".")[1]), 100)
+            minute = hours * 60 + minutes
+            name = self.buckets[-1][0]
+            for bucket, start in self.buckets:
+                if start <= minute:
+                    name = bucket
+            by_bucket.setdefault(name, []).append(r)
+        for g in groups:
+            readings = by_bucket.get(g.name, [])
+            self.assertEqual(g.count, len(readings))
+            if not readings:
+                continue
+            systolics = [r[0] for r in readings]
+            self.assertAlmostEqual(g.mean(0), statistics.mean(systolics))
+            self.assertAlmostEqual(g.std(0), statistics.pstdev(systolics))
+            self.assertEqual(sum(g.histogram().values()), g.count)
+            self.assertEqual(g.histogram()[single.names[0]],
+                             sum(1 for r in readings
+                                 if single(r[0], r[1]) == single.names[0]))
+
+    def test_undated_and_empty(self):
+        store = ReadingStore.from_lines(["120 80 60 0.0",
+                                         "120 80 60 20220101.0700"])
+        groups = timeofday.group(store, timeofday.parse_buckets("all=0000"))
+        self.assertEqual(groups[0].count, 1)
+        self.assertIn("early (0400-0800): no readings",
+                      timeofday.format_groups(timeofday.group(
+                          ReadingStore(), self.buckets)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# File test/test_writer.py
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import bp_tracker
+import writer
+
+
+def _collector(path, n, k):
+    """Appends <k> readings, one at a time, as collector <n> would."""
+    for i in range(k):
+        writer.append(path, "{} {} {} 20220101.{:04d}\n".format(
+            100 + n, 60 + n, i % 100, i % 1440 // 60 * 100 + i % 60),
+            sync=False)
+
+
+class TestWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "bp.txt")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_concurrent_appends(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(_collector, [self.path] * 4, range(4),
+                              [250] * 4))
+        invalid_lines = []
+        store = bp_tracker.store_from_file(self.path, invalid_lines)
+        self.assertEqual(invalid_lines, [])
+        self.assertEqual(len(store), 1000)
+        for n in range(4):
+            self.assertEqual(list(store.systolics).count(100 + n), 250)
+
+    def test_shared_lock_holds_off_writers(self):
+        writer.append(self.path, "120 80 60 20220101.0700\n")
+        with open(self.path, "rb") as f, writer.locked(f):
+            thread = threading.Thread(target=writer.append, args=(
+                self.path, "121 81 61 20220101.0800\n"))
+            thread.start()
+            time.sleep(0.1)
+            self.assertEqual(len(f.read().splitlines()), 1)
+        thread.join()
+        with open(self.path) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)
+
+    def test_group_commit(self):
+        with writer.GroupCommitWriter(self.path, delay=0.01) as w:
+            threads = [threading.Thread(target=w.write, args=(
+                "{} 80 60 20220101.0700\n".format(100 + i),))
+                for i in range(50)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertLess(w.commits, 50)
+            w.write(b"99 60 60 0.0\n", wait=False)
+        self.assertRaises(ValueError, w.write, "too late\n")
+        store = bp_tracker.store_from_file(self.path)
+        self.assertEqual(sorted(store.systolics), [99] + list(range(100, 150)))
+
+    def test_group_commit_failure(self):
+        path = os.path.join(self.test_dir.name, "missing", "bp.txt")
+        with writer.GroupCommitWriter(path) as w:
+            self.assertRaises(OSError, w.write, "120 80 60 0.0\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+# File: timeofday.py
+
+"""
+Provides functions:
+    parse_buckets, group, format_groups
+and class:
+    Group
+
+Reports on readings grouped by time of day (early, midmorning,
+afternoon, evening by default) rather than on one -t window.
+
+Buckets are given as NAME=hhmm pairs, hhmm being the time each
+bucket starts; a bucket runs until the next one starts and the
+last one wraps around midnight to the first.  Every minute of
+the day is looked up once in a table of bucket numbers, then all
+the readings are aggregated in a single pass: count, mean and
+standard deviation of systolic and diastolic, and the
+distribution of their (classify) categories.
+Undated readings belong to no bucket.
+"""
+
+import math
+
+import classify
+from store import UNDATED
+
+DEFAULT_BUCKETS = "early=0400,midmorning=0800,afternoon=1200,evening=1700"
+
+
+def parse_buckets(text):
+    """
+    "NAME=hhmm,..." => a list of (name, start minute) in order
+    of starting.  Raises ValueError if <text> makes no sense.
+    """
+    buckets = []
+    for item in text.split(","):
+        name, _, start = item.strip().partition("=")
+        if not name or not start.isdigit():
+            raise ValueError("Expected NAME=hhmm, got {!r}".format(item))
+        hours, minutes = divmod(int(start), 100)
+        if not (hours < 24 and minutes < 60):
+            raise ValueError("Invalid time of day: {}".format(start))
+        buckets.append((name, hours * 60 + minutes))
+    buckets.sort(key=lambda bucket: bucket[1])
+    starts = [start for _, start in buckets]
+    if len(set(starts)) < len(starts):
+        raise ValueError("Buckets must start at different times")
+    return buckets
+
+
+def _lookup(buckets):
+    """A table of the bucket number for each minute of the day."""
+    table = bytearray([len(buckets) - 1]) * 1440  # wrapped around
+    for n, (_, start) in enumerate(buckets):
+        table[start:] = bytes([n]) * (1440 - start)
+    return table
+
+
+class Group(object):
+    """The aggregates of the readings in one bucket."""
+
+    def __init__(self, name, start, end, category_names):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.count = 0
+        self.sums = [0, 0]
+        self.squares = [0, 0]
+        self.category_names = category_names
+        self.categories = [0] * (classify.NONE + 1)
+
+    def mean(self, i):
+        return self.sums[i] / self.count
+
+    def std(self, i):
+        """Population standard deviation of column <i>."""
+        variance = self.squares[i] / self.count - self.mean(i) ** 2
+        return math.sqrt(max(variance, 0))
+
+    def histogram(self):
+        """As classify.classify_many returns it."""
+        ret = {name: self.categories[code]
+               for code, name in enumerate(self.category_names)}
+        if self.categories[classify.NONE]:
+            ret[None] = self.categories[classify.NONE]
+        return ret
+
+
+def group(store, buckets, scheme="single"):
+    """
+    Aggregates the readings in <store> by time of day bucket
+    (see parse_buckets), categories according to <scheme>.
+    Returns a list of Groups, one per bucket.
+    """
+    scheme = classify.get(scheme)
+    codes, _ = classify.classify_many(store, scheme)
+    table = _lookup(buckets)
+    groups = [Group(name, start, buckets[(n + 1) % len(buckets)][1],
+                    scheme.names)
+              for n, (name, start) in enumerate(buckets)]
+    for minute, s, d, code in zip(store.minutes, store.systolics,
+                                  store.diastolics, codes):
+        if minute == UNDATED:
+            continue
+        g = groups[table[minute]]
+        g.count += 1
+        g.sums[0] += s
+        g.sums[1] += d
+        g.squares[0] += s * s
+        g.squares[1] += d * d
+        g.categories[code] += 1
+    return groups
+
+
+def _hhmm(minute):
+    return "{:02}{:02}".format(*divmod(minute, 60))
+
+
+def format_groups(groups):
+    """Returns the report (a string) on each bucket in turn."""
+    lines = []
+    for g in groups:
+        title = "{} ({}-{})".format(g.name, _hhmm(g.start), _hhmm(g.end))
+        if not g.count:
+            lines.append("{}: no readings".format(title))
+            continue
+        lines.append("{}: {} readings, average {:.0f}/{:.0f}, "
+                     "std dev {:.1f}/{:.1f}".format(
+                         title, g.count, g.mean(0), g.mean(1),
+                         g.std(0), g.std(1)))
+        for name, count in g.histogram().items():
+            if count:
+                lines.append("    {:>6.1f}%  {}".format(
+                    100 * count / g.count,
+                    "unclassified" if name is None else name))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,833 @@
+#!/usr/bin/env python3
+
+# name:     tracker.py
+# version:  0.0.1
+# date:     20220509
+# authors:  Leam Hall, Alex Kleider
+# desc:     Track and report on blood pressure numbers.
+
+# Notes:
+#  Datafile expects three ints and one float, in order.
+
+# TODO
+#   (?) Add current distance from goal?
+#   Add more tests.
+
+from functools import lru_cache
+from operator import itemgetter
+import os
+import sys
+import time
+
+import writer
+from lazy import lazy_import
+from quickadd import check_file, data_file, quick_args  # noqa: F401
+from store import (DATE, MINUTE_OF_DAY, UNDATED, ReadingStore, decode_stamp,
+                   int2stamp, minute_bounds)
+
+# Only needed for reporting (see quickadd.py.)
+argparse = lazy_import("argparse")
+csv = lazy_import("csv")
+json = lazy_import("json")
+socket = lazy_import("socket")
+binfile = lazy_import("binfile")
+classify = lazy_import("classify")
+cohort = lazy_import("cohort")
+db = lazy_import("db")
+instrument = lazy_import("instrument")
+lineparser = lazy_import("lineparser")
+parsecache = lazy_import("parsecache")
+pipeline = lazy_import("pipeline")
+rolling = lazy_import("rolling")
+rollups = lazy_import("rollups")
+stampindex = lazy_import("stampindex")
+stats = lazy_import("stats")
+tail = lazy_import("tail")
+timeofday = lazy_import("timeofday")
+
+DAEMON_SUFFIX = ".sock"  # the daemon for FILE listens on FILE.sock
+DAEMON_TIMEOUT = 10
+
+systolic_labels = (
+    (0, 0, "dead"),
+    (1, 49, "low: medication required"),
+    (50, 69, "low: at risk"),
+    (70, 85, "low"),
+    (86, 120, "good"),
+    (121, 129, "elevated"),
+    (130, 139, "high: stage 1"),
+    (140, 179, "high: stage 2"),
+    (180, 300, "high: crisis"),
+)
+
+diastolic_labels = (
+    (0, 0, "dead"),
+    (1, 45, "low: medication required"),
+    (46, 55, "low: at risk"),
+    (56, 65, "low"),
+    (66, 79, "good"),
+    (80, 89, "high: stage 1"),
+    (90, 119, "high: stage 2"),
+    (120, 300, "high: crisis"),
+)
+
+
+class NoValidData(ValueError):
+    pass
+
+
+def add(args):
+    # This format allows sequencing now and parsing later.
+    if args.db:
+        stamp = int(time.strftime("%Y%m%d%H%M"))
+        try:
+            values = [int(value) for value in args.add]
+            conn = db.connect(args.db)
+            db.add(conn, *values, stamp)
+        except (ValueError, db.sqlite3.Error) as e:
+            print("Unable to add to {}: {}".format(args.db, e))
+            sys.exit(1)
+        conn.close()
+        return
+    if check_file(args.file, "w"):
+        timestamp = time.strftime("%Y%m%d.%H%M")
+        this_report = args.add
+        this_report.append(timestamp)
+        if binfile.is_binary(args.file):
+            stamp = int(timestamp.replace(".", ""))
+            try:
+                values = [int(value) for value in this_report[:3]]
+                binfile.append(args.file, *values, stamp)
+            except ValueError as e:
+                print("Unable to add to {}: {}".format(args.file, e))
+                sys.exit(1)
+        else:
+            writer.append(args.file, "{} {} {} {}\n".format(*this_report))
+        rollups.update_existing(args.file)
+    else:
+        print("Unable to write to", args.file)
+        sys.exit(1)
+
+
+def parse_record(line):
+    """
+    Returns the reading (systolic, diastolic, pulse, YYYYmmddhhmm)
+    in <line>: as in the data file or CSV (systolic,diastolic,
+    pulse,YYYYmmdd.hhmm.)  If it isn't valid, returns None.
+    """
+    if "," in line:
+        line = " ".join(field.strip() for field in next(csv.reader([line])))
+    try:
+        return lineparser.parse_line(line)[0]
+    except ValueError:
+        return None
+
+
+def import_records(stream, rejected=None):
+    """
+    Returns the list of readings (see parse_record) in <stream>;
+    a CSV header line, if any, is skipped.  Lines which aren't
+    valid readings are appended to <rejected> if provided.
+    """
+    ret = []
+    for n, line in enumerate(useful_lines(stream)):
+        reading = parse_record(line)
+        if reading is not None:
+            ret.append(reading)
+        elif n == 0 and "," in line and not line[0].isdigit():
+            continue  # a CSV header
+        elif rejected is not None:
+            rejected.append(line)
+    return ret
+
+
+def store_readings(readings, report_file, database=None, rejected=None):
+    """
+    Adds <readings> to <database> (see db.py) if given, otherwise
+    to <report_file>: in a single (locked and synced) write.
+    Readings a binary file can't hold are appended to <rejected>.
+    Returns the number of readings added.
+    """
+    if database:
+        conn = db.connect(database)
+        try:
+            return db.insert_many(conn, readings)
+        finally:
+            conn.close()
+    if binfile.is_binary(report_file):
+        unpacked = []
+        n = binfile.append_many(report_file, readings, unpacked)
+        if rejected is not None:
+            rejected.extend("{} {} {} {}".format(s, d, p, int2stamp(stamp))
+                            for s, d, p, stamp in unpacked)
+    else:
+        writer.append(report_file, "".join(
+            "{} {} {} {}\n".format(s, d, p, int2stamp(stamp))
+            for s, d, p, stamp in readings))
+        n = len(readings)
+    rollups.update_existing(report_file)
+    return n
+
+
+def import_readings(args, rejected=None):
+    """
+    Adds the readings in args.import_from (a file name, "-" for
+    stdin; see import_records) to args.db if given, otherwise to
+    args.file (see store_readings.)
+    Returns the number of readings added.
+    """
+    if args.import_from == "-":
+        readings = import_records(sys.stdin, rejected)
+    else:
+        with open(args.import_from, "r") as f:
+            readings = import_records(f, rejected)
+    return store_readings(readings, args.file, args.db, rejected)
+
+
+def valid_data(line, invalid_lines=None):
+    """
+    Accepts what is assumed to be a valid line.
+    If valid, returns a list of int, int, int, string.
+    The line must be a reading as lineparser.py defines it.
+    If not valid and if <invalid_lines> is not None,
+    assumes errors is a list to which the invalid line is added.
+    """
+    try:
+        values, _ = lineparser.parse_line(line)
+    except ValueError:
+        if invalid_lines != None:
+            invalid_lines.append(line)
+        return
+    return [values[0], values[1], values[2], int2stamp(values[3])]
+
+
+def array_from_file(report_file, invalid_lines=None):
+    """
+    Input is the report file: four (string) values per line.
+    Output is [int, int, int, str], systolic, diastolic, pulse, time stamp.
+    [1] Each of the 4 strings represents a number: first three are integers,
+    last (the fourth) is a YYYYmmdd.hhmm string representation of a timestamp
+    """
+    res = []
+    with open(report_file, "r") as f:
+        for line in useful_lines(f):
+            numbers = valid_data(line, invalid_lines=invalid_lines)
+            if numbers:
+                res.append(numbers)
+    return res
+
+
+def store_from_file(report_file, invalid_lines=None, jobs=None):
+    """
+    Like array_from_file but returns a ReadingStore:
+    the readings are kept column-wise in typed arrays.
+    The file is parsed in bulk (see lineparser.py), by <jobs>
+    processes if given, and invalid lines know their line numbers.
+    """
+    return lineparser.read_store(report_file, invalid_lines, jobs=jobs)
+
+
+def average(l):
+    """Takes a list of numerics and returns an integer average"""
+    return sum(l) // len(l)
+
+
+@lru_cache(maxsize=4096)
+def _decoded(stamp):
+    """decode_stamp, remembered: readings share few distinct stamps."""
+    return decode_stamp(stamp)
+
+
+def date_range_filter(datum, begin, end):
+    date = _decoded(datum[3])[DATE]
+    if date != UNDATED and begin <= date <= end:
+        return True
+
+
+def filter_data(data, args):
+    """
+    Although the decision is perhaps arbitrary,
+    we do the filtration first and only consider
+    the -n --number2consider argument on what ever
+    passes the filters rather than starting with
+    -n readings and applying filters afterwards
+    which could result in less than n values being
+    considered.
+    <data> may be a list of lists or a ReadingStore;
+    the same type is returned.
+    """
+    if isinstance(data, ReadingStore):
+        return filter_store(data, args)
+    ret = []
+    ok = True
+    for item in data:
+        if args.times and not time_of_day_filter(
+            item, args.times[0], args.times[1]
+        ):
+            continue
+        if args.range and not date_range_filter(
+            item, args.range[0], args.range[1]
+        ):
+            continue
+        if args.date and not not_before_filter(item, args.date[0]):
+            continue
+        ret.append(item)
+    if args.number:
+        n = args.number[0]
+        l = len(ret)
+        if (n > l) or (n < 1):
+            n = l
+        ret = ret[-n:]
+    if len(ret) == 0:
+        raise NoValidData("No data to report on")
+    return ret
+
+
+def filter_store(store, args):
+    """
+    filter_data for a ReadingStore: the filters are integer
+    comparisons on the decoded date and minute of day columns.
+    """
+    keep = passing(store, args)
+    if args.number:
+        n = args.number[0]
+        if 0 < n < len(keep):
+            keep = keep[-n:]
+    if len(keep) == 0:
+        raise NoValidData("No data to report on")
+    if len(keep) == len(store):
+        return store
+    return store.take(keep)
+
+
+def passing(store, args):
+    """
+    Returns the indices (a sequence) of the readings in the
+    ReadingStore <store> which pass the -t, -r and -d filters.
+    """
+    dates = store.dates
+    keep = range(len(dates))
+    if args.times or args.range or args.date:
+        keep = [i for i in keep if dates[i] != UNDATED]
+    if args.times:
+        begin, end = minute_bounds(*args.times)
+        minutes = store.minutes
+        keep = [i for i in keep if begin <= minutes[i] <= end]
+    if args.range:
+        begin, end = args.range
+        keep = [i for i in keep if begin <= dates[i] <= end]
+    if args.date:
+        date = args.date[0]
+        keep = [i for i in keep if dates[i] >= date]
+    return keep
+
+
+def format_report(systolics, diastolics=None, statistics=None):
+    """
+    Takes the numeric lists (or arrays) of systolics and diastolics,
+    and return a string for printing.
+    <systolics> may instead be a stats.RunningStats with a 'last'
+    reading, such as a pipeline.Summary (in which case
+    <diastolics> is not needed.)
+    If provided, <statistics> (see stats.describe) are appended.
+    """
+    if isinstance(systolics, stats.RunningStats):
+        summary = systolics
+        systolic, diastolic = summary.last[:2]
+        averages = (summary.average(0), summary.average(1))
+    else:
+        systolic = get_last(systolics)
+        diastolic = get_last(diastolics)
+        averages = (average(systolics), average(diastolics))
+    result = "Systolic {} ({}) \n".format(
+        systolic, get_label(systolic, systolic_labels)
+    )
+    result += "Diastolic {} ({}) \n".format(
+        diastolic, get_label(diastolic, diastolic_labels)
+    )
+    result += "Average {}/{} \n".format(*averages)
+    if statistics:
+        result += "\n" + stats.format_stats(statistics)
+    return result
+
+
+def get_args(argv=None):
+    """Parses (and checks) <argv>, by default the command line."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="report FILE (default bp_numbers.txt)",
+        default=data_file,
+    )
+    parser.add_argument(
+        "-a",
+        "--add",
+        nargs=3,
+        help="add in the order of systolic, diastolic, pulse",
+    )
+    parser.add_argument(
+        "--import",
+        dest="import_from",
+        metavar="SOURCE",
+        help="add the readings (each with its own time stamp) in SOURCE, "
+        "a data or CSV file or - for stdin",
+    )
+    parser.add_argument(
+        "-t",
+        "--times",
+        nargs=2,
+        type=int,
+        help="only consider readings within TIMES span",
+    )
+    parser.add_argument(
+        "-r",
+        "--range",
+        nargs=2,
+        type=int,
+        help="only consider readings taken within date RANGE",
+    )
+    parser.add_argument(
+        "-d",
+        "--date",
+        nargs=1,
+        type=int,
+        help="ignore readings prior to DATE",
+    )
+    parser.add_argument(
+        "-n",
+        "--number",
+        nargs=1,
+        type=int,
+        help="only consider the last NUMBER valid readings",
+    )
+    parser.add_argument(
+        "--convert",
+        metavar="BINFILE",
+        help="write the readings in FILE to BINFILE (packed binary format)",
+    )
+    parser.add_argument(
+        "--db",
+        metavar="DATABASE",
+        help="keep the readings in (and report from) an SQLite DATABASE "
+        "rather than FILE",
+    )
+    parser.add_argument(
+        "--db-import",
+        help="add the readings in FILE to the --db DATABASE",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--stream",
+        help="read FILE in constant memory (no caching or indexing)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--stats",
+        help="add standard deviation, percentiles etc. to the report",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--categories",
+        nargs="?",
+        const="single",
+        choices=sorted(classify.SCHEMES),
+        help="add the %% of readings in each category of SCHEME "
+        "(default: single, the AHA categories)",
+        metavar="SCHEME",
+    )
+    parser.add_argument(
+        "--by-time-of-day",
+        nargs="?",
+        const=timeofday.DEFAULT_BUCKETS,
+        help="report on each time of day bucket, BUCKETS being "
+        "NAME=hhmm start times (default: {})".format(
+            timeofday.DEFAULT_BUCKETS),
+        metavar="BUCKETS",
+    )
+    parser.add_argument(
+        "--trend",
+        nargs="*",
+        type=int,
+        help="add the series of DAYS day moving averages, one point "
+        "per day (default: 7 and 30 days; -n is ignored)",
+        metavar="DAYS",
+    )
+    parser.add_argument(
+        "--daemon",
+        help="have the daemon for FILE (see daemon.py) answer, falling "
+        "back to reading FILE if none is running",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--dir",
+        help="report on every data file (one per patient) under DIR",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of processes used by --dir (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="parse a large FILE in JOBS processes (default: one)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=("table", "json"),
+        help="report time, counts and peak memory of each stage on "
+        "stderr (as a table or as JSON)",
+    )
+    parser.add_argument(
+        "-e",
+        "--error",
+        help="send invalid data lines to stdout",
+        action="store_true",
+    )
+    args = parser.parse_args(argv)
+    if (args.stats or args.categories or args.by_time_of_day
+            or args.trend is not None) and args.stream:
+        parser.error("--stats, --categories, --by-time-of-day and --trend "
+                     "need all the readings; can't --stream")
+    if args.db_import and not args.db:
+        parser.error("--db-import needs --db")
+    if args.db and (args.stream or args.convert):
+        parser.error("--stream and --convert read FILE, not --db")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs: JOBS must be positive")
+    if args.trend is not None:
+        args.trend = args.trend or list(rolling.DEFAULT_WINDOWS)
+        if min(args.trend) < 1:
+            parser.error("--trend: DAYS must be positive")
+    if args.by_time_of_day:
+        try:
+            args.by_time_of_day = timeofday.parse_buckets(args.by_time_of_day)
+        except ValueError as e:
+            parser.error("--by-time-of-day: {}".format(e))
+    return args
+
+
+def get_label(num, scale):
+    """
+    Takes a number and a tuple of (min, max, lable) tuples,
+    returns the label for the range the number falls into.
+    """
+    for group in scale:
+        lower, upper, label = group
+        if num in range(lower, upper + 1):
+            # The 'upper + 1' is required because range doesn't include upper
+            return label
+    return None
+
+
+def get_last(val):
+    """Returns last element of a list."""
+    return val[-1]
+
+
+def list_from_index(data, index):
+    """
+    Takes a list of lists and returns a list of the specific index.
+    If <data> is a ReadingStore its column is returned (not a copy.)
+    """
+    if isinstance(data, ReadingStore):
+        return data.column(index)
+    result = []
+    for element in data:
+        result.append(element[index])
+    return result
+
+
+def load_data(args, invalid_lines=None):
+    """
+    Returns a ReadingStore of the readings in args.file which
+    filter_data needs to see.  Date restrictions (-r, -d) are
+    answered from the sidecar index (see stampindex.py) so only
+    the relevant part of the file is read, if that's a small part
+    of it; if not, from the parse cache.  When invalid lines are
+    wanted (-e) all readings are considered.
+    Text files are parsed through a cache (see parsecache.py)
+    so only lines appended since the last run get parsed, but for
+    -n NUMBER without dates: the file is read backwards from its
+    end (see tail.py) until NUMBER readings pass -t.
+    """
+    if (args.range or args.date) and invalid_lines is None:
+        begin = end = None
+        if args.range:
+            begin, end = args.range
+        if args.date:
+            begin = max(begin or 0, args.date[0])
+        store = stampindex.read_dates(args.file, begin, end,
+                                      stampindex.SMALL)
+        if store is not None:
+            return store
+        return parsecache.load(args.file, jobs=args.jobs)
+    if binfile.is_binary(args.file):
+        return binfile.read_store(args.file, args)
+    if args.number and args.number[0] > 0 and invalid_lines is None:
+        return tail.read_last(args.file, args.number[0],
+                              lambda store: passing(store, args))
+    return parsecache.load(args.file, invalid_lines, args.jobs)
+
+
+def make_report(args, invalid_lines=None):
+    """
+    Returns the report <args> asks for on args.file (or args.db),
+    answered from the rollups, by streaming or by loading (and
+    filtering) the readings, as appropriate.
+    Invalid lines are appended to <invalid_lines> if provided.
+    Raises NoValidData if no reading passes the filters.
+    """
+    if args.db is None and rollups.answers(args):
+        begin, end = args.range or (None, None)
+        if args.date:
+            begin = max(begin or 0, args.date[0])
+        with instrument.stage("rollups") as st:
+            total = rollups.range_summary(args.file, begin, end)
+            st.count = total.count
+        if total.count == 0:
+            raise NoValidData("No data to report on")
+        report = format_report(total.summary())
+        if args.categories:
+            report += "\n" + classify.format_distribution(
+                total.histogram(classify.get(args.categories).names),
+                "Categories: " + args.categories)
+        return report
+    if args.stream:
+        with instrument.stage("stream") as st:
+            summary = pipeline.stream_report(args, invalid_lines)
+            st.count = summary.count
+        if summary.count == 0:
+            raise NoValidData("No data to report on")
+        return format_report(summary)
+    if args.trend:
+        load_args = rolling.widen(args, max(args.trend))
+    else:
+        load_args = args
+    if args.db:
+        with instrument.stage("query") as st:
+            conn = db.connect(args.db)
+            loaded = db.query(conn, load_args)
+            conn.close()
+            st.count = len(loaded)
+        if args.trend:
+            return report_from(args, loaded)
+        if len(loaded) == 0:
+            raise NoValidData("No data to report on")
+        return report_from(args, loaded, loaded)  # filtered and in order
+    with instrument.stage("load") as st:
+        loaded = load_data(load_args, invalid_lines)
+        st.count = len(loaded)
+    return report_from(args, loaded)
+
+
+def report_from(args, loaded, data=None):
+    """
+    Returns the report <args> asks for on the ReadingStore <loaded>
+    (which holds at least the readings the filters let through and,
+    for --trend, those of the days before.)  <data> is what passes
+    the filters, in order, if that is already known.
+    Raises NoValidData if no reading passes the filters.
+    """
+    if data is None:
+        with instrument.stage("filter") as st:
+            data = filter_data(loaded, args)
+            st.count = len(data)
+        with instrument.stage("sort") as st:
+            data = sort_by_index(data, -1)
+            st.count = len(data)
+    statistics = None
+    if args.stats:
+        with instrument.stage("stats"):
+            statistics = stats.describe(data)
+    with instrument.stage("format"):
+        sys_list = list_from_index(data, 0)
+        dia_list = list_from_index(data, 1)
+        report = format_report(sys_list, dia_list, statistics)
+    if args.categories:
+        with instrument.stage("classify"):
+            _, histogram = classify.classify_many(data, args.categories)
+            report += "\n" + classify.format_distribution(
+                histogram, "Categories: " + args.categories)
+    if args.by_time_of_day:
+        with instrument.stage("time of day"):
+            groups = timeofday.group(data, args.by_time_of_day)
+            report += "\n" + timeofday.format_groups(groups)
+    if args.trend:
+        with instrument.stage("trend"):
+            trend_args = rolling.widen(args, max(args.trend))
+            series = sort_by_index(filter_data(loaded, trend_args), -1)
+            begin, end = args.range or (None, None)
+            if args.date:
+                begin = max(begin or 0, args.date[0])
+            points = rolling.trend(series, args.trend, begin, end)
+            report += "\n" + rolling.format_trend(points, args.trend)
+    return report
+
+
+def ask_daemon(report_file, argv):
+    """
+    Sends the command line <argv> to the daemon serving
+    <report_file> (see daemon.py) and returns its reply (a dict),
+    or None if there is no daemon running (or it doesn't answer
+    within DAEMON_TIMEOUT seconds.)
+    """
+    try:
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.settimeout(DAEMON_TIMEOUT)
+            sock.connect(report_file + DAEMON_SUFFIX)
+            sock.sendall(json.dumps(argv).encode() + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            reply = b"".join(iter(lambda: sock.recv(65536), b""))
+        return json.loads(reply)
+    except (OSError, ValueError):
+        return None
+
+
+def no_date_stamp(data):
+    return _decoded(data[3])[DATE] == UNDATED
+
+
+def not_before_filter(data, date):
+    day = _decoded(data[3])[DATE]
+    if day != UNDATED and day >= date:
+        return True
+
+
+def sort_by_index(data, index):
+    """
+    Sorts lists of lists by specified index in sub-lists.
+    A ReadingStore is sorted (stably) by the specified column.
+    """
+    if isinstance(data, ReadingStore):
+        column = data.column(index)
+        order = sorted(range(len(column)), key=column.__getitem__)
+        return data.take(order)
+    get_on_index = itemgetter(index)
+    return sorted(data, key=get_on_index)
+
+
+def time_of_day_filter(datum, begin, end):
+    minute = _decoded(datum[3])[MINUTE_OF_DAY]
+    begin, end = minute_bounds(begin, end)
+    if minute != UNDATED and begin <= minute <= end:
+        return True
+
+
+def useful_lines(stream, comment="#"):
+    """
+    A generator which accepts a stream of lines (strings.)
+    Blank lines and leading and/or trailing white space are ignored.
+    If <comment> resolves to true, lines beginning with <comment>
+    (after being stripped of leading spaces) are also ignored.
+    <comment> can be set to <None> if don't want this functionality.
+    Other lines are returned ("yield"ed) stripped of leading and
+    trailing white space.
+    """
+    for line in stream:
+        line = line.strip()
+        if comment and line.startswith(comment):
+            continue
+        if line:
+            yield line
+
+
+def main(argv=None):
+    """Runs the command line <argv> (by default sys.argv[1:].)"""
+    if argv is None:
+        argv = sys.argv[1:]
+    args = quick_args(argv) or get_args(argv)
+
+    if args.add:
+        add(args)
+        sys.exit()
+
+    if args.import_from:
+        rejected = []
+        try:
+            n = import_readings(args, rejected)
+        except (OSError, UnicodeDecodeError, ValueError,
+                db.sqlite3.Error) as e:
+            print("Unable to import {}: {}".format(args.import_from, e))
+            sys.exit(1)
+        print("Imported {} readings, rejected {}.".format(n, len(rejected)))
+        if args.error:
+            for line in rejected:
+                print("\t" + line)
+        sys.exit()
+
+    if args.error:
+        invalid_lines = []
+    else:
+        invalid_lines = None
+
+    if args.profile:
+        instrument.enable()
+
+    if args.dir:
+        summaries, totals = cohort.cohort_report(args.dir, args, args.workers)
+        if not summaries:
+            print("No data files found in {}, exiting.".format(args.dir))
+            sys.exit(1)
+        print(cohort.format_cohort(args.dir, summaries, totals))
+        sys.exit()
+
+    try:
+        if args.convert:
+            data = store_from_file(args.file, invalid_lines, args.jobs)
+            n = binfile.convert(data, args.convert, invalid_lines)
+            print("Wrote {} readings to {}.".format(n, args.convert))
+            sys.exit()
+        if args.db_import:
+            conn = db.connect(args.db)
+            n = db.import_file(conn, args.file, invalid_lines)
+            conn.close()
+            print("Imported {} readings into {}.".format(n, args.db))
+            if invalid_lines:
+                print("The following invalid lines were not imported:")
+                for line in invalid_lines:
+                    print("\t" + line)
+            sys.exit()
+        reply = None
+        if args.daemon and not (args.db or args.profile):
+            reply = ask_daemon(args.file, argv)
+        if reply is None:
+            report = make_report(args, invalid_lines)
+        elif reply.get("error") == "missing":
+            raise FileNotFoundError(args.file)
+        elif reply.get("error") == "no data":
+            raise NoValidData("No data to report on")
+        else:
+            report = reply["report"]
+            if reply["invalid_lines"] is not None:
+                invalid_lines = [lineparser.InvalidLine(line, number)
+                                 for number, line in reply["invalid_lines"]]
+    except FileNotFoundError:
+        print("Unable to find {}, exiting.".format(args.file))
+        sys.exit(1)
+    except binfile.BinaryFileError as e:
+        print("Unable to read {}: {}, exiting.".format(args.file, e))
+        sys.exit(1)
+    except NoValidData:
+        print("No viable data in {}, exiting.".format(args.db or args.file))
+        sys.exit(1)
+    except db.sqlite3.Error as e:
+        print("Unable to use {}: {}, exiting.".format(args.db, e))
+        sys.exit(1)
+
+    print(report)
+    if invalid_lines:
+        print("The following invalid lines were found:")
+        for line in invalid_lines:
+            print("\t" + lineparser.numbered(line))
+    elif args.error:
+        print("No invalid lines found.")
+    if args.profile:
+        instrument.report(args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+# File: writer.py
+
+"""
+Provides functions:
+    append, locked
+and class:
+    GroupCommitWriter
+
+Safe appends to data files which several processes (collectors,
+bp_tracker --add, the ingestion server) may be writing at once.
+
+append() writes each batch of records with a single os.write on a
+file opened O_APPEND, holding an exclusive fcntl advisory lock
+(flock) for the duration, so records are never interleaved and
+a record is never split between writes.  Readers of the tail of a
+file take the shared lock (see 'locked') and so never see a
+record half written.
+
+A GroupCommitWriter collects the records of many callers (threads)
+and commits them with one append (write and fsync) per batch
+rather than one per record; each caller's write returns once its
+record is on disk.
+"""
+
+import fcntl
+import os
+import time
+
+
+class locked(object):
+    """
+    Holds the (shared, else exclusive) lock on open file <f>:
+    a context manager.  (A class rather than contextlib's
+    decorator as appending mustn't import any more than it
+    needs, see quickadd.py.)
+    """
+
+    def __init__(self, f, shared=True):
+        self.f = f
+        self.shared = shared
+
+    def __enter__(self):
+        fcntl.flock(self.f.fileno(),
+                    fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        return self.f
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.f.fileno(), fcntl.LOCK_UN)
+
+
+def append(path, data, sync=True, check=None):
+    """
+    Appends <data> (bytes, or a str to be encoded) to <path> with
+    one write under an exclusive lock, then (if <sync>) fsyncs.
+    <check>, if given, is called with the file descriptor once the
+    lock is held; whatever it raises stops the write.
+    Raises OSError if the write was short (e.g. the disk is full.)
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    flags = os.O_WRONLY if check is None else os.O_RDWR
+    fd = os.open(path, flags | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if check is not None:
+            check(fd)
+        written = os.write(fd, data)
+        if written != len(data):
+            raise OSError("Short write to {}: {} of {} bytes".format(
+                path, written, len(data)))
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)  # which releases the lock
+    return len(data)
+
+
+class GroupCommitWriter(object):
+    """
+    Appends the records (bytes or str) given to 'write', by any
+    number of threads, to <path> in batches: one locked write and
+    fsync per batch.  A batch is whatever has been written while
+    the previous one was being committed, plus whatever arrives
+    within <delay> seconds.  Use as a context manager or call
+    'close' (which commits what is pending.)
+    """
+
+    def __init__(self, path, delay=0.002, sync=True):
+        import threading  # not needed just to append
+
+        self.path = path
+        self.delay = delay
+        self.sync = sync
+        self.commits = 0  # batches committed
+        self._cond = threading.Condition()
+        self._pending = []
+        self._submitted = 0  # records written (numbered from 1)
+        self._committed = 0  # the last record committed
+        self._failed = []  # (first, last record, error) of failed batches
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record, wait=True):
+        """
+        Queues <record>; unless not <wait>ing, returns only once it
+        has been committed (raising OSError if the commit failed.)
+        """
+        if isinstance(record, str):
+            record = record.encode()
+        with self._cond:
+            if self._closed:
+                raise ValueError("write to a closed GroupCommitWriter")
+            self._pending.append(record)
+            self._submitted += 1
+            number = self._submitted
+            self._cond.notify_all()
+            if wait:
+                self._wait(number)
+        return number
+
+    def _wait(self, number):
+        while self._committed < number:
+            self._cond.wait()
+        for first, last, error in self._failed:
+            if first <= number <= last:
+                raise error
+
+    def flush(self):
+        """Waits until everything written so far has been committed."""
+        with self._cond:
+            self._wait(self._submitted)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            if self.delay:
+                time.sleep(self.delay)  # let others join the batch
+            with self._cond:
+                batch, self._pending = self._pending, []
+                last = self._submitted
+            try:
+                append(self.path, b"".join(batch), self.sync)
+            except OSError as e:
+                with self._cond:
+                    self._failed.append((last - len(batch) + 1, last, e))
+            with self._cond:
+                self.commits += 1
+                self._committed = last
+                self._cond.notify_all()